@@ -0,0 +1,105 @@
+"""
+    Compare JSONConnection.args_to_json_object with the conversion it
+    replaced, on an add_network payload and on lists and arrays of
+    datetimes.
+
+    usage:
+
+        python benchmarks/bench_args.py --nodes 100000
+"""
+import time
+import logging
+import argparse
+import collections
+from datetime import datetime, timedelta
+
+import numpy
+import hydra_base as hb
+
+from hydra_client.connection import JSONConnection
+from hydra_client.connection.base_connection import DEFAULT_DATETIME_FORMAT
+
+from synthetic import make_network
+
+
+def legacy_args_to_json_object(dateformat, *args):
+    """ args_to_json_object as it was before the conversion module. """
+    for arg in args:
+        if arg is None:
+            yield None
+        elif isinstance(arg, str):
+            yield arg
+        elif isinstance(arg, (int, float)):
+            yield arg
+        elif isinstance(arg, datetime):
+            yield datetime.strftime(arg, dateformat)
+        elif isinstance(arg, hb.JSONObject):
+            yield arg
+        elif isinstance(arg, collections.abc.Mapping):
+            yield hb.JSONObject(arg)
+        elif isinstance(arg, collections.abc.Iterable):
+            arg = list(arg)
+            if len(arg) > 0 and isinstance(arg[0], (str, int, float, datetime)):
+                json_friendly_arg = []
+                for a in arg:
+                    if isinstance(a, datetime):
+                        json_friendly_arg.append(datetime.strftime(a, dateformat))
+                    else:
+                        json_friendly_arg.append(a)
+                yield json_friendly_arg
+            elif len(arg) > 0 and isinstance(arg[0], hb.JSONObject):
+                yield arg
+            else:
+                yield [hb.JSONObject(v) for v in arg]
+        else:
+            yield hb.JSONObject(arg)
+
+
+def timed(func, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def compare(label, connection, arg):
+    old = timed(lambda: list(legacy_args_to_json_object(DEFAULT_DATETIME_FORMAT, arg)))
+    new = timed(lambda: list(connection.args_to_json_object(arg)))
+    print("%-34s old %7.3fs  new %7.3fs  (%.1fx)" % (label, old, new, old / new))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--nodes', type=int, default=100000)
+    parser.add_argument('--dates', type=int, default=100000)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+
+    #Only the conversion is timed, so no database is needed
+    connection = JSONConnection.__new__(JSONConnection)
+    connection.dateformat = DEFAULT_DATETIME_FORMAT
+
+    network, _ = make_network(num_nodes=args.nodes)
+    compare("add_network, %s nodes" % args.nodes, connection, network)
+
+    nodes = network['nodes']
+    compare("list of %s node dicts" % len(nodes), connection, nodes)
+
+    wrapped = [hb.JSONObject(n) for n in nodes[:args.nodes // 10]]
+    compare("network of JSONObject nodes", connection, {'name': 'net', 'nodes': wrapped})
+
+    dates = [datetime(2000, 1, 1) + timedelta(hours=i) for i in range(args.dates)]
+    compare("list of %s datetimes" % args.dates, connection, dates)
+
+    array = numpy.array(dates, dtype='datetime64[us]')
+    new = timed(lambda: list(connection.args_to_json_object(array)))
+    old = timed(lambda: [d.strftime(DEFAULT_DATETIME_FORMAT) for d in array.tolist()])
+    print("%-34s old %7.3fs  new %7.3fs  (%.1fx)" % ("datetime64 array (old: via tolist)", old, new, old / new))
+
+
+if __name__ == '__main__':
+    main()
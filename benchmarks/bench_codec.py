@@ -0,0 +1,54 @@
+"""
+    Compare decoding a large get_network response the old way, json.loads
+    followed by a recursive JSONObject wrap, with the single pass codec,
+    and encoding with json.dumps against the codec.
+
+    usage:
+
+        python benchmarks/bench_codec.py --nodes 20000
+"""
+import json
+import time
+import argparse
+
+from hydra_base.lib.objects import JSONObject
+
+from hydra_client.connection import codec
+
+from synthetic import make_network
+
+
+def timed(func, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--nodes', type=int, default=20000)
+    args = parser.parse_args()
+
+    network, _ = make_network(num_nodes=args.nodes)
+    body = json.dumps(network)
+    print("Payload: %.1f MB, orjson %s" % (len(body) / 1e6,
+          'installed' if codec.orjson is not None else 'not installed'))
+
+    old_decode = timed(lambda: JSONObject(json.loads(body)))
+    new_decode = timed(lambda: codec.decode(body))
+    print("decode  json.loads + JSONObject: %6.3fs" % old_decode)
+    print("decode  codec.decode:            %6.3fs  (%.2fx)" % (new_decode, old_decode / new_decode))
+
+    wrapped = codec.decode(body)
+    old_encode = timed(lambda: json.dumps(wrapped))
+    new_encode = timed(lambda: codec.dumps(wrapped))
+    print("encode  json.dumps:              %6.3fs" % old_encode)
+    print("encode  codec.dumps:             %6.3fs  (%.2fx)" % (new_encode, old_encode / new_encode))
+
+
+if __name__ == '__main__':
+    main()
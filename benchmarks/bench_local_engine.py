@@ -0,0 +1,63 @@
+"""
+    Compare many small JSONConnection calls with the engine disposed of
+    after each call (the default) against persistent_engine=True, which
+    keeps the engine and its connection pool for the life of the
+    connection.
+
+    The gap is widest against a networked database, where disposing means
+    opening a new connection, and logging in, for every call:
+
+        python benchmarks/bench_local_engine.py --calls 5000
+        python benchmarks/bench_local_engine.py --db-url mysql+mysqldb://root@localhost/hydra_bench
+"""
+import os
+import time
+import logging
+import argparse
+import tempfile
+
+from hydra_client.connection import JSONConnection
+
+
+def run(db_url, calls, persistent_engine):
+    connection = JSONConnection(db_url=db_url, user_id=1, persistent_engine=persistent_engine,
+                                metrics=False)
+    connection.get_dimension(1)
+
+    start = time.perf_counter()
+    for i in range(calls):
+        connection.get_dimension(1)
+    elapsed = time.perf_counter() - start
+
+    connection.close_session()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--calls', type=int, default=5000)
+    parser.add_argument('--db-url', default=None,
+                        help="Defaults to a temporary SQLite file")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+
+    db_url = args.db_url
+    if db_url is None:
+        db_url = 'sqlite:///%s' % os.path.join(tempfile.mkdtemp(), 'hydra_bench.db')
+
+    connection = JSONConnection(db_url=db_url, user_id=1)
+    connection.connect()
+    connection.close_session()
+
+    disposed = run(db_url, args.calls, persistent_engine=False)
+    persistent = run(db_url, args.calls, persistent_engine=True)
+
+    print("%s calls to get_dimension" % args.calls)
+    print("dispose after each call: %6.2fs  %7.0f calls/s" % (disposed, args.calls / disposed))
+    print("persistent engine:       %6.2fs  %7.0f calls/s  (%.2fx)" % (persistent, args.calls / persistent,
+                                                                     disposed / persistent))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""
+    Compare reads made one after another through a JSONConnection against
+    the same reads spread over the worker processes of a
+    LocalConnectionPool. Each read fetches every attribute in the
+    database, so the work is in hydra_base and the conversion of its
+    results rather than in the database.
+
+    The speedup is bounded by the number of cores:
+
+        python benchmarks/bench_local_pool.py --calls 200 --attributes 2000 --workers 8
+"""
+import os
+import time
+import logging
+import argparse
+import tempfile
+
+from hydra_client.connection import JSONConnection, LocalConnectionPool
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--calls', type=int, default=200)
+    parser.add_argument('--attributes', type=int, default=2000)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--db-url', default=None,
+                        help="Defaults to a temporary SQLite file")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+
+    db_url = args.db_url
+    if db_url is None:
+        db_url = 'sqlite:///%s' % os.path.join(tempfile.mkdtemp(), 'hydra_bench.db')
+
+    connection = JSONConnection(db_url=db_url, user_id=1, persistent_engine=True)
+    connection.connect()
+    connection.add_attributes([{'name': 'bench_attr_%s' % i, 'dimension_id': None}
+                               for i in range(args.attributes)])
+
+    connection.get_attributes()
+    start = time.perf_counter()
+    for i in range(args.calls):
+        connection.get_attributes()
+    serial = time.perf_counter() - start
+
+    with LocalConnectionPool(connection=connection, workers=args.workers) as pool:
+        #Start the workers before timing
+        pool.get_attributes().result()
+        start = time.perf_counter()
+        futures = [pool.get_attributes() for i in range(args.calls)]
+        for future in futures:
+            future.result()
+        pooled = time.perf_counter() - start
+
+    connection.close_session()
+
+    print("%s calls to get_attributes, %s attributes" % (args.calls, args.attributes))
+    print("one connection:           %6.2fs  %6.1f calls/s" % (serial, args.calls / serial))
+    print("pool of %3s processes:    %6.2fs  %6.1f calls/s  (%.2fx)" % (args.workers, pooled,
+                                                                      args.calls / pooled, serial / pooled))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""
+    Time HydraNetwork.load on a synthetic network, and lookups of every
+    node by id and by name, and of an attribute by name, afterwards. Then
+    time queries for the nodes of each type and group, and the type
+    catalog, as an exporter looping over template types makes them.
+
+    usage:
+
+        python benchmarks/bench_network_load.py --nodes 80000
+"""
+import time
+import argparse
+
+from hydra_base.lib.objects import JSONObject
+
+from hydra_client.resources import HydraNetwork
+
+from synthetic import make_network
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--nodes', type=int, default=10000)
+    parser.add_argument('--attrs', type=int, default=5)
+    parser.add_argument('--queries', type=int, default=20)
+    args = parser.parse_args()
+
+    json_net, json_attrs = make_network(args.nodes, args.attrs)
+    json_net = JSONObject(json_net)
+    json_attrs = [JSONObject(a) for a in json_attrs]
+
+    start = time.perf_counter()
+    network = HydraNetwork()
+    network.load(json_net, json_attrs)
+    load = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for node_id in range(1, args.nodes + 1):
+        node = network.get_node(node_id=node_id)
+        network.get_node(node_name=node.name)
+        node.get_attribute(attr_name='ATTR_1')
+    lookups = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(args.queries):
+        for node_type in network.get_node_types(template_id=1):
+            network.get_node(node_type_id=node_type.id)
+        for group in network.groups:
+            network.get_node(group=group.ID)
+    queries = time.perf_counter() - start
+
+    print("load:    %8.2fs for %s nodes and %s links" % (load, len(network.nodes), len(network.links)))
+    print("lookups: %8.2fs, %.1f us per node" % (lookups, lookups / args.nodes * 1e6))
+    print("queries: %8.2fs for %s rounds of type and group queries" % (queries, args.queries))
+
+
+if __name__ == '__main__':
+    main()
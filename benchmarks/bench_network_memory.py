@@ -0,0 +1,98 @@
+"""
+    Measure the memory HydraNetwork.load keeps for a synthetic network,
+    per resource and per resource attribute. The default network has
+    100,000 nodes, 99,999 links and 5 attributes on each, so about 1M
+    resource attributes.
+
+    With --columnar, a ColumnarNetwork is loaded instead. With
+    --scenarios N, the network has N scenarios, all loaded at once with
+    all_scenarios, and the memory and time added by each scenario after
+    the first, and of switching scenario, are reported too.
+
+    Only memory allocated during the load is counted. The get_network
+    JSON, including the dataset values the attributes refer to, is
+    allocated beforehand.
+
+    usage:
+
+        python benchmarks/bench_network_memory.py --nodes 100000
+"""
+import gc
+import time
+import argparse
+import tracemalloc
+
+from hydra_base.lib.objects import JSONObject
+
+from hydra_client.resources import HydraNetwork
+from hydra_client.columnar import ColumnarNetwork
+
+from synthetic import make_network
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--nodes', type=int, default=100000)
+    parser.add_argument('--attrs', type=int, default=5)
+    parser.add_argument('--columnar', action='store_true')
+    parser.add_argument('--scenarios', type=int, default=1)
+    args = parser.parse_args()
+
+    json_net, json_attrs = make_network(args.nodes, args.attrs, args.scenarios)
+    json_net = JSONObject(json_net)
+    json_attrs = [JSONObject(a) for a in json_attrs]
+    #The first scenario alone, to tell the cost of the others
+    first_net = JSONObject(dict(json_net, scenarios=json_net.scenarios[:1]))
+    gc.collect()
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    if args.columnar:
+        network = ColumnarNetwork()
+        network.load(json_net, json_attrs)
+    elif args.scenarios > 1:
+        network = HydraNetwork()
+        network.load(first_net, json_attrs, all_scenarios=True)
+        first_retained = tracemalloc.get_traced_memory()[0] - before
+        first_seconds = time.perf_counter() - start
+        for json_scenario in json_net.scenarios[1:]:
+            network.add_scenario(json_scenario)
+    else:
+        network = HydraNetwork()
+        network.load(json_net, json_attrs)
+    seconds = time.perf_counter() - start
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    if args.columnar:
+        tables = [network.network_table, network.nodes, network.links, network.groups]
+        num_resources = sum(len(t) for t in tables)
+        num_attributes = sum(int((t.resource_attr_ids != -1).sum()) for t in tables)
+    else:
+        resources = [network] + network.nodes + network.links + network.groups
+        num_resources = len(resources)
+        num_attributes = sum(len(r.attributes) for r in resources)
+
+    print("%s" % network.__class__.__name__)
+    print("resources:  %s, with %s attributes" % (num_resources, num_attributes))
+    print("load:       %.2fs" % seconds)
+    print("retained:   %.1f MB" % (retained / 1e6))
+    print("per resource (with its attributes): %6.0f bytes" % (retained / num_resources))
+    print("per attribute:                      %6.0f bytes" % (retained / num_attributes))
+
+    if args.scenarios > 1 and not args.columnar:
+        added = args.scenarios - 1
+        print("per added scenario: %.1f MB, %.2fs (%.0f bytes per attribute)" % (
+            (retained - first_retained) / added / 1e6, (seconds - first_seconds) / added,
+            (retained - first_retained) / added / num_attributes))
+        start = time.perf_counter()
+        for scenario_id in network.get_scenario_ids():
+            network.set_scenario(scenario_id)
+        switch = (time.perf_counter() - start) / args.scenarios
+        print("set_scenario:       %.1f us" % (switch * 1e6))
+
+
+if __name__ == '__main__':
+    main()
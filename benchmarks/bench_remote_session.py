@@ -0,0 +1,93 @@
+"""
+    Compare the call rate of RemoteJSONConnection with a fresh
+    `requests.post` per call against the pooled keep-alive session.
+
+    A local stand-in server answers every call with a small JSON body,
+    so the numbers reflect client and connection setup overhead only.
+
+    usage:
+
+        python benchmarks/bench_remote_session.py --calls 2000
+"""
+import json
+import time
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from hydra_client.connection import RemoteJSONConnection
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """ Answers every POST with the same small JSON object. """
+    protocol_version = 'HTTP/1.1'
+    #Headers and body are written separately, so without this every
+    #keep-alive response stalls on a delayed ACK.
+    disable_nagle_algorithm = True
+    body = json.dumps({'id': 1, 'name': 'Node 1', 'x': 0, 'y': 0}).encode('utf-8')
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        self.rfile.read(length)
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StandInHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def bench_unpooled(url, calls):
+    """ The previous behaviour: a new requests.post, and so a new TCP connection, per call. """
+    payload = json.dumps({'get_node': {'node_id': 1}})
+    start = time.perf_counter()
+    for _ in range(calls):
+        r = requests.post(url, data=payload,
+                          headers={'Content-Type': 'application/json'},
+                          cookies={'beaker.session.id': 'bench', 'user_id': '1'})
+        json.loads(r.content)
+    return calls / (time.perf_counter() - start)
+
+
+def bench_pooled(url, calls):
+    conn = RemoteJSONConnection(url=url, session_id='bench', app_name='bench')
+    conn.user_id = 1
+    start = time.perf_counter()
+    for _ in range(calls):
+        conn.call('get_node', {'node_id': 1})
+    rate = calls / (time.perf_counter() - start)
+    conn.close_session()
+    return rate
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--calls', type=int, default=2000)
+    args = parser.parse_args()
+
+    server = start_server()
+    url = 'http://127.0.0.1:%s/json' % server.server_address[1]
+
+    unpooled = bench_unpooled(url, args.calls)
+    pooled = bench_pooled(url, args.calls)
+
+    print("requests.post per call: %8.1f calls/s" % unpooled)
+    print("pooled session:         %8.1f calls/s" % pooled)
+    print("speedup:                %8.2fx" % (pooled / unpooled))
+
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+"""
+    Measure the client-side overhead of calling a hydra function as a
+    method, conn.get_network(1), with the generated stubs against the
+    closure __getattr__ used to make on every attribute access. The calls
+    go nowhere, so only the dispatch and argument handling are timed.
+
+        python benchmarks/bench_stubs.py --calls 1000000
+"""
+import time
+import logging
+import argparse
+
+from hydra_client.connection.base_connection import BaseConnection
+
+
+class NullConnection(BaseConnection):
+    def _call(self, func_name, *args, **kwargs):
+        return None
+
+
+class ClosureConnection(NullConnection):
+    """ Dispatch as BaseConnection.__getattr__ did before the stubs. """
+    def __getattr__(self, name):
+        def wrapped(*args, **kwargs):
+            return self.call(name, *args, **kwargs)
+        return wrapped
+
+
+def timed(connection, calls):
+    start = time.perf_counter()
+    for i in range(calls):
+        connection.get_network(1, include_data=True)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--calls', type=int, default=1000000)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+
+    closure = timed(ClosureConnection(metrics=False), args.calls)
+    stub = timed(NullConnection(metrics=False), args.calls)
+
+    print("%s calls to get_network(1, include_data=True)" % args.calls)
+    print("closure per access:  %6.2fs  %5.2f us/call" % (closure, closure / args.calls * 1e6))
+    print("generated stub:      %6.2fs  %5.2f us/call" % (stub, stub / args.calls * 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""
+    Compare the call rate of RemoteJSONConnection over its transports:
+    TCP (http://), a Unix domain socket (unix://) and an in-process WSGI
+    application (inproc://).
+
+    A stand-in server answers every call with a small JSON body, so the
+    numbers reflect the client and transport overhead only.
+
+    usage:
+
+        python benchmarks/bench_transports.py --calls 2000
+"""
+import os
+import json
+import time
+import argparse
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from socketserver import ThreadingUnixStreamServer
+
+from hydra_client.connection import RemoteJSONConnection
+from hydra_client.connection import transports
+
+BODY = json.dumps({'id': 1, 'name': 'Node 1', 'x': 0, 'y': 0}).encode('utf-8')
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """ Answers every POST with the same small JSON object. """
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        self.rfile.read(length)
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+
+    def log_message(self, *args):
+        pass
+
+
+class TCPStandInHandler(StandInHandler):
+    #Headers and body are written separately, so without this every
+    #keep-alive response stalls on a delayed ACK.
+    disable_nagle_algorithm = True
+
+
+def stand_in_app(environ, start_response):
+    """ The stand-in server as a WSGI application. """
+    environ['wsgi.input'].read(int(environ.get('CONTENT_LENGTH') or 0))
+    start_response('200 OK', [('Content-Type', 'application/json'),
+                              ('Content-Length', str(len(BODY)))])
+    return [BODY]
+
+
+def serve(server):
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def bench(url, calls):
+    conn = RemoteJSONConnection(url=url, session_id='bench', app_name='bench')
+    conn.user_id = 1
+    conn.call('get_node', {'node_id': 1})
+    start = time.perf_counter()
+    for _ in range(calls):
+        conn.call('get_node', {'node_id': 1})
+    rate = calls / (time.perf_counter() - start)
+    conn.close_session()
+    return rate
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--calls', type=int, default=2000)
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp()
+    socket_path = os.path.join(tmpdir, 'hydra.sock')
+
+    tcp_server = serve(ThreadingHTTPServer(('127.0.0.1', 0), TCPStandInHandler))
+    unix_server = serve(ThreadingUnixStreamServer(socket_path, StandInHandler))
+    transports.register_app('bench', stand_in_app)
+
+    rates = [
+        ('http://', bench('http://127.0.0.1:%s/json' % tcp_server.server_address[1], args.calls)),
+        ('unix://', bench('unix://%s' % socket_path, args.calls)),
+        ('inproc://', bench('inproc://bench', args.calls)),
+    ]
+    for name, rate in rates:
+        print("%-10s %8.1f calls/s  %5.2fx" % (name, rate, rate / rates[0][1]))
+
+    tcp_server.shutdown()
+    unix_server.shutdown()
+    unix_server.server_close()
+    os.remove(socket_path)
+    os.rmdir(tmpdir)
+
+
+if __name__ == '__main__':
+    main()
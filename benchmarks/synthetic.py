@@ -0,0 +1,86 @@
+"""
+    Build synthetic get_network results for the benchmarks, shaped like the
+    JSON returned by the Hydra server.
+"""
+
+
+def make_network(num_nodes=1000, attrs_per_resource=5, num_scenarios=1):
+    """
+        A network of 'num_nodes' nodes joined in a chain by links, with
+        'attrs_per_resource' attributes on every node and link, a scalar
+        dataset for every resource attribute in each scenario, and every
+        node in one of ten groups.
+    """
+    node_type = {'id': 2, 'name': 'Node Type', 'template_id': 1, 'template_name': 'Template'}
+    link_type = {'id': 3, 'name': 'Link Type', 'template_id': 1, 'template_name': 'Template'}
+    group_type = {'id': 4, 'name': 'Group Type', 'template_id': 1, 'template_name': 'Template'}
+
+    attributes = [{'id': a, 'name': 'attr_%s' % a, 'dimension_id': None}
+                  for a in range(1, attrs_per_resource + 1)]
+
+    resource_attrs = []
+
+    def make_attributes(ref_key, ref_id):
+        res_attrs = []
+        for attr in attributes:
+            res_attr = {
+                'id': len(resource_attrs) + 1,
+                'attr_id': attr['id'],
+                'ref_key': ref_key,
+                'attr_is_var': 'N',
+            }
+            resource_attrs.append(res_attr)
+            res_attrs.append(res_attr)
+        return res_attrs
+
+    groups = [{'id': g, 'name': 'Group %s' % g, 'description': '',
+               'attributes': make_attributes('GROUP', g), 'types': [group_type]}
+              for g in range(1, 11)]
+
+    nodes = [{'id': n, 'name': 'Node %s' % n, 'description': '',
+              'x': n * 1.5, 'y': n * 2.5, 'layout': None,
+              'attributes': make_attributes('NODE', n), 'types': [node_type]}
+             for n in range(1, num_nodes + 1)]
+
+    links = [{'id': n, 'name': 'Link %s' % n, 'description': '',
+              'node_1_id': n, 'node_2_id': n + 1, 'layout': None,
+              'attributes': make_attributes('LINK', n), 'types': [link_type]}
+             for n in range(1, num_nodes)]
+
+    groupitems = [{'id': n, 'ref_key': 'NODE', 'node_id': n, 'link_id': None,
+                   'subgroup_id': None, 'group_id': (n % 10) + 1}
+                  for n in range(1, num_nodes + 1)]
+
+    scenarios = []
+    for s in range(1, num_scenarios + 1):
+        resourcescenarios = [{
+            'resource_attr_id': ra['id'],
+            'scenario_id': s,
+            'dataset': {
+                'id': ra['id'] * num_scenarios + s,
+                'name': 'dataset %s' % ra['id'],
+                'type': 'scalar',
+                'value': str(ra['id'] * 0.5 + s),
+                'unit_id': None,
+                'hidden': 'N',
+                'metadata': {},
+            },
+        } for ra in resource_attrs]
+        scenarios.append({'id': s, 'name': 'Scenario %s' % s,
+                          'resourcescenarios': resourcescenarios,
+                          'resourcegroupitems': groupitems})
+
+    network = {
+        'id': 1,
+        'name': 'Synthetic network',
+        'description': 'A network for benchmarking',
+        'layout': '{"color": "red"}',
+        'types': [{'id': 1, 'name': 'Network Type', 'template_id': 1, 'template_name': 'Template'}],
+        'attributes': make_attributes('NETWORK', 1),
+        'nodes': nodes,
+        'links': links,
+        'resourcegroups': groups,
+        'scenarios': scenarios,
+    }
+
+    return network, attributes
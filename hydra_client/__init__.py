@@ -16,6 +16,7 @@
 # -*- coding: utf-8 -*-
 
 from .resources import *
+from .columnar import *
 from .connection import *
 from .exception import *
 from .output import *
@@ -0,0 +1,515 @@
+# (c) Copyright 2013, 2014, University of Manchester
+#
+# HydraLib is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# HydraPlatform is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with HydraPlatform.  If not, see <http://www.gnu.org/licenses/>
+#
+# -*- coding: utf-8 -*-
+"""
+    A network held as columns of NumPy arrays rather than one Python object
+    per node, link and attribute, for analytics over very large networks.
+
+    Each kind of resource is a ResourceTable, in which row i of every
+    array describes the same resource:
+
+        nodes.ids, nodes.names, nodes.x, nodes.y
+        links.node_1_id, links.node_2_id, and the node rows they refer to,
+            links.node_1_row and links.node_2_row
+        (type_rows, type_ids) and (group_rows, group_ids), pairs of arrays
+            listing each resource's types and the groups it is in
+        dataset_ids, resource_attr_ids and attr_is_var, with a row for each
+            resource and a column for each of the attributes in attr_ids
+
+    A missing resource attribute or dataset is MISSING (-1). Each dataset's
+    type and value are kept once, in ColumnarNetwork.dataset_types and
+    dataset_values, in the order of the sorted ColumnarNetwork.dataset_ids.
+
+    Requires the 'numpy' package.
+"""
+
+__all__ = ['ColumnarNetwork', 'ResourceTable', 'ResourceRow', 'MISSING']
+
+import logging
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from .resources import HydraNetwork, HydraResource, HydraAttribute
+
+log = logging.getLogger(__name__)
+
+#Marks a resource attribute or dataset which a resource does not have
+MISSING = -1
+
+#The column of a resource group item holding the id of its member, by ref_key
+GROUP_MEMBER_KEYS = {
+    'NODE': 'node_id',
+    'LINK': 'link_id',
+    'GROUP': 'subgroup_id',
+}
+
+
+def _id_array(values):
+    return numpy.array(values, dtype=numpy.int64)
+
+
+def _float_array(values):
+    return numpy.array([numpy.nan if v is None else v for v in values], dtype=numpy.float64)
+
+
+def _lookup(sorted_keys, positions, keys):
+    """
+        The entries of 'positions' for 'keys', found in 'sorted_keys', which
+        'positions' is in the order of. Keys which are not found give MISSING.
+    """
+    keys = numpy.asarray(keys, dtype=numpy.int64)
+    if len(sorted_keys) == 0:
+        return numpy.full(keys.shape, MISSING, dtype=numpy.int64)
+    found = numpy.minimum(numpy.searchsorted(sorted_keys, keys), len(sorted_keys) - 1)
+    return numpy.where(sorted_keys[found] == keys, positions[found], MISSING)
+
+
+class ResourceTable(object):
+    """
+        The nodes, links or groups of a ColumnarNetwork, as columns. Indexing
+        a table gives a ResourceRow view of one resource:
+
+            node = network.nodes[0]
+            node.id, node.name, node.x
+
+        Tables are built by ColumnarNetwork; the arrays should be treated
+        as read-only.
+    """
+    def __init__(self, ref_key, ids, names, type_rows, type_ids, attr_ids,
+                 resource_attr_ids, dataset_ids, attr_is_var, columns=None):
+        self.ref_key = ref_key
+        self.ids = ids
+        self.names = names
+        self.type_rows = type_rows
+        self.type_ids = type_ids
+        self.group_rows = _id_array([])
+        self.group_ids = _id_array([])
+        self.attr_ids = attr_ids
+        self.resource_attr_ids = resource_attr_ids
+        self.dataset_ids = dataset_ids
+        self.attr_is_var = attr_is_var
+        #Further per-resource columns, such as 'x' and 'y' for nodes
+        self.columns = columns if columns is not None else {}
+        #The rows in order of id, and {attr_id: column}, built on first use
+        self._order = None
+        self._columns_by_attr = None
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, row):
+        if row < 0:
+            row += len(self.ids)
+        if row < 0 or row >= len(self.ids):
+            raise IndexError("%s row %s out of range" % (self.ref_key, row))
+        return ResourceRow(self, row)
+
+    def __iter__(self):
+        for row in range(len(self.ids)):
+            yield ResourceRow(self, row)
+
+    def __getattr__(self, name):
+        columns = self.__dict__.get('columns')
+        if columns is not None and name in columns:
+            return columns[name]
+        raise AttributeError("%s table has no column '%s'" % (self.__dict__.get('ref_key'), name))
+
+    def rows_of(self, resource_ids):
+        """
+            The rows of the resources with the ids 'resource_ids', as an
+            array, with MISSING for ids not in the table.
+        """
+        if self._order is None:
+            self._order = numpy.argsort(self.ids, kind='stable')
+        return _lookup(self.ids[self._order], self._order, resource_ids)
+
+    def row_of(self, resource_id):
+        """ The row of the resource with the id 'resource_id', or None. """
+        row = int(self.rows_of([resource_id])[0])
+        return None if row == MISSING else row
+
+    def column_of(self, attr_id):
+        """ The column of the attribute 'attr_id' in the attribute arrays, or None. """
+        if self._columns_by_attr is None:
+            self._columns_by_attr = {attr_id: col for col, attr_id in enumerate(self.attr_ids.tolist())}
+        return self._columns_by_attr.get(attr_id)
+
+    def rows_of_type(self, type_id):
+        """ The rows of the resources with the type 'type_id', as an array. """
+        return self.type_rows[self.type_ids == type_id]
+
+    def rows_in_group(self, group_id):
+        """ The rows of the resources in the group 'group_id', as an array. """
+        return self.group_rows[self.group_ids == group_id]
+
+    def _set_groups(self, group_rows, group_ids):
+        order = numpy.argsort(group_rows, kind='stable')
+        self.group_rows = group_rows[order]
+        self.group_ids = group_ids[order]
+
+    def _slice(self, rows, row):
+        start, end = numpy.searchsorted(rows, (row, row + 1))
+        return slice(start, end)
+
+
+class ResourceRow(object):
+    """
+        A view of one row of a ResourceTable. Views hold no data of their
+        own, so are cheap to make and always reflect the table.
+    """
+    __slots__ = ('table', 'row')
+
+    def __init__(self, table, row):
+        self.table = table
+        self.row = row
+
+    def __repr__(self):
+        return "<%s %s %s>" % (self.table.ref_key, self.id, self.name)
+
+    def __eq__(self, other):
+        return isinstance(other, ResourceRow) and other.table is self.table and other.row == self.row
+
+    def __hash__(self):
+        return hash((id(self.table), self.row))
+
+    @property
+    def id(self):
+        return int(self.table.ids[self.row])
+
+    @property
+    def name(self):
+        return self.table.names[self.row]
+
+    @property
+    def type_ids(self):
+        table = self.table
+        return table.type_ids[table._slice(table.type_rows, self.row)].tolist()
+
+    @property
+    def group_ids(self):
+        table = self.table
+        return table.group_ids[table._slice(table.group_rows, self.row)].tolist()
+
+    def dataset_id(self, attr_id):
+        """ The id of the dataset of the attribute 'attr_id', or None. """
+        col = self.table.column_of(attr_id)
+        if col is None:
+            return None
+        dataset_id = int(self.table.dataset_ids[self.row, col])
+        return None if dataset_id == MISSING else dataset_id
+
+    def resource_attr_id(self, attr_id):
+        """ The id of the resource attribute of 'attr_id', or None. """
+        col = self.table.column_of(attr_id)
+        if col is None:
+            return None
+        ra_id = int(self.table.resource_attr_ids[self.row, col])
+        return None if ra_id == MISSING else ra_id
+
+    def __getattr__(self, name):
+        columns = self.table.columns
+        if name in columns:
+            return columns[name][self.row].item()
+        raise AttributeError("%s has no column '%s'" % (self.table.ref_key, name))
+
+
+class ColumnarNetwork(object):
+    """
+        A network held as NumPy arrays, one ResourceTable each for its
+        nodes, links and groups, built from the same get_network result as
+        HydraNetwork.load:
+
+            network = ColumnarNetwork()
+            network.load(json_net, json_attrs)
+
+            reservoirs = network.nodes.rows_of_type(reservoir_type_id)
+            volumes = network.nodes.dataset_ids[:, network.nodes.column_of(volume_attr_id)]
+
+        The values of the network's first scenario are read, as in
+        HydraNetwork. to_hydra_network and from_hydra_network convert to
+        and from a HydraNetwork for existing code.
+    """
+    def __init__(self):
+        if numpy is None:
+            raise ImportError("ColumnarNetwork requires the 'numpy' package.")
+
+        self.ID = None
+        self.name = None
+        self.description = None
+        self.scenario_id = None
+        self.types = []
+        #The network's own attributes, as a table of one row
+        self.network_table = None
+        self.nodes = None
+        self.links = None
+        self.groups = None
+        #{attr_id: name} and {type id: type}
+        self.attributes = {}
+        self.type_catalog = {}
+        self.dataset_ids = _id_array([])
+        self.dataset_types = numpy.array([], dtype=object)
+        self.dataset_values = numpy.array([], dtype=object)
+
+    def load(self, json_net, json_attrs):
+        """ Fill the network from a get_network result and the attributes it uses. """
+        scenario = json_net.scenarios[0]
+        datasets_by_ra = {rs.resource_attr_id: rs.dataset for rs in scenario.resourcescenarios}
+
+        self.attributes = {attr.id: attr.name for attr in json_attrs}
+        self.ID = json_net.id
+        self.name = json_net.name
+        self.description = json_net.description
+        self.scenario_id = scenario.id
+        self.types = list(json_net.types or [])
+
+        #{dataset id: (type, value)}, until they are made into columns
+        datasets = {}
+
+        def read(json_resources):
+            resources = []
+            for resource in json_resources or []:
+                attributes = []
+                for res_attr in resource.attributes or []:
+                    dataset = datasets_by_ra.get(res_attr.id)
+                    dataset_id = MISSING
+                    if dataset is not None and dataset.id is not None:
+                        dataset_id = dataset.id
+                        datasets[dataset_id] = (dataset.type, dataset.value)
+                    attributes.append((res_attr.attr_id, res_attr.id, res_attr.attr_is_var == 'Y', dataset_id))
+                types = [t for t in resource.types or [] if t is not None]
+                resources.append((resource.id, resource.name, types, attributes))
+            return resources
+
+        log.info("Loading columns")
+        self.network_table = self._make_table('NETWORK', [(json_net.id, json_net.name, [], read([json_net])[0][3])])
+        self.groups = self._make_table('GROUP', read(json_net.resourcegroups))
+        self.nodes = self._make_table('NODE', read(json_net.nodes), columns={
+            'x': _float_array([n.x for n in json_net.nodes]),
+            'y': _float_array([n.y for n in json_net.nodes]),
+        })
+        links = json_net.links or []
+        self.links = self._make_table('LINK', read(links), columns={
+            'node_1_id': _id_array([l.node_1_id for l in links]),
+            'node_2_id': _id_array([l.node_2_id for l in links]),
+        })
+        self._link_node_rows()
+
+        members = {ref_key: ([], []) for ref_key in GROUP_MEMBER_KEYS}
+        for item in scenario.resourcegroupitems or []:
+            if item.ref_key in GROUP_MEMBER_KEYS:
+                member_ids, group_ids = members[item.ref_key]
+                member_ids.append(getattr(item, GROUP_MEMBER_KEYS[item.ref_key]))
+                group_ids.append(item.group_id)
+        self._set_group_members(members)
+        self._set_datasets(datasets)
+
+    def _make_table(self, ref_key, resources, columns=None):
+        """
+            A ResourceTable of 'resources', a list of (id, name, types,
+            [(attr_id, resource_attr_id, is_var, dataset_id)]).
+        """
+        ids = _id_array([r[0] for r in resources])
+        names = numpy.array([r[1] for r in resources], dtype=object)
+
+        type_rows, type_ids = [], []
+        attr_ids = {}
+        for row, (_, _, types, attributes) in enumerate(resources):
+            for ttype in types:
+                type_rows.append(row)
+                type_ids.append(ttype.id)
+                self.type_catalog.setdefault(ttype.id, ttype)
+            for attribute in attributes:
+                attr_ids.setdefault(attribute[0], len(attr_ids))
+
+        shape = (len(resources), len(attr_ids))
+        resource_attr_ids = numpy.full(shape, MISSING, dtype=numpy.int64)
+        dataset_ids = numpy.full(shape, MISSING, dtype=numpy.int64)
+        attr_is_var = numpy.zeros(shape, dtype=bool)
+        cells = [(row, attr_ids[a[0]], a[1], a[2], a[3])
+                 for row, r in enumerate(resources) for a in r[3]]
+        if len(cells) > 0:
+            rows, cols, ra_ids, is_var, ds_ids = zip(*cells)
+            resource_attr_ids[rows, cols] = ra_ids
+            dataset_ids[rows, cols] = ds_ids
+            attr_is_var[rows, cols] = is_var
+
+        return ResourceTable(ref_key, ids, names, _id_array(type_rows), _id_array(type_ids),
+                             _id_array(list(attr_ids)), resource_attr_ids, dataset_ids, attr_is_var,
+                             columns=columns)
+
+    def _link_node_rows(self):
+        """ Add the rows of the nodes each link joins, MISSING for unknown nodes. """
+        for end in ('node_1', 'node_2'):
+            self.links.columns['%s_row' % end] = self.nodes.rows_of(self.links.columns['%s_id' % end])
+
+    def _set_group_members(self, members):
+        """ 'members' is {ref_key: ([member id], [group id])}. """
+        for ref_key, table in (('NODE', self.nodes), ('LINK', self.links), ('GROUP', self.groups)):
+            member_ids, group_ids = members.get(ref_key, ([], []))
+            rows = table.rows_of(member_ids)
+            known = rows != MISSING
+            table._set_groups(rows[known], _id_array(group_ids)[known])
+
+    def _set_datasets(self, datasets):
+        """ 'datasets' is {dataset id: (type, value)}. """
+        dataset_ids = sorted(datasets)
+        self.dataset_ids = _id_array(dataset_ids)
+        self.dataset_types = numpy.empty(len(dataset_ids), dtype=object)
+        self.dataset_values = numpy.empty(len(dataset_ids), dtype=object)
+        for i, dataset_id in enumerate(dataset_ids):
+            self.dataset_types[i], self.dataset_values[i] = datasets[dataset_id]
+
+    def dataset_positions(self, dataset_ids):
+        """
+            The positions of 'dataset_ids' in dataset_types and
+            dataset_values, as an array, with MISSING for unknown ids.
+        """
+        return _lookup(self.dataset_ids, numpy.arange(len(self.dataset_ids)), dataset_ids)
+
+    def get_value(self, dataset_id):
+        """ The value of the dataset 'dataset_id', or None. """
+        position = int(self.dataset_positions([dataset_id])[0])
+        return self.dataset_values[position] if position != MISSING else None
+
+    def to_hydra_network(self):
+        """ A HydraNetwork with the same resources, attributes and values. """
+        network = HydraNetwork()
+        network.ID = self.ID
+        network.name = self.name
+        network.description = self.description
+        network.scenario_id = self.scenario_id
+        network.set_type(list(self.types))
+        self._add_attributes(network, self.network_table, 0,
+                             self.dataset_positions(self.network_table.dataset_ids))
+
+        node_names = self.nodes.names
+        for kind, table in (('group', self.groups), ('node', self.nodes), ('link', self.links)):
+            add = getattr(network, 'add_%s' % kind)
+            positions = self.dataset_positions(table.dataset_ids)
+            for row in range(len(table)):
+                resource = HydraResource()
+                resource.ID = int(table.ids[row])
+                resource.name = table.names[row]
+                if kind == 'node':
+                    resource.X = _scalar(table.columns['x'][row])
+                    resource.Y = _scalar(table.columns['y'][row])
+                elif kind == 'link':
+                    resource.from_node = _name_at(node_names, table.columns['node_1_row'][row])
+                    resource.to_node = _name_at(node_names, table.columns['node_2_row'][row])
+                resource.types = [self.type_catalog[type_id] for type_id in
+                                  table.type_ids[table._slice(table.type_rows, row)].tolist()]
+                resource.groups = table.group_ids[table._slice(table.group_rows, row)].tolist()
+                self._add_attributes(resource, table, row, positions)
+                add(resource)
+        return network
+
+    def _add_attributes(self, resource, table, row, positions):
+        ra_ids = table.resource_attr_ids[row].tolist()
+        dataset_ids = table.dataset_ids[row].tolist()
+        positions = positions[row].tolist()
+        is_var = table.attr_is_var[row].tolist()
+        for col, attr_id in enumerate(table.attr_ids.tolist()):
+            if ra_ids[col] == MISSING:
+                continue
+            attribute = HydraAttribute.__new__(HydraAttribute)
+            attribute.name = self.attributes.get(attr_id)
+            attribute.attr_id = attr_id
+            attribute.resource_attr_id = ra_ids[col]
+            attribute.is_var = is_var[col]
+            if positions[col] != MISSING:
+                attribute.dataset_id = dataset_ids[col]
+                attribute.dataset_type = self.dataset_types[positions[col]]
+                attribute.value = self.dataset_values[positions[col]]
+            else:
+                attribute.dataset_id = None
+                attribute.dataset_type = ''
+                attribute.value = None
+            resource.attributes.append(attribute)
+
+    @classmethod
+    def from_hydra_network(cls, hydra_network):
+        """
+            A ColumnarNetwork of a HydraNetwork whose resources have IDs.
+            Links are matched to their nodes by name.
+        """
+        network = cls()
+        datasets = {}
+        network.ID = getattr(hydra_network, 'ID', None)
+        network.name = hydra_network.name
+        network.description = hydra_network.description
+        network.scenario_id = hydra_network.scenario_id
+        network.types = [t for t in hydra_network.types if t is not None]
+
+        def read(resources):
+            ret = []
+            for resource in resources:
+                attributes = []
+                for attribute in resource.attributes:
+                    network.attributes.setdefault(attribute.attr_id, attribute.name)
+                    dataset_id = MISSING
+                    if attribute.dataset_id is not None:
+                        dataset_id = attribute.dataset_id
+                        datasets[dataset_id] = (attribute.dataset_type, attribute.value)
+                    attributes.append((attribute.attr_id, attribute.resource_attr_id,
+                                       attribute.is_var, dataset_id))
+                types = [t for t in resource.types if t is not None]
+                ret.append((getattr(resource, 'ID', None), resource.name, types, attributes))
+            return ret
+
+        nodes = hydra_network.nodes
+        links = hydra_network.links
+
+        def node_id(node_name):
+            #A HydraNetwork's links name their nodes rather than giving their ids
+            node = hydra_network.get_node(node_name=node_name)
+            return node.ID if node is not None else MISSING
+
+        network.network_table = network._make_table('NETWORK', [(network.ID, network.name, [],
+                                                                 read([hydra_network])[0][3])])
+        network.groups = network._make_table('GROUP', read(hydra_network.groups))
+        network.nodes = network._make_table('NODE', read(nodes), columns={
+            'x': _float_array([getattr(n, 'X', None) for n in nodes]),
+            'y': _float_array([getattr(n, 'Y', None) for n in nodes]),
+        })
+        network.links = network._make_table('LINK', read(links), columns={
+            'node_1_id': _id_array([node_id(l.from_node) for l in links]),
+            'node_2_id': _id_array([node_id(l.to_node) for l in links]),
+        })
+        network._link_node_rows()
+
+        members = {}
+        for ref_key, resources in (('NODE', nodes), ('LINK', links), ('GROUP', hydra_network.groups)):
+            member_ids, group_ids = members.setdefault(ref_key, ([], []))
+            for resource in resources:
+                for group_id in resource.groups:
+                    member_ids.append(resource.ID)
+                    group_ids.append(group_id)
+        network._set_group_members(members)
+        network._set_datasets(datasets)
+        return network
+
+
+def _scalar(value):
+    """ A float from a column, with NaN as None. """
+    value = value.item()
+    return None if value != value else value
+
+
+def _name_at(names, row):
+    return names[row] if row != MISSING else None
@@ -1,5 +1,11 @@
 
 from .json_connection import JSONConnection
 from .remote_json_connection import RemoteJSONConnection, JsonConnection
+from .async_remote_json_connection import AsyncRemoteJSONConnection
+from .pool import LocalConnectionPool
+from .offline_connection import OfflineConnection
+from .snapshot import export_snapshot
 
-__all__ = ['JSONConnection', 'RemoteJSONConnection', 'JsonConnection']
+__all__ = ['JSONConnection', 'RemoteJSONConnection', 'JsonConnection',
+           'AsyncRemoteJSONConnection', 'LocalConnectionPool',
+           'OfflineConnection', 'export_snapshot']
@@ -0,0 +1,376 @@
+# (c) Copyright 2013, 2014, University of Manchester
+#
+# HydraLib is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# HydraPlatform is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with HydraPlatform.  If not, see <http://www.gnu.org/licenses/>
+#
+# -*- coding: utf-8 -*-
+
+__all__ = ['AsyncRemoteJSONConnection']
+import time
+import asyncio
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+from hydra_client.exception import RequestError, CircuitOpenError
+
+from .remote_json_connection import RemoteJSONConnection, UNAVAILABLE_STATUSES
+from .retry import parse_retry_after
+from .streaming import iter_loaded
+from .fanout import MapResult, split_args
+from . import codec
+from . import tracing
+from . import transports
+
+DEFAULT_MAX_CONCURRENCY = 100
+
+
+class AsyncRemoteJSONConnection(RemoteJSONConnection):
+    """
+        Remote connection to a Hydra server for use with asyncio.
+
+        Every server function is a coroutine, so many calls can be in flight
+        at once over a single shared HTTP client:
+
+            conn = AsyncRemoteJSONConnection(url='http://localhost:8080/json')
+            await conn.login(username='root', password='')
+            networks = await asyncio.gather(*[conn.get_network(network_id=i) for i in ids])
+            await conn.close_session()
+
+        Batches are not supported, as their futures are resolved by blocking
+        calls: batch() raises a TypeError. Use asyncio.gather instead.
+        iter_call is an async generator, used with 'async for', and map
+        is a coroutine returning all its results.
+
+        Requires the 'aiohttp' package.
+    """
+    def __init__(self, url=None, session_id=None, app_name=None, **kwargs):
+        """
+            args:
+                url: The url of the hydra platform server. http://, https://
+                     and unix:// urls are supported, but not inproc://.
+                session_id: The session ID if one exists for that user already
+                app_name: The name of the app making the requests
+            kwargs:
+                max_concurrency: The maximum number of calls in flight at once.
+                                 Further calls wait for a free slot.
+                pool_maxsize: The maximum number of keep-alive connections per host
+                connect_timeout: Seconds to wait for a connection to the server
+                read_timeout: Seconds to wait for the server to respond.
+                              None (the default) waits indefinitely.
+                retry: A RetryPolicy, or True for the default one, for
+                       resending idempotent calls which fail
+                circuit_breaker: A CircuitBreaker, or True for the default one,
+                                 to fail fast while the server is down
+        """
+        if aiohttp is None:
+            raise ImportError("AsyncRemoteJSONConnection requires the 'aiohttp' package.")
+
+        super(AsyncRemoteJSONConnection, self).__init__(url=url,
+                                                        session_id=session_id,
+                                                        app_name=app_name,
+                                                        **kwargs)
+
+        scheme = transports.get_scheme(self.url)
+        if scheme == 'unix':
+            #The host is only used for the Host header
+            self._post_url = 'http://localhost%s' % transports.request_path(self.url)
+        elif transports.is_host_url(self.url):
+            self._post_url = self.url
+        else:
+            raise RequestError("AsyncRemoteJSONConnection cannot connect to %s urls" % (scheme,))
+
+        self.max_concurrency = kwargs.get('max_concurrency', DEFAULT_MAX_CONCURRENCY)
+        self._client = None
+        self._semaphore = None
+
+    @property
+    def client(self):
+        """
+            The shared aiohttp client. It must be created inside a running
+            event loop, so is created on first use.
+        """
+        if self._client is None or self._client.closed:
+            if transports.get_scheme(self.url) == 'unix':
+                connector = aiohttp.UnixConnector(path=transports.unix_socket_path(self.url),
+                                                  limit_per_host=self.pool_maxsize)
+            else:
+                connector = aiohttp.TCPConnector(limit_per_host=self.pool_maxsize)
+            timeout = aiohttp.ClientTimeout(sock_connect=self.timeout[0],
+                                            sock_read=self.timeout[1])
+            self._client = aiohttp.ClientSession(connector=connector, timeout=timeout)
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._client
+
+    async def close_session(self):
+        """
+            Close the shared HTTP client and its connections.
+        """
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close_session()
+
+    async def call(self, func, *args, **kwargs):
+        """
+            Call an arbitrary hydra server function, identified by the 'name' parameter
+
+            example:
+                await self.call('get_network', {'network_id':2})
+
+            Cancelling the awaiting task aborts the request and releases
+            its connection. Reads go through the response cache, if the
+            connection has one.
+        """
+        with tracing.start_span(self.tracer, func, connection=self.__class__.__name__):
+            return await self._async_read_through(func, args, kwargs)
+
+    async def _async_read_through(self, func_name, args, kwargs):
+        """
+            As BaseConnection._read_through, awaiting the call. Identical
+            reads in flight at once are shared through SingleFlight.do_async.
+        """
+        cache = self.cache
+        single_flight = self.single_flight
+        if cache is None and single_flight is None:
+            return await self._async_call(func_name, *args, **kwargs)
+
+        key = None
+        if cache is not None:
+            key = cache.key(func_name, args, kwargs)
+            if key is not None:
+                hit, value = cache.get(key)
+                tracing.current_span().set('cache_hit', hit)
+                if hit:
+                    return value
+
+        flight_key = None
+        if single_flight is not None:
+            flight_key = single_flight.key(func_name, args, kwargs)
+
+        try:
+            if flight_key is not None:
+                ret = await single_flight.do_async(flight_key,
+                                                   lambda: self._async_call(func_name, *args, **kwargs))
+            else:
+                ret = await self._async_call(func_name, *args, **kwargs)
+        finally:
+            if cache is not None and key is None:
+                cache.invalidate(func_name)
+
+        if key is not None:
+            cache.set(key, func_name, ret)
+
+        return ret
+
+    async def _async_call(self, func, *args, **kwargs):
+        start_time = time.time()
+        self.log.info("Calling: %s" % (func))
+
+        span = tracing.current_span()
+
+        with span.phase('encode'):
+            call, headers, cookie = self._prepare_call(func, args, kwargs)
+            body = codec.dumps(call)
+
+        start = time.perf_counter()
+        content = b''
+        try:
+            with span.phase('request'):
+                status, content = await self._async_post([func], body, headers, cookie)
+            if status >= 400:
+                raise RequestError(self._get_error(content, call, headers))
+        except Exception:
+            if self.metrics is not None:
+                self.metrics.record(func, time.perf_counter() - start, error=True,
+                                    request_bytes=len(body), response_bytes=len(content))
+            raise
+
+        span.set('request_bytes', len(body))
+        span.set('response_bytes', len(content))
+
+        with span.phase('decode'):
+            json_obj_ret = self._parse_response(content)
+
+        if self.metrics is not None:
+            self.metrics.record(func, time.perf_counter() - start,
+                                request_bytes=len(body), response_bytes=len(content))
+
+        self.log.info('done (%s)'%(time.time() -start_time))
+
+        return json_obj_ret
+
+    async def _async_post(self, func_names, data, headers, cookies):
+        """
+            POST a request body to the server and return the response's
+            status and content, resending it under the retry policy and
+            checking the circuit breaker, as `_post` does.
+        """
+        client = self.client
+        retry = self.retry
+        retryable = retry is not None and retry.is_retryable(func_names)
+        max_attempts = retry.max_attempts if retryable else 1
+        unavailable = retry.retry_statuses if retry is not None else UNAVAILABLE_STATUSES
+        breaker = self.circuit_breaker
+
+        self._count('requests')
+        attempt = 0
+        while True:
+            attempt += 1
+            if breaker is not None and not breaker.allow():
+                self._count('circuit_rejections')
+                raise CircuitOpenError("Not calling %s: the server at %s is unavailable"
+                                       % (', '.join(func_names), self.url))
+
+            self._count('attempts')
+            if attempt > 1:
+                tracing.current_span().set('attempts', attempt)
+            try:
+                async with self._semaphore:
+                    async with client.post(self._post_url,
+                                           data=data,
+                                           headers=headers,
+                                           cookies=cookies) as r:
+                        content = await r.read()
+                        status = r.status
+                        retry_after = r.headers.get('Retry-After')
+
+                        if status < 400 and self.session_id is None:
+                            session_cookie = r.cookies.get('beaker.session.id')
+                            if session_cookie is not None:
+                                self.session_id = session_cookie.value
+                            self.log.info(self.session_id)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                self._count('failures')
+                if breaker is not None:
+                    breaker.record_failure()
+                if attempt >= max_attempts:
+                    raise
+                error = e
+                retry_after = None
+            except Exception:
+                self._count('failures')
+                if breaker is not None:
+                    breaker.record_failure()
+                raise
+            except BaseException:
+                #Cancelled, so a trial request must not keep the circuit half-open
+                if breaker is not None:
+                    breaker.release_trial()
+                raise
+            else:
+                if status not in unavailable:
+                    if breaker is not None:
+                        breaker.record_success()
+                    return status, content
+                self._count('failures')
+                if breaker is not None:
+                    breaker.record_failure()
+                if attempt >= max_attempts:
+                    return status, content
+                error = "HTTP %s" % status
+                retry_after = parse_retry_after(retry_after)
+
+            delay = retry.delay(attempt, retry_after)
+            self.log.warning("Calling %s failed (%s). Retrying in %.2fs",
+                             ', '.join(func_names), error, delay)
+            self._count('retries')
+            await retry.async_sleep(delay)
+
+    async def map(self, func_name, iterable, workers=None, ordered=True):
+        """
+            Call the hydra function 'func_name' once for each set of
+            arguments in 'iterable', as BaseConnection.map does, and return
+            a list of MapResults, e.g.
+
+                results = await conn.map('get_network', ({'network_id': i} for i in ids))
+
+            All the calls are started at once, but no more than 'workers'
+            (by default max_concurrency) are in flight at a time. With
+            'ordered' set, the results are in the order of 'iterable';
+            otherwise in the order the calls completed.
+        """
+        if workers is None:
+            workers = self.max_concurrency
+        semaphore = asyncio.Semaphore(workers)
+        completed = []
+
+        async def run(index, item):
+            args, kwargs = split_args(item)
+            async with semaphore:
+                try:
+                    result = MapResult(index, item, value=await self.call(func_name, *args, **kwargs))
+                except Exception as e:
+                    self.log.debug("Call %s of map failed: %s", index, e)
+                    result = MapResult(index, item, error=e)
+            completed.append(result)
+            return result
+
+        results = await asyncio.gather(*[run(index, item) for index, item in enumerate(iterable)])
+        return results if ordered else completed
+
+    async def iter_call(self, func, *args, path='item', **kwargs):
+        """
+            Call a hydra server function and yield the parts of its result
+            found at 'path', as BaseConnection.iter_call does, e.g.
+
+                async for node in conn.iter_call('get_network', network_id=1, path='nodes.item'):
+                    ...
+
+            The full result is fetched first.
+        """
+        paths = [path] if isinstance(path, str) else path
+        result = await self.call(func, *args, **kwargs)
+        for found_path, value in iter_loaded(result, paths):
+            if isinstance(path, str):
+                yield value
+            else:
+                yield found_path, value
+
+    def batch(self, *args, **kwargs):
+        raise TypeError("AsyncRemoteJSONConnection does not support batches."
+                        " Use asyncio.gather to send calls concurrently.")
+
+    def _call_batch(self, calls):
+        raise TypeError("AsyncRemoteJSONConnection does not support batches."
+                        " Use asyncio.gather to send calls concurrently.")
+
+    async def login(self, username=None, password=None):
+
+        new_username, new_password = self.get_username_and_password(username, password)
+
+        login_params = {'username': new_username, 'password': new_password}
+
+        resp = await self.call('login', **login_params)
+
+        self.user_id = int(resp.user_id)
+        #set variables for use in request headers
+        self.log.info("Login response OK for user: %s", self.user_id)
+        self.log.info("Session ID: %s", self.session_id)
+
+        return self.user_id, self.session_id
+
+    async def get_remote_session(self, session_id):
+        resp = await self.call('get_remote_session', {'session_id': session_id})
+        if resp.get('user_id') is not None:
+            self.log.info("Session found for user: %s", self.user_id)
+        else:
+            self.log.warning("No session found with ID %s", session_id)
+            await self.login()
@@ -5,36 +5,255 @@ import six
 import tempfile
 import getpass
 import random
+import time
+from concurrent.futures import ThreadPoolExecutor
 from cryptography.fernet import Fernet
 
 import hydra_base
 
 from .. import config
+from .batch import CallBatch, DEFAULT_BATCH_SIZE
+from .streaming import iter_loaded
+from .cache import ResponseCache
+from .coalesce import SingleFlight
+from .fanout import run_map
+from .metrics import MetricsRegistry
+from .stubs import make_stub
+from .transports import is_host_url
+from . import tracing
 
 log = logging.getLogger(__name__)
 
 DEFAULT_DATETIME_FORMAT = "%Y-%m-%dT%H:%M:%S.%f000Z"
 
+DEFAULT_MAP_WORKERS = 4
+
 # Do this for backward compatibility
 class BaseConnection(object):
     """ Common base class for all connection subclasses. """
+
+    #Whether a call given a single dict, as in conn.get_network({'network_id': 1}),
+    #means that dict as its keyword arguments. The server protocol does.
+    _dict_arg_is_kwargs = False
+    #Whether to check the arguments of calls against hydra_base's
+    #signatures by default. See `stubs`.
+    _validate_args = True
+
     def __init__(self, *args, **kwargs):
         super(BaseConnection, self).__init__()
         self.app_name = kwargs.get('app_name', None)
         self.dateformat = hydra_base.config.get('DEFAULT', 'datetime_format', DEFAULT_DATETIME_FORMAT)
 
+        #An optional ResponseCache for reference data. Pass cache=True for
+        #the default settings.
+        cache = kwargs.get('cache', None)
+        if cache is True:
+            cache = ResponseCache()
+        self.cache = cache if cache else None
+
+        #An optional SingleFlight, which makes concurrent identical read
+        #calls share one request. Pass coalesce=True for the default settings.
+        coalesce = kwargs.get('coalesce', None)
+        if coalesce is True:
+            coalesce = SingleFlight()
+        self.single_flight = coalesce if coalesce else None
+
+        #Per-function call metrics. Pass a MetricsRegistry to share one
+        #between connections, or metrics=False to record nothing.
+        metrics = kwargs.get('metrics', True)
+        if metrics is True:
+            metrics = MetricsRegistry()
+        self.metrics = metrics if metrics else None
+
+        #An optional tracing.Tracer, to record the phases of each call
+        self.tracer = kwargs.get('tracer', None)
+
+        #Check the arguments of calls made as methods, such as
+        #conn.get_network(1), against hydra_base's signatures before
+        #making them.
+        self.validate_args = kwargs.get('validate_args', self._validate_args)
+
     def call(self, func_name, *args, **kwargs):
-        """ Call a hydra-base function by name. """
+        """
+            Call a hydra-base function by name, reading through the response
+            cache if there is one, and sharing the result of an identical
+            read call already in flight if coalescing is on. The call is
+            recorded in the connection's metrics, and traced if the
+            connection has a tracer.
+        """
+        if self.tracer is None:
+            return self._measured_call(func_name, args, kwargs)
+        with self.tracer.span(func_name, connection=self.__class__.__name__):
+            return self._measured_call(func_name, args, kwargs)
+
+    def _measured_call(self, func_name, args, kwargs):
+        metrics = self.metrics
+        if metrics is None:
+            return self._read_through(func_name, args, kwargs)
+
+        start = time.perf_counter()
+        try:
+            ret = self._read_through(func_name, args, kwargs)
+        except Exception:
+            metrics.record(func_name, time.perf_counter() - start, error=True)
+            raise
+        metrics.record(func_name, time.perf_counter() - start)
+        return ret
+
+    def _read_through(self, func_name, args, kwargs):
+        cache = self.cache
+        single_flight = self.single_flight
+        if cache is None and single_flight is None:
+            return self._call(func_name, *args, **kwargs)
+
+        if self._in_transaction():
+            #Reads inside a transaction can see its uncommitted writes, so
+            #must neither be cached nor shared with other threads.
+            try:
+                return self._call(func_name, *args, **kwargs)
+            finally:
+                if cache is not None:
+                    cache.invalidate(func_name)
+
+        key = None
+        if cache is not None:
+            key = cache.key(func_name, args, kwargs)
+            if key is not None:
+                hit, value = cache.get(key)
+                tracing.current_span().set('cache_hit', hit)
+                if hit:
+                    return value
+
+        flight_key = None
+        if single_flight is not None:
+            flight_key = single_flight.key(func_name, args, kwargs)
+
+        try:
+            if flight_key is not None:
+                ret = single_flight.do(flight_key, lambda: self._call(func_name, *args, **kwargs))
+            else:
+                ret = self._call(func_name, *args, **kwargs)
+        finally:
+            if cache is not None and key is None:
+                cache.invalidate(func_name)
+
+        if key is not None:
+            cache.set(key, func_name, ret)
+
+        return ret
+
+    def _call(self, func_name, *args, **kwargs):
+        """ Make the call to the hydra function. Implemented by each connection. """
         raise NotImplementedError()
 
+    def _in_transaction(self):
+        """ Is the calling thread inside a transaction scope? """
+        return False
+
     def login(self):
         raise NotImplementedError()
 
+    def iter_call(self, func_name, *args, path='item', **kwargs):
+        """
+            Call a hydra function and yield the parts of its result found at
+            'path' one at a time, e.g.
+
+                for node in conn.iter_call('get_network', network_id=1, path='nodes.item'):
+                    ...
+
+            'path' is dot-separated, with 'item' standing for each element of
+            a list. If 'path' is a list of paths, (path, value) tuples are
+            yielded instead. Connections which can parse their responses
+            incrementally override this; here the full result is fetched first.
+        """
+        paths = [path] if isinstance(path, six.string_types) else path
+        result = self.call(func_name, *args, **kwargs)
+        for found_path, value in iter_loaded(result, paths):
+            if isinstance(path, six.string_types):
+                yield value
+            else:
+                yield found_path, value
+
+    def batch(self, size=DEFAULT_BATCH_SIZE):
+        """
+            Queue calls and send them in groups of 'size'. Each queued call
+            returns a Future. See `CallBatch`.
+        """
+        return CallBatch(self, size=size)
+
+    def _call_batch(self, calls):
+        """
+            Run a list of queued (func_name, args, kwargs, future) calls,
+            setting the result or exception on each future. Connections
+            that can send several calls in one request override this.
+        """
+        for func_name, args, kwargs, future in calls:
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(self.call(func_name, *args, **kwargs))
+            except Exception as e:
+                future.set_exception(e)
+
+    def map(self, func_name, iterable, workers=None, ordered=True):
+        """
+            Call the hydra function 'func_name' once for each set of
+            arguments in 'iterable', several calls at a time, and yield a
+            MapResult for each call as it completes, e.g.
+
+                for res in conn.map('get_resource_data', ({'ref_key': 'NODE', 'ref_id': n}
+                                                          for n in node_ids)):
+                    if res.ok:
+                        ...
+                    else:
+                        log.warning("Node %s failed: %s", res.args['ref_id'], res.error)
+
+            Each set of arguments is a dict of keyword arguments, a tuple of
+            positional arguments, or a single positional argument. A failed
+            call does not stop the others: its exception is in the result's
+            'error'. With 'ordered' set, results are yielded in the order of
+            'iterable'; otherwise as soon as each completes.
+
+            args:
+                workers: The number of calls to run at once
+        """
+        if workers is None:
+            workers = self._default_map_workers()
+
+        executor = self._map_executor(workers)
+
+        def submit(args, kwargs):
+            return self._map_submit(executor, func_name, args, kwargs)
+
+        try:
+            for result in run_map(submit, iterable, workers, ordered=ordered):
+                yield result
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def _default_map_workers(self):
+        return DEFAULT_MAP_WORKERS
+
+    def _map_executor(self, workers):
+        """ The executor which runs the calls of map(). Threads by default. """
+        return ThreadPoolExecutor(max_workers=workers)
+
+    def _map_submit(self, executor, func_name, args, kwargs):
+        return executor.submit(self.call, func_name, *args, **kwargs)
+
     def __getattr__(self, name):
         """
             Here we redirect the function call to the local library function or
-            into the 'call' function, which uses a http request
+            into the 'call' function, which uses a http request.
+
+            hydra_base functions get a stub, made once and set on the class,
+            which checks and names their arguments. See `stubs`.
         """
+        stub = make_stub(name)
+        if stub is not None:
+            setattr(type(self), name, stub)
+            return stub.__get__(self, type(self))
+
         def wrapped(*args, **kwargs):
             return self.call(name, *args, **kwargs)
         return wrapped
@@ -61,6 +280,10 @@ class BaseConnection(object):
                 ret_url = "http://%s:%s/%s" % (domain, port, path)
             else:
                 ret_url = "%s:%s/%s" % (domain, port, path)
+        elif not is_host_url(url):
+            #unix:// and inproc:// urls name a socket file or an
+            #application, not a host, so are used as they are
+            ret_url = url
         else:
             log.info("Using user-defined URL: %s", url)
 
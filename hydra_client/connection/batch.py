@@ -0,0 +1,87 @@
+# (c) Copyright 2013, 2014, University of Manchester
+#
+# HydraLib is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# HydraPlatform is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with HydraPlatform.  If not, see <http://www.gnu.org/licenses/>
+#
+# -*- coding: utf-8 -*-
+
+__all__ = ['CallBatch']
+
+import logging
+from concurrent.futures import Future
+
+log = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 50
+
+
+class CallBatch(object):
+    """
+        Queues hydra function calls and sends them to the connection in
+        groups of 'size', returning a Future for each call.
+
+        Use through `BaseConnection.batch`:
+
+            with conn.batch(size=100) as b:
+                node = b.get_node(node_id=1)
+                attr = b.get_attribute_by_id(attr_id=2)
+
+            print(node.result().name, attr.result().name)
+
+        The queue is flushed when it reaches 'size' and when the 'with'
+        block exits. Calls still queued when the block exits with an
+        exception are cancelled.
+    """
+    def __init__(self, connection, size=DEFAULT_BATCH_SIZE):
+        self.connection = connection
+        self.size = size
+        self._queue = []
+
+    def call(self, func_name, *args, **kwargs):
+        """ Queue a call to 'func_name' and return a Future for its result. """
+        future = Future()
+        self._queue.append((func_name, args, kwargs, future))
+        if len(self._queue) >= self.size:
+            self.flush()
+        return future
+
+    def flush(self):
+        """ Send all queued calls now. """
+        calls, self._queue = self._queue, []
+        if len(calls) == 0:
+            return
+        log.info("Sending batch of %s calls", len(calls))
+        self.connection._call_batch(calls)
+
+    def cancel(self):
+        """ Cancel all queued calls without sending them. """
+        calls, self._queue = self._queue, []
+        for _, _, _, future in calls:
+            future.cancel()
+
+    def __getattr__(self, name):
+        if name.startswith('__') and name.endswith('__'):
+            raise AttributeError(name)
+
+        def wrapped(*args, **kwargs):
+            return self.call(name, *args, **kwargs)
+        return wrapped
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.flush()
+        else:
+            self.cancel()
@@ -0,0 +1,219 @@
+# (c) Copyright 2013, 2014, University of Manchester
+#
+# HydraLib is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# HydraPlatform is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with HydraPlatform.  If not, see <http://www.gnu.org/licenses/>
+#
+# -*- coding: utf-8 -*-
+
+__all__ = ['ResponseCache']
+
+import copy
+import time
+import logging
+import threading
+from collections import OrderedDict
+
+from . import codec
+from .util import canonical_key, is_write_call
+
+log = logging.getLogger(__name__)
+
+DEFAULT_TTL = 300
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+#Reference data getters, each with the topics whose writes make its
+#results stale. A write call invalidates a topic when the topic name
+#appears in the function name, e.g. 'update_templatetype' -> 'template'.
+DEFAULT_CACHEABLE = {
+    'get_attributes': ('attr',),
+    'get_attribute_by_id': ('attr',),
+    'get_attributes_by_id': ('attr',),
+    'get_attribute_by_name_and_dimension': ('attr', 'dimension'),
+    'get_attributes_by_name_and_dimension': ('attr', 'dimension'),
+    'get_attr_by_name_and_dimension': ('attr', 'dimension'),
+    'get_template': ('template', 'type', 'attr'),
+    'get_templates': ('template', 'type', 'attr'),
+    'get_template_by_name': ('template', 'type', 'attr'),
+    'get_template_as_dict': ('template', 'type', 'attr'),
+    'get_template_as_json': ('template', 'type', 'attr'),
+    'get_template_attributes': ('template', 'type', 'attr'),
+    'get_templatetype': ('template', 'type', 'attr'),
+    'get_templatetype_by_name': ('template', 'type', 'attr'),
+    'get_typeattr': ('template', 'type', 'attr'),
+    'get_dimensions': ('dimension', 'unit'),
+    'get_dimension': ('dimension', 'unit'),
+    'get_dimension_by_name': ('dimension', 'unit'),
+    'get_dimension_by_unit_id': ('dimension', 'unit'),
+    'get_dimension_by_unit_measure_or_abbreviation': ('dimension', 'unit'),
+    'get_units': ('dimension', 'unit'),
+    'get_unit': ('dimension', 'unit'),
+    'get_unit_by_abbreviation': ('dimension', 'unit'),
+}
+
+
+class CacheEntry(object):
+    __slots__ = ('func_name', 'value', 'size', 'expires')
+
+    def __init__(self, func_name, value, size, expires):
+        self.func_name = func_name
+        self.value = value
+        self.size = size
+        self.expires = expires
+
+
+class ResponseCache(object):
+    """
+        A read-through cache for the results of idempotent reference data
+        calls, such as get_attributes or get_template_by_name.
+
+        Entries are keyed on the function name and its canonicalised
+        arguments, expire after 'ttl' seconds, and the least recently used
+        are evicted to keep the total below 'max_bytes', measured as the
+        size of the JSON encoded result. Write calls (add_*, update_*,
+        delete_* ...) through the same connection drop the entries of the
+        functions whose topics they mention.
+
+        Results are deep-copied on the way in and out, so callers can
+        modify what they get back.
+
+        args:
+            cacheable: A dict of {function name: (topics,)}, or a list of
+                       function names, each invalidated by any write.
+                       Defaults to DEFAULT_CACHEABLE.
+            ttl: Seconds an entry stays valid. None for no expiry.
+            max_bytes: The size limit of the cache.
+            copy_results: Set False to share cached objects between callers.
+    """
+    def __init__(self, cacheable=None, ttl=DEFAULT_TTL, max_bytes=DEFAULT_MAX_BYTES,
+                 copy_results=True):
+        if cacheable is None:
+            cacheable = DEFAULT_CACHEABLE
+        elif not isinstance(cacheable, dict):
+            cacheable = {func_name: None for func_name in cacheable}
+
+        self.cacheable = dict(cacheable)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.copy_results = copy_results
+
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.RLock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def key(self, func_name, args, kwargs):
+        """
+            The cache key of a call, or None if the call is not cacheable.
+        """
+        if func_name not in self.cacheable:
+            return None
+        try:
+            return canonical_key(func_name, args, kwargs)
+        except TypeError:
+            return None
+
+    def get(self, key):
+        """
+            Return (True, value) for a live entry, (False, None) otherwise.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires is not None and entry.expires < time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return False, None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            value = entry.value
+
+        if self.copy_results:
+            value = copy.deepcopy(value)
+        return True, value
+
+    def set(self, key, func_name, value):
+        try:
+            size = len(codec.dumps(value))
+        except (TypeError, ValueError):
+            log.debug("Not caching unserialisable result of %s", func_name)
+            return
+
+        if size > self.max_bytes:
+            return
+
+        if self.copy_results:
+            value = copy.deepcopy(value)
+
+        expires = None if self.ttl is None else time.monotonic() + self.ttl
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = CacheEntry(func_name, value, size, expires)
+            self._bytes += size
+
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def invalidate(self, func_name):
+        """
+            Drop the entries made stale by the write call 'func_name'.
+        """
+        if not is_write_call(func_name):
+            return
+
+        stale_funcs = set()
+        for cached_func, topics in self.cacheable.items():
+            if topics is None or any(topic in func_name for topic in topics):
+                stale_funcs.add(cached_func)
+
+        with self._lock:
+            stale = [k for k, e in self._entries.items() if e.func_name in stale_funcs]
+            for key in stale:
+                self._remove(key)
+            self.invalidations += len(stale)
+
+        if len(stale) > 0:
+            log.debug("%s invalidated %s cache entries", func_name, len(stale))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+            }
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
@@ -0,0 +1,148 @@
+# (c) Copyright 2013, 2014, University of Manchester
+#
+# HydraLib is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# HydraPlatform is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with HydraPlatform.  If not, see <http://www.gnu.org/licenses/>
+#
+# -*- coding: utf-8 -*-
+
+__all__ = ['SingleFlight']
+
+import copy
+import asyncio
+import logging
+import threading
+
+from .util import canonical_key, is_read_call
+
+log = logging.getLogger(__name__)
+
+
+class Flight(object):
+    __slots__ = ('done', 'result', 'error', 'waiters')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight(object):
+    """
+        Coalesces concurrent identical read calls. While a call to a read
+        function (get_*, check_* ...) is in flight, other threads making the
+        same call, with the same canonicalised arguments, wait for its
+        result rather than sending their own request. Calls are only shared
+        while in flight; nothing is kept once the result arrives.
+        Coroutines share calls the same way through `do_async`.
+
+        args:
+            copy_results: Give each waiting thread its own deep copy of the
+                          result, so callers can modify what they get back.
+    """
+    def __init__(self, copy_results=True):
+        self.copy_results = copy_results
+        self._flights = {}
+        #The tasks of calls in flight through do_async
+        self._tasks = {}
+        self._lock = threading.Lock()
+
+        self.calls = 0
+        self.coalesced = 0
+
+    def key(self, func_name, args, kwargs):
+        """
+            The key identifying a call, or None if it must not be shared.
+        """
+        if not is_read_call(func_name):
+            return None
+        try:
+            return canonical_key(func_name, args, kwargs)
+        except TypeError:
+            return None
+
+    def do(self, key, func):
+        """
+            Return func(), or the result of the identical call already in
+            flight under 'key'.
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is None:
+                flight = self._flights[key] = Flight()
+                leader = True
+                self.calls += 1
+            else:
+                flight.waiters += 1
+                leader = False
+                self.coalesced += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            if self.copy_results:
+                return copy.deepcopy(flight.result)
+            return flight.result
+
+        try:
+            flight.result = func()
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+        if flight.waiters > 0:
+            log.debug("Shared one result between %s callers", flight.waiters + 1)
+
+        return flight.result
+
+    async def do_async(self, key, func):
+        """
+            Return await func(), or the result of the identical call already
+            in flight under 'key'. The call runs as a task, which goes on
+            if the caller that started it is cancelled while others wait.
+        """
+        with self._lock:
+            task = self._tasks.get(key)
+            leader = task is None
+            if leader:
+                task = self._tasks[key] = asyncio.ensure_future(func())
+                task.add_done_callback(lambda t: self._end_task(key, t))
+                self.calls += 1
+            else:
+                self.coalesced += 1
+
+        result = await asyncio.shield(task)
+        if not leader and self.copy_results:
+            return copy.deepcopy(result)
+        return result
+
+    def _end_task(self, key, task):
+        with self._lock:
+            if self._tasks.get(key) is task:
+                del self._tasks[key]
+        if not task.cancelled():
+            #Mark the error retrieved, in case every caller was cancelled
+            task.exception()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'calls': self.calls,
+                'coalesced': self.coalesced,
+                'in_flight': len(self._flights) + len(self._tasks),
+            }
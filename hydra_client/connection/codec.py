@@ -0,0 +1,241 @@
+# (c) Copyright 2013, 2014, University of Manchester
+#
+# HydraLib is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# HydraPlatform is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with HydraPlatform.  If not, see <http://www.gnu.org/licenses/>
+#
+# -*- coding: utf-8 -*-
+"""
+    Encoding and decoding of the JSON sent to and received from a Hydra server.
+
+    orjson is used when it is installed, and the standard library json module
+    otherwise. `decode` builds JSONObjects while parsing, through
+    `object_hook`, rather than parsing to dicts and converting the result
+    afterwards.
+"""
+
+__all__ = ['dumps', 'loads', 'decode', 'object_hook', 'coerce', 'materialise', 'is_dataset']
+
+import gc
+import json
+import logging
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from hydra_base.lib.objects import JSONObject, Dataset
+from hydra_base.util import get_json_as_dict
+
+log = logging.getLogger(__name__)
+
+if orjson is not None:
+    ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+VALID_JSON_FIRST_CHARS = ('{', '[')
+#Strings which do not start with one of these cannot be parsed by float()
+FLOAT_FIRST_CHARS = frozenset('+-.0123456789iInN \t\n\r')
+#The only strings starting with a letter which float() accepts
+FLOAT_WORDS = frozenset(('inf', 'infinity', 'nan'))
+
+
+def _default(obj):
+    """
+        Encode objects which wrap a decoded JSON structure, such as
+        LazyJSONObject, as that structure, and numpy values as lists and
+        numbers.
+    """
+    raw = getattr(obj, 'raw', None)
+    if isinstance(raw, (dict, list)):
+        return raw
+    if getattr(obj, 'dtype', None) is not None:
+        #numpy arrays and scalars, which orjson encodes itself
+        return obj.tolist()
+    raise TypeError("Object of type %s is not JSON serializable" % type(obj).__name__)
+
+
+def dumps(obj):
+    """
+        Encode 'obj' as JSON, returning bytes when orjson is used. Values
+        orjson cannot encode fall back to the standard library encoder.
+    """
+    if orjson is not None:
+        try:
+            ret = orjson.dumps(obj, default=_default, option=ORJSON_OPTIONS)
+        except TypeError:
+            pass
+        else:
+            #orjson writes NaN and Infinity as null, which would reach the
+            #server as missing data, so those fall back too
+            if b'null' not in ret or not _has_non_finite(obj):
+                return ret
+    return json.dumps(obj, default=_default)
+
+
+def _has_non_finite(obj):
+    """
+        Does 'obj' contain a NaN or infinite float, including in numpy
+        arrays and the structures wrapped by objects `_default` encodes?
+    """
+    stack = [obj]
+    while len(stack) > 0:
+        v = stack.pop()
+        if isinstance(v, float):
+            #Only NaN and the infinities give NaN here
+            if v - v != 0:
+                return True
+        elif isinstance(v, dict):
+            stack.extend(v.values())
+        elif isinstance(v, (list, tuple)):
+            stack.extend(v)
+        elif getattr(getattr(v, 'dtype', None), 'kind', None) in ('f', 'c'):
+            if (v - v != 0).any():
+                return True
+        elif getattr(v, 'dtype', None) is not None and getattr(v, 'ndim', 0) > 0:
+            stack.extend(v.tolist())
+        else:
+            raw = getattr(v, 'raw', None)
+            if isinstance(raw, (dict, list)):
+                stack.append(raw)
+    return False
+
+
+def loads(content):
+    """
+        Decode JSON into plain dicts and lists.
+    """
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+
+def decode(content):
+    """
+        Decode JSON straight into JSONObjects (and Datasets), in one pass.
+
+        The garbage collector is paused while decoding. A large response
+        creates hundreds of thousands of containers, none of them garbage,
+        which would otherwise trigger repeated full collections.
+    """
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return json.loads(content, object_hook=object_hook)
+    except RawValue:
+        return _wrap(json.loads(content))
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+
+class RawValue(Exception):
+    """
+        Raised by object_hook for a 'value' object, which JSONObject keeps
+        as it was decoded. It has already been converted, and cannot be
+        turned back, so the whole structure is converted by JSONObject.
+    """
+
+
+def _wrap(value):
+    """
+        Convert a decoded structure with JSONObject, as the client did before
+        decoding in one pass.
+    """
+    if isinstance(value, list):
+        try:
+            return [JSONObject(item) for item in value]
+        except Exception:
+            return value
+    elif isinstance(value, dict):
+        return JSONObject(value)
+    return value
+
+
+def is_dataset(obj):
+    """ Does the JSON object 'obj' hold a dataset, by JSONObject's rule? """
+    return 'type' in obj or 'unit_id' in obj or 'unit' in obj or 'metadata' in obj
+
+
+def coerce(v):
+    """
+        Apply the conversion JSONObject makes to string values: anything
+        float() accepts becomes a number.
+    """
+    if len(v) == 0 or v[0] not in FLOAT_FIRST_CHARS:
+        return v
+    if v.replace('.', '', 1).isdigit():
+        return float(v) if '.' in v else int(v)
+    if v[0] in 'iInN' and v.rstrip().lower() not in FLOAT_WORDS:
+        #Avoid raising and catching an exception for names like 'NODE'
+        return v
+    try:
+        return float(v)
+    except ValueError:
+        return v
+
+
+def object_hook(obj):
+    """
+        Turn a decoded JSON object into a JSONObject, applying the same
+        conversions as JSONObject. Nested objects have already been
+        converted by the time their parent is seen, so each value is
+        visited once. As with JSONObject, objects with dataset keys become
+        Datasets when they are the value of a key, but not at the top level
+        or in a list.
+    """
+    ret = JSONObject.__new__(JSONObject)
+
+    for k, v in obj.items():
+        if k == 'layout':
+            obj[k] = get_json_as_dict(v)
+        elif v.__class__ is str:
+            coerced = coerce(v)
+            if coerced is not v:
+                obj[k] = coerced
+        elif v.__class__ is JSONObject:
+            if is_dataset(v):
+                dataset = Dataset.__new__(Dataset)
+                dict.update(dataset, v)
+                obj[k] = dataset
+            elif k == 'value':
+                raise RawValue(k)
+        elif v.__class__ is list and len(v) > 0:
+            if k == 'metadata':
+                obj[k] = JSONObject({m['key']: m['value'] for m in v if isinstance(m, dict)})
+            elif isinstance(v[0], str) and len(v[0]) > 0 and v[0][0] in VALID_JSON_FIRST_CHARS:
+                #A list of JSON encoded objects
+                obj[k] = [JSONObject(item) for item in v]
+
+    obj.pop('value_ref', None)
+    dict.update(ret, obj)
+
+    return ret
+
+
+def materialise(value):
+    """
+        Convert an already decoded structure to JSONObjects, as `decode`
+        would have. The input is not modified.
+    """
+    try:
+        return _materialise(value)
+    except RawValue:
+        return _wrap(value)
+
+
+def _materialise(value):
+    if isinstance(value, dict):
+        return object_hook({k: _materialise(v) for k, v in value.items()})
+    elif isinstance(value, list):
+        return [_materialise(v) for v in value]
+    return value
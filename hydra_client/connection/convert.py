@@ -0,0 +1,163 @@
+# (c) Copyright 2013, 2014, University of Manchester
+#
+# HydraLib is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# HydraPlatform is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with HydraPlatform.  If not, see <http://www.gnu.org/licenses/>
+#
+# -*- coding: utf-8 -*-
+"""
+    Fast conversion of call arguments into the JSONObjects hydra_base
+    expects, for JSONConnection.
+
+    `to_json_object` gives the same result as hydra_base's JSONObject(dict)
+    for plain dicts, but skips the work JSONObject does for database rows
+    and strings of JSON, and keeps JSONObjects nested in lists rather than
+    re-wrapping them. Anything it does not recognise is handed to
+    JSONObject itself.
+"""
+
+__all__ = ['to_json_object', 'format_datetimes']
+
+import gc
+import enum
+from datetime import datetime
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from hydra_base.lib.objects import JSONObject, Dataset
+from hydra_base.util import get_json_as_dict
+
+from .codec import coerce
+
+DATASET_KEYS = ('unit_id', 'unit', 'metadata', 'type')
+#Strings which start with one of these in a list are JSON encoded objects
+VALID_JSON_FIRST_CHARS = ('{', '[')
+#The length of a hex ObjectId, which JSONObject looks up in mongo
+OBJECT_ID_LENGTH = 24
+#The format of datetime.isoformat and numpy.datetime_as_string to microseconds
+ISO_DATETIME_FORMAT = "%Y-%m-%dT%H:%M:%S.%f"
+
+
+def to_json_object(obj, cls=JSONObject):
+    """
+        Convert the dict 'obj' as cls(obj) would, where cls is JSONObject
+        or Dataset.
+
+        The garbage collector is paused during the conversion, as in
+        codec.decode: a network builds hundreds of thousands of new
+        containers, none of them garbage.
+    """
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return _convert(obj, cls)
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+
+def _convert(obj, cls):
+    if obj.__class__ is not dict:
+        return cls(obj)
+
+    value = obj.get('value')
+    if value.__class__ is str and len(value) == OBJECT_ID_LENGTH:
+        #Possibly a reference to a value stored externally
+        return cls(obj)
+
+    ret = cls.__new__(cls)
+    for k, v in obj.items():
+        v_cls = v.__class__
+
+        if k.__class__ is tuple:
+            ret[k] = v
+        elif k == 'value_ref':
+            continue
+        elif v_cls is JSONObject or v_cls is Dataset:
+            ret[k] = v
+        elif k == 'layout':
+            ret[k] = get_json_as_dict(v)
+        elif v_cls is dict:
+            if 'unit_id' in v or 'unit' in v or 'metadata' in v or 'type' in v:
+                ret[k] = _convert(v, Dataset)
+            elif k == 'value':
+                ret[k] = v
+            else:
+                ret[k] = _convert(v, JSONObject)
+        elif v_cls is list:
+            if k == 'metadata':
+                return cls(obj)
+            if len(v) > 0:
+                first = v[0]
+                if isinstance(first, (float, int)) or \
+                        (isinstance(first, str) and (len(first) == 0 or first[0] not in VALID_JSON_FIRST_CHARS)):
+                    ret[k] = v
+                    continue
+            ret[k] = [item if item.__class__ is JSONObject else _item_to_json_object(item) for item in v]
+        elif v_cls is str:
+            ret[k if k.__class__ is str else str(k)] = coerce(v)
+        elif v is None or v_cls is int or v_cls is float or v_cls is bool:
+            ret[k if k.__class__ is str else str(k)] = v
+        elif isinstance(v, dict) or isinstance(v, list) or hasattr(v, '_sa_instance_state'):
+            return cls(obj)
+        elif isinstance(v, enum.Enum):
+            ret[k] = v.value
+        else:
+            if not isinstance(v, int):
+                try:
+                    v = float(v)
+                except Exception:
+                    pass
+            if isinstance(v, datetime):
+                v = str(v)
+            ret[str(k)] = v
+
+    return ret
+
+
+def _item_to_json_object(item):
+    if item.__class__ is dict:
+        return _convert(item, JSONObject)
+    return JSONObject(item)
+
+
+def format_datetimes(values, dateformat):
+    """
+        Format a list of datetimes, or a numpy datetime64 array, with
+        'dateformat'.
+
+        When the format is ISO 8601 with microseconds plus an optional
+        literal suffix, as hydra's default is, arrays are formatted in one
+        vectorised step by numpy, and lists of naive datetimes with
+        datetime.isoformat, which is much quicker than strftime.
+    """
+    is_array = numpy is not None and isinstance(values, numpy.ndarray)
+
+    iso = dateformat.startswith(ISO_DATETIME_FORMAT) and '%' not in dateformat[len(ISO_DATETIME_FORMAT):]
+    if iso:
+        suffix = dateformat[len(ISO_DATETIME_FORMAT):]
+        if is_array:
+            as_strings = numpy.datetime_as_string(values.astype('datetime64[us]'), unit='us')
+            if suffix:
+                as_strings = numpy.char.add(as_strings, suffix)
+            return as_strings.tolist()
+
+        #strftime does not zero-pad years before 1000, where isoformat does
+        if all(v.__class__ is datetime and v.tzinfo is None and v.year >= 1000 for v in values):
+            return [v.isoformat(timespec='microseconds') + suffix for v in values]
+
+    if is_array:
+        values = values.astype('datetime64[us]').tolist()
+    return [v.strftime(dateformat) if isinstance(v, datetime) else v for v in values]
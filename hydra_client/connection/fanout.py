@@ -0,0 +1,125 @@
+# (c) Copyright 2013, 2014, University of Manchester
+#
+# HydraLib is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# HydraPlatform is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with HydraPlatform.  If not, see <http://www.gnu.org/licenses/>
+#
+# -*- coding: utf-8 -*-
+"""
+    Running one hydra function over many sets of arguments concurrently.
+    See `BaseConnection.map`.
+"""
+
+__all__ = ['MapResult', 'split_args', 'run_map']
+
+import itertools
+import logging
+from concurrent.futures import wait, FIRST_COMPLETED
+
+log = logging.getLogger(__name__)
+
+#How many calls to keep queued per worker, so that a long iterable of
+#arguments is consumed as results come back rather than all at once.
+QUEUED_PER_WORKER = 2
+
+
+class MapResult(object):
+    """
+        The outcome of one call made by `BaseConnection.map`.
+
+        args:
+            index: The position of the arguments in the input
+            args: The arguments, as given
+            value: The result of the call, if it succeeded
+            error: The exception raised by the call, if it failed
+    """
+    __slots__ = ('index', 'args', 'value', 'error')
+
+    def __init__(self, index, args, value=None, error=None):
+        self.index = index
+        self.args = args
+        self.value = value
+        self.error = error
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    def get(self):
+        """ The result of the call, raising its error if it failed. """
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+    def __repr__(self):
+        if self.error is not None:
+            return "<MapResult %s error=%r>" % (self.index, self.error)
+        return "<MapResult %s ok>" % (self.index,)
+
+
+def split_args(item):
+    """
+        Turn one element of the iterable given to map() into (args, kwargs):
+        a dict is keyword arguments, a tuple is positional arguments, and
+        anything else is the only positional argument.
+    """
+    if isinstance(item, dict):
+        return (), item
+    if isinstance(item, tuple):
+        return item, {}
+    return (item,), {}
+
+
+def run_map(submit, items, workers, ordered=True, window=None):
+    """
+        Start a call for each of 'items' with submit(args, kwargs), which
+        returns a Future, and yield a MapResult for each as it
+        completes, or in input order if 'ordered' is set. At most
+        QUEUED_PER_WORKER * workers calls, or 'window' if given, are
+        outstanding at a time.
+    """
+    items = enumerate(items)
+    if window is None:
+        window = workers * QUEUED_PER_WORKER
+    window = max(1, window)
+    pending = {}
+    done_results = {}
+    next_index = 0
+
+    def fill():
+        for index, item in itertools.islice(items, window - len(pending)):
+            args, kwargs = split_args(item)
+            pending[submit(args, kwargs)] = (index, item)
+
+    fill()
+    while len(pending) > 0:
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            index, item = pending.pop(future)
+            error = future.exception()
+            if error is not None:
+                log.debug("Call %s of map failed: %s", index, error)
+                result = MapResult(index, item, error=error)
+            else:
+                result = MapResult(index, item, value=future.result())
+
+            if ordered:
+                done_results[index] = result
+            else:
+                yield result
+
+        if ordered:
+            while next_index in done_results:
+                yield done_results.pop(next_index)
+                next_index += 1
+
+        fill()
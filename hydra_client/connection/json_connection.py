@@ -22,17 +22,50 @@ import logging
 log = logging.getLogger(__name__)
 
 from datetime import datetime
+import os
+import threading
+import contextlib
+import transaction
 import hydra_base as hb
 import six
 import collections
 from .base_connection import BaseConnection
+from . import tracing
+from .pool import LocalConnectionPool
+from ..objects import LazyJSONObject, LazyJSONList, lazy_json
+from .convert import to_json_object, format_datetimes, numpy
+from hydra_base.lib.objects import JSONObject, Dataset
 import json
 
+
 class JSONConnection(BaseConnection):
-    """ Local connection to a Hydra database using hydra_base directly."""
+    """
+        Local connection to a Hydra database using hydra_base directly.
+
+        A connection can be shared between threads. hydra_base keeps a
+        database session and transaction per thread, drawing on the
+        engine's bounded connection pool, and the login is shared: the
+        first thread to need it logs in for all of them.
+    """
     def __init__(self, *args, **kwargs):
         super(JSONConnection, self).__init__(*args, **kwargs)
 
+        #Kept to open the same database in worker processes. See _worker_kwargs
+        self._init_kwargs = dict(kwargs)
+
+        self._login_lock = threading.RLock()
+        #The number of calls in progress, so the engine's connections are
+        #only disposed of when no other thread is using them.
+        self._active_calls = 0
+        self._active_lock = threading.Lock()
+        #The depth of each thread's transaction() scopes
+        self._transactions = threading.local()
+
+        #Return dict and list results as LazyJSONObjects instead of
+        #converting them. Database objects are always converted, as their
+        #session is closed after the call.
+        self.lazy_results = kwargs.get('lazy_results', False)
+
         #Hydra Base needs a user ID in its function calls. setting self.user_id
         #allows this client to set this implicitly
         self.user_id = kwargs.get('user_id', None)
@@ -47,52 +80,152 @@ class JSONConnection(BaseConnection):
         if kwargs.get('session') is None:
             self.db_url = kwargs.get('db_url', None)
             self.autocommit = kwargs.get('autocommit', True)
+            #Keep the engine and its connection pool between autocommitted
+            #calls, rather than disposing of them after each one. They are
+            #released by close_session().
+            self.persistent_engine = kwargs.get('persistent_engine', False)
             self.db_url = hb.db.connect(self.db_url)
 
-    def call(self, func_name, *args, **kwargs):
+    def _call(self, func_name, *args, **kwargs):
         func = getattr(hb, func_name)
 
-        # Add user_id to the kwargs if not given and logged in.
-        if 'user_id' not in kwargs and self.user_id is not None:
+        # Add user_id to the kwargs if not given, logging in if needed.
+        if 'user_id' not in kwargs:
+            self._ensure_login()
             kwargs['user_id'] = self.user_id
-        else:
-            self.login()
+
+        span = tracing.current_span()
 
         # Convert the arguments to JSON objects
-        json_obj_args = list(self.args_to_json_object(*args))
+        with span.phase('convert_args'):
+            json_obj_args = list(self.args_to_json_object(*args))
 
-        k = list(kwargs.keys())
-        v = list(self.args_to_json_object(*list(kwargs.values())))
-        json_obj_kwargs = {k[i]:v[i] for i in range(len(v))}
+            k = list(kwargs.keys())
+            v = list(self.args_to_json_object(*list(kwargs.values())))
+            json_obj_kwargs = {k[i]:v[i] for i in range(len(v))}
+
+        #Inside a transaction() scope the scope commits, or rolls back
+        autocommit = self.autocommit is True and not self._in_transaction()
+
+        with self._active_lock:
+            self._active_calls += 1
+        try:
+            return self._run(func, json_obj_args, json_obj_kwargs, span, autocommit)
+        finally:
+            with self._active_lock:
+                self._active_calls -= 1
+            if autocommit:
+                self._release_engine(span)
+
+    def _release_engine(self, span=tracing.NULL_SPAN):
+        """
+            Dispose of the engine's connections, unless the engine is
+            persistent or another thread has a call in progress.
+        """
+        with self._active_lock:
+            if self._active_calls == 0 and not self.persistent_engine:
+                with span.phase('dispose'):
+                    hb.db.engine.dispose()
 
+    def _run(self, func, json_obj_args, json_obj_kwargs, span, autocommit):
         try:
-            ret = func(*json_obj_args, **json_obj_kwargs)
+            with span.phase('execute'):
+                ret = func(*json_obj_args, **json_obj_kwargs)
         except Exception as e:
-            hb.db.DBSession.rollback()
-            hb.rollback_transaction()
+            if not self._in_transaction():
+                hb.db.DBSession.rollback()
+                hb.rollback_transaction()
             raise
 
         # Call the HB function
 
         try:
-            json_resp = list(self.args_to_json_object(ret))
+            with span.phase('convert_result'):
+                if self.lazy_results is True and self._is_plain_json(ret):
+                    json_resp = [lazy_json(ret)]
+                else:
+                    json_resp = list(self.args_to_json_object(ret))
         except ValueError as e:
             log.warning(e)
             json_resp = [ret]
 
         for o in json_resp:
-            if self.autocommit is True:
+            if autocommit:
                 try:
-                    hb.commit_transaction()
+                    with span.phase('commit'):
+                        hb.commit_transaction()
                 except Exception as e:
                     hb.db.DBSession.rollback()
                     hb.rollback_transaction()
                     raise
                 finally:
                     hb.db.close_session()
-                    hb.db.engine.dispose()
             return o
 
+    def _in_transaction(self):
+        return getattr(self._transactions, 'depth', 0) > 0
+
+    @contextlib.contextmanager
+    def transaction(self):
+        """
+            Group the calls made in this thread inside the block into one
+            database transaction, committed when the block ends, or rolled
+            back if it raises:
+
+                with conn.transaction():
+                    for node in nodes:
+                        conn.add_node(network_id, node)
+
+            A nested transaction() is a savepoint: an exception escaping it
+            undoes only the calls made inside it, and the outer transaction
+            carries on if the exception is caught. This works with or
+            without autocommit.
+        """
+        depth = getattr(self._transactions, 'depth', 0)
+
+        if depth > 0:
+            savepoint = hb.db.DBSession.begin_nested()
+            self._transactions.depth = depth + 1
+            try:
+                yield self
+            except BaseException:
+                if savepoint.is_active:
+                    savepoint.rollback()
+                raise
+            else:
+                if savepoint.is_active:
+                    savepoint.commit()
+            finally:
+                self._transactions.depth = depth
+            return
+
+        self._transactions.depth = 1
+        try:
+            yield self
+        except BaseException:
+            self._transactions.depth = 0
+            try:
+                hb.db.DBSession.rollback()
+                transaction.abort()
+            finally:
+                self._end_transaction()
+            raise
+
+        self._transactions.depth = 0
+        try:
+            transaction.commit()
+        except Exception:
+            hb.db.DBSession.rollback()
+            transaction.abort()
+            raise
+        finally:
+            self._end_transaction()
+
+    def _end_transaction(self):
+        hb.db.close_session()
+        if self.autocommit is True:
+            self._release_engine()
+
     def connect(self):
         try:
             hb.util.hdb.create_default_users_and_perms()
@@ -103,7 +236,49 @@ class JSONConnection(BaseConnection):
         except:
             hb.rollback_transaction()
 
+    def _default_map_workers(self):
+        return os.cpu_count() or 1
+
+    def _map_executor(self, workers):
+        """
+            Run the calls of map() in a LocalConnectionPool, whose worker
+            processes each have their own connection to the database,
+            logged in as this one is. Only connections which commit each
+            call can do this; others run the calls in threads.
+        """
+        if self._init_kwargs.get('session') is not None or self.autocommit is not True:
+            return super(JSONConnection, self)._map_executor(workers)
+
+        return LocalConnectionPool(workers=workers, connection=self)
+
+    def _map_submit(self, executor, func_name, args, kwargs):
+        if not isinstance(executor, LocalConnectionPool):
+            return super(JSONConnection, self)._map_submit(executor, func_name, args, kwargs)
+        return executor.call(func_name, *args, **kwargs)
+
+    def _worker_kwargs(self):
+        """
+            The arguments which open a connection like this one in a worker
+            process, logged in as this one is. Workers keep their engine
+            between calls, and leave caching, metrics and tracing to this
+            process. The arguments are pickled for the workers, which a
+            tracer may not be.
+        """
+        #Log in here, rather than once in each worker
+        self._ensure_login()
+
+        worker_kwargs = {k: v for k, v in self._init_kwargs.items()
+                         if k not in ('cache', 'coalesce', 'metrics', 'tracer')}
+        worker_kwargs.update(db_url=self.db_url, user_id=self.user_id, session_id=self.session_id,
+                             metrics=False)
+        worker_kwargs.setdefault('persistent_engine', True)
+        return worker_kwargs
+
     def close_session(self):
+        """
+            Close this thread's database session and dispose of the engine's
+            pooled connections.
+        """
         hb.db.close_session()
         hb.db.engine.dispose()
 
@@ -111,9 +286,17 @@ class JSONConnection(BaseConnection):
 
         parsed_username, parsed_password = self.get_username_and_password(username, password)
 
-        self.user_id, self.session_id = hb.login(parsed_username, parsed_password)
+        with self._login_lock:
+            self.user_id, self.session_id = hb.login(parsed_username, parsed_password)
+
+            return self.user_id, self.session_id
 
-        return self.user_id, self.session_id
+    def _ensure_login(self):
+        """ Log in, unless this or another thread already has. """
+        if self.user_id is None:
+            with self._login_lock:
+                if self.user_id is None:
+                    self.login()
 
     def logout(self):
 
@@ -122,10 +305,33 @@ class JSONConnection(BaseConnection):
 
         return 'OK'
 
+    @staticmethod
+    def _is_plain_json(value):
+        """ Is 'value' a plain dict, or a list of plain values? """
+        if type(value) is dict:
+            return True
+        if type(value) is list:
+            return len(value) == 0 or type(value[0]) in (dict, list, str, int, float)
+        return False
+
     def args_to_json_object(self, *args):
+        """
+            Convert call arguments, and results, into the JSONObjects
+            hydra_base works with. Structures which are already converted,
+            and lists of plain values, are passed through without copying.
+        """
         for arg in args:
+            if isinstance(arg, (LazyJSONObject, LazyJSONList)):
+                arg = arg.raw
+
+            arg_cls = arg.__class__
+
             if arg is None:
                 yield None
+            elif arg_cls is JSONObject or arg_cls is Dataset:
+                yield arg
+            elif arg_cls is dict:
+                yield to_json_object(arg)
             elif isinstance(arg, six.string_types):
                 yield arg
             elif isinstance(arg, (int, float)):
@@ -136,19 +342,28 @@ class JSONConnection(BaseConnection):
                 yield arg
             elif isinstance(arg, collections.abc.Mapping):
                 yield hb.JSONObject(arg)
+            elif numpy is not None and isinstance(arg, numpy.ndarray):
+                if arg.dtype.kind == 'M':
+                    yield format_datetimes(arg, self.dateformat)
+                else:
+                    yield arg.tolist()
             elif isinstance(arg, collections.abc.Iterable):
-                arg = list(arg) ## in case it's a set or something that doesnt support indexing
-                if len(arg) > 0 and isinstance(arg[0], (six.string_types, int, float, datetime)):
-                    json_friendly_arg = []
-                    for a in arg:
-                        if isinstance(a, datetime):
-                            json_friendly_arg.append(datetime.strftime(a, self.dateformat))
-                        else:
-                            json_friendly_arg.append(a)
-                    yield json_friendly_arg
-                elif len(arg) > 0 and isinstance(arg[0], hb.JSONObject):
+                if arg_cls is not list:
+                    arg = list(arg) ## in case it's a set or something that doesnt support indexing
+                if len(arg) == 0:
+                    yield []
+                    continue
+                first = arg[0]
+                if isinstance(first, datetime):
+                    yield format_datetimes(arg, self.dateformat)
+                elif isinstance(first, (six.string_types, int, float)):
+                    if any(isinstance(a, datetime) for a in arg):
+                        yield format_datetimes(arg, self.dateformat)
+                    else:
+                        yield arg
+                elif isinstance(first, hb.JSONObject):
                     yield arg
                 else:
-                    yield [hb.JSONObject(v) for v in arg]
+                    yield [v if v.__class__ is JSONObject else to_json_object(v) for v in arg]
             else:
                 yield hb.JSONObject(arg)
@@ -0,0 +1,212 @@
+# (c) Copyright 2013, 2014, University of Manchester
+#
+# HydraLib is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# HydraPlatform is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with HydraPlatform.  If not, see <http://www.gnu.org/licenses/>
+#
+# -*- coding: utf-8 -*-
+"""
+    Per-function call metrics: counts, errors, latency and bytes sent and
+    received, for finding the calls which dominate a workload.
+"""
+
+__all__ = ['MetricsRegistry', 'LatencyHistogram']
+
+import json
+import bisect
+import threading
+
+#Upper bounds, in seconds, of the latency histogram buckets
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+
+PERCENTILES = (50, 95, 99)
+
+
+class LatencyHistogram(object):
+    """
+        Call durations counted into fixed buckets, so memory use does not
+        grow with the number of calls. Percentiles are estimated by
+        interpolating within the bucket they fall in.
+    """
+    __slots__ = ('bounds', 'counts', 'count', 'sum', 'max')
+
+    def __init__(self, bounds=DEFAULT_BUCKETS):
+        self.bounds = bounds
+        #One more bucket than bounds, for durations above the last bound
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(self.bounds, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, pct):
+        """ An estimate of the 'pct'th percentile duration, in seconds. """
+        if self.count == 0:
+            return 0.0
+        rank = self.count * pct / 100.0
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n > 0 and seen + n >= rank:
+                lower = self.bounds[i - 1] if i > 0 else 0.0
+                upper = self.bounds[i] if i < len(self.bounds) else self.max
+                return min(self.max, lower + (upper - lower) * (rank - seen) / n)
+            seen += n
+        return self.max
+
+
+class FunctionMetrics(object):
+    __slots__ = ('calls', 'errors', 'latency', 'request_bytes', 'response_bytes')
+
+    def __init__(self, buckets):
+        self.calls = 0
+        self.errors = 0
+        self.latency = LatencyHistogram(buckets)
+        self.request_bytes = 0
+        self.response_bytes = 0
+
+
+class MetricsRegistry(object):
+    """
+        Metrics for each hydra function called through a connection: the
+        number of calls and errors, a latency histogram, and the bytes sent
+        and received (remote connections only). Every connection has one as
+        `conn.metrics`; pass the same registry as metrics=... to several
+        connections to combine their figures.
+
+        Other events, such as retries, are kept as named counters.
+
+            conn.metrics.snapshot()['get_network']['p95']
+            print(conn.metrics.to_prometheus())
+
+        args:
+            buckets: The upper bounds of the latency buckets, in seconds
+    """
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._functions = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def _get(self, func_name):
+        metrics = self._functions.get(func_name)
+        if metrics is None:
+            metrics = self._functions[func_name] = FunctionMetrics(self.buckets)
+        return metrics
+
+    def record(self, func_name, seconds, error=False, request_bytes=0, response_bytes=0):
+        """ Record one call of 'func_name' which took 'seconds'. """
+        with self._lock:
+            metrics = self._get(func_name)
+            metrics.calls += 1
+            if error:
+                metrics.errors += 1
+            metrics.latency.observe(seconds)
+            metrics.request_bytes += request_bytes
+            metrics.response_bytes += response_bytes
+
+    def add_bytes(self, func_name, request_bytes=0, response_bytes=0):
+        """ Add to the bytes of 'func_name', for calls recorded separately. """
+        with self._lock:
+            metrics = self._get(func_name)
+            metrics.request_bytes += request_bytes
+            metrics.response_bytes += response_bytes
+
+    def increment(self, name, n=1):
+        """ Add 'n' to the counter 'name'. """
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + n
+
+    def reset(self):
+        with self._lock:
+            self._functions = {}
+            self._counters = {}
+
+    def snapshot(self):
+        """
+            The current figures, as {function name: {calls, errors,
+            total_seconds, mean, max, p50, p95, p99, request_bytes,
+            response_bytes}}, plus the counters under 'counters'.
+        """
+        with self._lock:
+            functions = {}
+            for func_name, m in self._functions.items():
+                stats = {
+                    'calls': m.calls,
+                    'errors': m.errors,
+                    'total_seconds': m.latency.sum,
+                    'mean': m.latency.sum / m.latency.count if m.latency.count else 0.0,
+                    'max': m.latency.max,
+                    'request_bytes': m.request_bytes,
+                    'response_bytes': m.response_bytes,
+                }
+                for pct in PERCENTILES:
+                    stats['p%s' % pct] = m.latency.percentile(pct)
+                functions[func_name] = stats
+            return {'functions': functions, 'counters': dict(self._counters)}
+
+    def to_json(self, **kwargs):
+        """ The snapshot as a JSON string. kwargs are passed to json.dumps. """
+        return json.dumps(self.snapshot(), **kwargs)
+
+    def to_prometheus(self, prefix='hydra_client'):
+        """ The metrics in the Prometheus text exposition format. """
+        lines = []
+
+        def header(name, kind, help_text):
+            lines.append('# HELP %s_%s %s' % (prefix, name, help_text))
+            lines.append('# TYPE %s_%s %s' % (prefix, name, kind))
+
+        with self._lock:
+            functions = sorted(self._functions.items())
+
+            header('calls_total', 'counter', 'Calls made, by hydra function.')
+            for func_name, m in functions:
+                lines.append('%s_calls_total{function="%s"} %s' % (prefix, func_name, m.calls))
+
+            header('errors_total', 'counter', 'Calls which raised an error, by hydra function.')
+            for func_name, m in functions:
+                lines.append('%s_errors_total{function="%s"} %s' % (prefix, func_name, m.errors))
+
+            header('request_bytes_total', 'counter', 'Bytes sent, by hydra function.')
+            for func_name, m in functions:
+                lines.append('%s_request_bytes_total{function="%s"} %s' % (prefix, func_name, m.request_bytes))
+
+            header('response_bytes_total', 'counter', 'Bytes received, by hydra function.')
+            for func_name, m in functions:
+                lines.append('%s_response_bytes_total{function="%s"} %s' % (prefix, func_name, m.response_bytes))
+
+            header('call_duration_seconds', 'histogram', 'Call latency, by hydra function.')
+            for func_name, m in functions:
+                cumulative = 0
+                for bound, n in zip(m.latency.bounds, m.latency.counts):
+                    cumulative += n
+                    lines.append('%s_call_duration_seconds_bucket{function="%s",le="%s"} %s'
+                                 % (prefix, func_name, bound, cumulative))
+                lines.append('%s_call_duration_seconds_bucket{function="%s",le="+Inf"} %s'
+                             % (prefix, func_name, m.latency.count))
+                lines.append('%s_call_duration_seconds_sum{function="%s"} %s'
+                             % (prefix, func_name, m.latency.sum))
+                lines.append('%s_call_duration_seconds_count{function="%s"} %s'
+                             % (prefix, func_name, m.latency.count))
+
+            for name, value in sorted(self._counters.items()):
+                header('%s_total' % name, 'counter', 'Count of %s.' % name.replace('_', ' '))
+                lines.append('%s_%s_total %s' % (prefix, name, value))
+
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,177 @@
+# (c) Copyright 2013, 2014, University of Manchester
+#
+# HydraLib is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# HydraPlatform is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with HydraPlatform.  If not, see <http://www.gnu.org/licenses/>
+#
+# -*- coding: utf-8 -*-
+
+__all__ = ['OfflineConnection']
+
+import logging
+
+from .base_connection import BaseConnection
+from .snapshot import Snapshot
+from . import codec
+from hydra_client.exception import RequestError
+
+log = logging.getLogger(__name__)
+
+#The calls an OfflineConnection can answer. Each is implemented by the
+#method of the same name with a leading underscore.
+OFFLINE_CALLS = frozenset([
+    'get_network',
+    'get_scenario',
+    'get_template',
+    'get_templates',
+    'get_attributes',
+    'get_attribute_by_id',
+    'get_resource_data',
+    'get_resource_scenario',
+])
+
+
+def _is_set(flag):
+    """ Flags can be passed as booleans or as 'Y' / 'N'. """
+    if isinstance(flag, str):
+        return flag.upper() == 'Y'
+    return bool(flag)
+
+
+class OfflineConnection(BaseConnection):
+    """
+        Answers read calls from a snapshot file made by `export_snapshot`,
+        with no server or database, so that a plugin can be run against a
+        frozen copy of a network:
+
+            export_snapshot(connection, network_id=1, path='network_1.snapshot')
+
+            offline = OfflineConnection(path='network_1.snapshot')
+            network = offline.get_network(1, include_data=True)
+
+        Only the calls in OFFLINE_CALLS are supported; any other raises a
+        RequestError. Dataset values stay on disk, memory-mapped, until a
+        call returns them.
+
+        args:
+            path: The snapshot file
+            user_id: Reported as the logged in user. Defaults to 1.
+    """
+    def __init__(self, *args, **kwargs):
+        super(OfflineConnection, self).__init__(*args, **kwargs)
+
+        self.path = kwargs['path']
+        self.snapshot = Snapshot(self.path)
+
+        self.user_id = kwargs.get('user_id', 1)
+        self.session_id = None
+
+    def _call(self, func_name, *args, **kwargs):
+        if func_name not in OFFLINE_CALLS:
+            raise RequestError("%s is not available offline. A snapshot answers: %s"
+                               % (func_name, ', '.join(sorted(OFFLINE_CALLS))))
+
+        kwargs.pop('user_id', None)
+        ret = getattr(self, '_' + func_name)(*args, **kwargs)
+
+        #Results are rebuilt from the snapshot on every call, so callers
+        #can modify them.
+        return codec.materialise(ret)
+
+    def login(self, username=None, password=None):
+        return self.user_id, self.session_id
+
+    def logout(self):
+        return 'OK'
+
+    def close_session(self):
+        """ Close the snapshot file. """
+        self.snapshot.close()
+
+    def _not_found(self, resource, resource_id):
+        return RequestError("ResourceNotFoundError:%s %s is not in snapshot %s"
+                            % (resource, resource_id, self.path))
+
+    def _with_values(self, resource_scenarios, include_values=True):
+        """ Copies of 'resource_scenarios' with their values read from the snapshot. """
+        ret = []
+        for rs in resource_scenarios:
+            rs = dict(rs)
+            dataset = rs.get('dataset')
+            if dataset is not None:
+                dataset = dict(dataset)
+                blob = dataset.pop('value_blob', None)
+                if include_values and blob is not None:
+                    dataset['value'] = self.snapshot.value(blob)
+                rs['dataset'] = dataset
+            ret.append(rs)
+        return ret
+
+    def _get_scenario_json(self, scenario_id):
+        scenario = self.snapshot.scenarios.get(int(scenario_id))
+        if scenario is None:
+            raise self._not_found('Scenario', scenario_id)
+        return scenario
+
+    def _get_network(self, network_id, include_data=False, scenario_ids=None, **kwargs):
+        network = self.snapshot.network
+        if int(network_id) != network['id']:
+            raise self._not_found('Network', network_id)
+
+        scenarios = []
+        for scenario in network['scenarios']:
+            if scenario_ids is not None and scenario['id'] not in scenario_ids:
+                continue
+            if _is_set(include_data):
+                resource_scenarios = self._get_scenario_json(scenario['id'])['resourcescenarios']
+                scenario = dict(scenario, resourcescenarios=self._with_values(resource_scenarios))
+            scenarios.append(scenario)
+
+        return dict(network, scenarios=scenarios)
+
+    def _get_scenario(self, scenario_id, include_data=True, **kwargs):
+        scenario = self._get_scenario_json(scenario_id)
+        if not _is_set(include_data):
+            return dict(scenario, resourcescenarios=[])
+        return dict(scenario, resourcescenarios=self._with_values(scenario['resourcescenarios']))
+
+    def _get_template(self, template_id, **kwargs):
+        template = self.snapshot.templates.get(int(template_id))
+        if template is None:
+            raise self._not_found('Template', template_id)
+        return template
+
+    def _get_templates(self, **kwargs):
+        return list(self.snapshot.templates.values())
+
+    def _get_attributes(self, **kwargs):
+        return self.snapshot.attributes
+
+    def _get_attribute_by_id(self, attr_id, **kwargs):
+        attr = self.snapshot.attributes_by_id.get(int(attr_id))
+        if attr is None:
+            raise self._not_found('Attribute', attr_id)
+        return attr
+
+    def _get_resource_data(self, ref_key, ref_id, scenario_id, include_values=True, **kwargs):
+        self._get_scenario_json(scenario_id)
+        by_id = self.snapshot.resource_scenarios(int(scenario_id))
+        resource_scenarios = [by_id[ra_id] for ra_id in self.snapshot.resource_attr_ids(ref_key, ref_id)
+                              if ra_id in by_id]
+        return self._with_values(resource_scenarios, include_values=_is_set(include_values))
+
+    def _get_resource_scenario(self, resource_attr_id, scenario_id, **kwargs):
+        self._get_scenario_json(scenario_id)
+        rs = self.snapshot.resource_scenarios(int(scenario_id)).get(int(resource_attr_id))
+        if rs is None:
+            raise self._not_found('Resource scenario', '%s in scenario %s' % (resource_attr_id, scenario_id))
+        return self._with_values([rs])[0]
@@ -0,0 +1,162 @@
+# (c) Copyright 2013, 2014, University of Manchester
+#
+# HydraLib is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# HydraPlatform is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with HydraPlatform.  If not, see <http://www.gnu.org/licenses/>
+#
+# -*- coding: utf-8 -*-
+
+__all__ = ['LocalConnectionPool']
+
+import os
+import time
+import logging
+from concurrent.futures import ProcessPoolExecutor, Future
+
+from .fanout import run_map
+
+log = logging.getLogger(__name__)
+
+#The connection used by each worker process of a LocalConnectionPool
+_worker_connection = None
+
+
+def _init_worker(kwargs):
+    global _worker_connection
+    #A forked worker inherits the parent's engine, whose pooled database
+    #connections the parent is still using. Drop them, without closing
+    #them, so the worker opens its own.
+    import hydra_base
+    engine = getattr(hydra_base.db, 'engine', None)
+    if engine is not None:
+        engine.dispose(close=False)
+
+    #Imported here, as json_connection uses this module for map()
+    from .json_connection import JSONConnection
+    _worker_connection = JSONConnection(**kwargs)
+
+
+def _worker_call(func_name, args, kwargs):
+    """
+        Make a call in a worker process, returning (result, seconds, error)
+        so the parent can record it in its metrics.
+    """
+    start = time.perf_counter()
+    try:
+        return _worker_connection.call(func_name, *args, **kwargs), time.perf_counter() - start, None
+    except Exception as e:
+        return None, time.perf_counter() - start, e
+
+
+class LocalConnectionPool(object):
+    """
+        A pool of worker processes, each with its own JSONConnection to the
+        same database, for spreading local calls over several cores. A
+        single JSONConnection is limited to one core, as hydra_base shares
+        one global database session and holds the GIL while it works.
+
+        The pool has the same call interface as a connection, but each
+        call returns a Future:
+
+            with LocalConnectionPool(db_url=db_url, user_id=1, workers=8) as pool:
+                futures = [pool.get_scenario(scenario_id=s) for s in scenario_ids]
+                scenarios = [f.result() for f in futures]
+
+        The pool logs in once, in this process, and the workers use that
+        login. Each worker keeps its own engine and connection pool until
+        the pool is shut down. Arguments and results are pickled between
+        processes, so the pool suits calls which do much more work than
+        they return, such as reads of whole scenarios. Calls are recorded
+        in the metrics of the parent connection.
+
+        args:
+            workers: The number of processes. Defaults to the number of CPUs.
+            connection: The JSONConnection whose database and login the
+                        workers share. By default one is made from the
+                        other keyword arguments.
+    """
+    def __init__(self, workers=None, connection=None, **kwargs):
+        self._owns_connection = connection is None
+        if connection is None:
+            from .json_connection import JSONConnection
+            connection = JSONConnection(**kwargs)
+
+        self.connection = connection
+        self.workers = workers or os.cpu_count() or 1
+        self.metrics = connection.metrics
+
+        self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                             initializer=_init_worker,
+                                             initargs=(connection._worker_kwargs(),))
+
+    def call(self, func_name, *args, **kwargs):
+        """
+            Call a hydra-base function by name in a worker process,
+            returning a Future for its result.
+        """
+        future = Future()
+        future.set_running_or_notify_cancel()
+
+        def done(worker_future):
+            try:
+                ret, seconds, error = worker_future.result()
+            except BaseException as e:
+                future.set_exception(e)
+                return
+            if self.metrics is not None:
+                self.metrics.record(func_name, seconds, error=error is not None)
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(ret)
+
+        self._executor.submit(_worker_call, func_name, args, kwargs).add_done_callback(done)
+        return future
+
+    def map(self, func_name, iterable, workers=None, ordered=True):
+        """
+            As `BaseConnection.map`, using the pool's worker processes.
+            'workers' limits the calls in progress at once, up to the
+            number of processes.
+        """
+        def submit(args, kwargs):
+            return self.call(func_name, *args, **kwargs)
+
+        if workers is not None and workers < self.workers:
+            return run_map(submit, iterable, workers, ordered=ordered, window=workers)
+        return run_map(submit, iterable, self.workers, ordered=ordered)
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        """
+            Stop the worker processes, once they have finished the calls
+            already started.
+        """
+        self._executor.shutdown(wait=wait, cancel_futures=cancel_futures)
+        if self._owns_connection:
+            self.connection.close_session()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.shutdown()
+
+    def __getattr__(self, name):
+        """
+            Redirect unknown attributes to 'call', as connections do.
+        """
+        if name.startswith('_'):
+            raise AttributeError(name)
+
+        def wrapped(*args, **kwargs):
+            return self.call(name, *args, **kwargs)
+        return wrapped
@@ -21,28 +21,86 @@ import json
 import time
 import warnings
 import logging
+import threading
+import weakref
 import requests
+from concurrent.futures import ThreadPoolExecutor
 
 from hydra_base.lib.objects import JSONObject
 
-from hydra_client.exception import RequestError
+from hydra_client.exception import RequestError, CircuitOpenError
+from hydra_client.objects import lazy_json
 
 from .base_connection import BaseConnection
-
+from . import streaming
+from . import codec
+from . import tracing
+from . import transports
+from .retry import RetryPolicy, CircuitBreaker, parse_retry_after
+from .stubs import bind_arguments, is_arguments_dict
+
+#Defaults for the pooled HTTP session. The pool sizes are per host, and
+#the timeouts are (connect, read) in seconds. Calls such as large exports
+#can run for a long time, so there is no read timeout unless one is given.
+DEFAULT_POOL_CONNECTIONS = 10
+DEFAULT_POOL_MAXSIZE = 10
+DEFAULT_CONNECT_TIMEOUT = 10
+DEFAULT_READ_TIMEOUT = None
+
+#Responses which say the server, or a proxy in front of it, is unavailable
+UNAVAILABLE_STATUSES = (502, 503, 504)
 
 class RemoteJSONConnection(BaseConnection):
-    """ Remote connection to a Hydra server. """
+    """
+        Remote connection to a Hydra server.
+
+        The url's scheme chooses how requests reach the server: http:// or
+        https:// over TCP, unix:// over a Unix domain socket, or inproc://
+        to a WSGI application in this process. See transports.
+
+        A connection can be shared between threads. Each thread sends its
+        requests through its own HTTP session, and all of them draw on one
+        pool of keep-alive connections, bounded by 'pool_maxsize'. The login
+        (session_id and user_id) is shared: one thread logs in and the
+        others use its session.
+    """
+
+    _dict_arg_is_kwargs = True
+    #The server's argument names can differ from hydra_base's
+    _validate_args = False
+
     def __init__(self, url=None, session_id=None, app_name=None, test_server=None, **kwargs):
         """
             args:
-                url: The url of the hydra platform server
+                url: The url of the hydra platform server, e.g. http://localhost:8080/json,
+                     unix:///run/hydra/server.sock or inproc://<registered app name>
                 session_id: The session ID if one exists for that user already
                 app_name: The name of the app making the requests
                 test_server: A Spyne NullServer object, which if not null is used
                               for testing purposes
+            kwargs:
+                pool_connections: The number of hosts to keep connection pools for
+                pool_maxsize: The maximum number of keep-alive connections per host
+                pool_block: Block when the pool for a host is exhausted, rather
+                            than opening a throwaway connection
+                connect_timeout: Seconds to wait for a connection to the server
+                read_timeout: Seconds to wait for the server to respond.
+                              None (the default) waits indefinitely.
+                cache: A ResponseCache, or True for the default one, to keep
+                       the results of reference data calls
+                coalesce: A SingleFlight, or True for the default one, so that
+                          concurrent identical read calls share one request
+                multicall: Whether the server accepts several calls in one
+                           request. None (the default) detects it on the first batch.
+                lazy_results: Return results as LazyJSONObjects, which convert
+                              nested values only when they are accessed.
+                retry: A RetryPolicy, or True for the default one, for
+                       resending idempotent calls which fail
+                circuit_breaker: A CircuitBreaker, or True for the default one,
+                                 to fail fast while the server is down
 
         """
-        super(RemoteJSONConnection, self).__init__(app_name=app_name)
+        super(RemoteJSONConnection, self).__init__(app_name=app_name, **kwargs)
         self.log = logging.getLogger(__name__)
         self.user_id = None
         self.url = self.get_url(url, 'json')
@@ -50,10 +108,164 @@ class RemoteJSONConnection(BaseConnection):
         self.session_id = session_id
         self.test_server = None
 
+        self.pool_connections = kwargs.get('pool_connections', DEFAULT_POOL_CONNECTIONS)
+        self.pool_maxsize = kwargs.get('pool_maxsize', DEFAULT_POOL_MAXSIZE)
+        self.pool_block = kwargs.get('pool_block', False)
+        self.timeout = (kwargs.get('connect_timeout', DEFAULT_CONNECT_TIMEOUT),
+                        kwargs.get('read_timeout', DEFAULT_READ_TIMEOUT))
+        self._adapter = None
+        self._local = threading.local()
+        self._http_sessions = weakref.WeakSet()
+        self._transport_lock = threading.Lock()
+        self._login_lock = threading.RLock()
+        self.multicall = kwargs.get('multicall', None)
+        self.lazy_results = kwargs.get('lazy_results', False)
+
+        retry = kwargs.get('retry', None)
+        self.retry = RetryPolicy() if retry is True else (retry or None)
+        circuit_breaker = kwargs.get('circuit_breaker', None)
+        self.circuit_breaker = CircuitBreaker() if circuit_breaker is True else (circuit_breaker or None)
+        self._retry_counts = {'requests': 0, 'attempts': 0, 'retries': 0,
+                              'failures': 0, 'circuit_rejections': 0}
+        self._retry_lock = threading.Lock()
+
         if test_server is not None:
             self.test_server = test_server
             self.session_id = 'null_session'
 
+    @property
+    def http_session(self):
+        """
+            The calling thread's HTTP session. requests.Session is not
+            thread-safe, so each thread gets its own, but they all share
+            one connection pool. Sessions are created on first use, so the
+            connection can be reused after close_session().
+        """
+        http_session = getattr(self._local, 'http_session', None)
+        if http_session is None:
+            with self._transport_lock:
+                if self._adapter is None:
+                    self._adapter = transports.make_adapter(self.url,
+                                                            pool_connections=self.pool_connections,
+                                                            pool_maxsize=self.pool_maxsize,
+                                                            pool_block=self.pool_block)
+                http_session = requests.Session()
+                http_session.mount('%s://' % transports.get_scheme(self.url), self._adapter)
+                self._http_sessions.add(http_session)
+            self._local.http_session = http_session
+        return http_session
+
+    def close_session(self):
+        """
+            Close the pooled HTTP connections to the server, and the HTTP
+            sessions of all threads.
+        """
+        with self._transport_lock:
+            for http_session in list(self._http_sessions):
+                http_session.close()
+            self._http_sessions = weakref.WeakSet()
+            self._local = threading.local()
+            if self._adapter is not None:
+                self._adapter.close()
+                self._adapter = None
+
+    def _set_session_id(self, response):
+        """
+            Keep the session the server started, unless another thread
+            has already set one.
+        """
+        if self.session_id is None:
+            with self._login_lock:
+                if self.session_id is None:
+                    self.session_id = response.cookies.get('beaker.session.id')
+                    self.log.info(self.session_id)
+
+    def _count(self, name):
+        with self._retry_lock:
+            self._retry_counts[name] += 1
+        if self.metrics is not None:
+            self.metrics.increment('http_%s' % name)
+
+    def get_retry_stats(self):
+        """
+            Counts of requests, attempts to send them, retries, failed
+            attempts and requests refused by the circuit breaker. The
+            amplification is the number of attempts per request.
+        """
+        with self._retry_lock:
+            stats = dict(self._retry_counts)
+        stats['amplification'] = stats['attempts'] / stats['requests'] if stats['requests'] else 0.0
+        if self.circuit_breaker is not None:
+            stats['circuit_state'] = self.circuit_breaker.state
+        return stats
+
+    def _post(self, func_names, data, headers, cookies, stream=False):
+        """
+            POST a request body to the server, resending it under the retry
+            policy and checking the circuit breaker, if these are set.
+        """
+        retry = self.retry
+        retryable = retry is not None and retry.is_retryable(func_names)
+        max_attempts = retry.max_attempts if retryable else 1
+        unavailable = retry.retry_statuses if retry is not None else UNAVAILABLE_STATUSES
+        breaker = self.circuit_breaker
+
+        self._count('requests')
+        attempt = 0
+        while True:
+            attempt += 1
+            if breaker is not None and not breaker.allow():
+                self._count('circuit_rejections')
+                raise CircuitOpenError("Not calling %s: the server at %s is unavailable"
+                                       % (', '.join(func_names), self.url))
+
+            self._count('attempts')
+            if attempt > 1:
+                tracing.current_span().set('attempts', attempt)
+            retry_after = None
+            try:
+                r = self.http_session.post(self.url,
+                                           data=data,
+                                           headers=headers,
+                                           cookies=cookies,
+                                           timeout=self.timeout,
+                                           stream=stream)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                self._count('failures')
+                if breaker is not None:
+                    breaker.record_failure()
+                if attempt >= max_attempts:
+                    raise
+                error = e
+            except Exception:
+                self._count('failures')
+                if breaker is not None:
+                    breaker.record_failure()
+                raise
+            except BaseException:
+                if breaker is not None:
+                    breaker.release_trial()
+                raise
+            else:
+                if r.status_code not in unavailable:
+                    if breaker is not None:
+                        breaker.record_success()
+                    return r
+                self._count('failures')
+                if breaker is not None:
+                    breaker.record_failure()
+                if attempt >= max_attempts:
+                    return r
+                error = "HTTP %s" % r.status_code
+                retry_after = parse_retry_after(r.headers.get('Retry-After'))
+                r.close()
+
+            delay = retry.delay(attempt, retry_after)
+            self.log.warning("Calling %s failed (%s). Retrying in %.2fs",
+                             ', '.join(func_names), error, delay)
+            self._count('retries')
+            retry.sleep(delay)
+
     def _test_call(self, func_name, *args, **kwargs):
         """
             Call the function in a spyne null server instead of a remote web server
@@ -63,7 +275,7 @@ class RemoteJSONConnection(BaseConnection):
 
         # Add user_id to the kwargs if not given and logged in.
         if 'user_id' not in kwargs and self.user_id is not None:
-            kwargs['user_id'] = self.user_id
+            kwargs = dict(kwargs, user_id=self.user_id)
 
         class FakeHeader():
             def __init__(self, user_id):
@@ -71,64 +283,35 @@ class RemoteJSONConnection(BaseConnection):
 
         func._in_header = FakeHeader(self.user_id)
 
-        for k, v in kwargs.items():
-            if v is True:
-                kwargs[k] = 'Y'
-            elif v is False:
-                kwargs[k] = 'N'
+        kwargs = self._convert_bools(kwargs)
 
         # Call the NullServer function
         ret = func(*args, **kwargs)
         x = list(ret)
         raw_ret = x[0]
 
-        json_ret = json.loads(raw_ret)
-
-        #Return value is a generator so we need to convert it to a list and return
-        #the first element
-        try:
-            if isinstance(json_ret, list):
-                try:
-                    return [JSONObject(r) for r in json_ret]
-                except Exception as e:
-                    self.log.critical(f"Error parsing {json_ret}")
-                    log.exception(e)
-                    return json_ret
-            else:
-                return JSONObject(json_ret)
-        except ValueError as e:
-            self.log.critical(f"Error parsing {json_ret}")
-            log.exception(e)
-            return json_ret
+        return self._parse_response(raw_ret)
 
-    def call(self, func, *args, **kwargs):
+    @staticmethod
+    def _convert_bools(kwargs):
         """
-            Call an arbitrary hydra server function, identified by the 'name' parameter
-
-            example:
-                self.call('get_network', {'network_id':2})
-
+            A copy of 'kwargs' with booleans as the 'Y' and 'N' the server
+            expects. The caller's dict is left alone, as it may be shared.
         """
+        return {k: ('Y' if v is True else 'N' if v is False else v) for k, v in kwargs.items()}
 
-        if self.test_server is not None:
-            return self._test_call(func, *args, **kwargs)
-
-        start_time = time.time()
-        self.log.info("Calling: %s" % (func))
-
-        for k, v in kwargs.items():
-            if v is True:
-                kwargs[k] = 'Y'
-            elif v is False:
-                kwargs[k] = 'N'
-
-
-        if len(args) == 0:
-            fn_args = kwargs
-        else:
+    def _prepare_call(self, func, args, kwargs):
+        """
+            Build the request body, headers and cookies for a call to the
+            server function 'func'.
+        """
+        if len(args) == 1 and len(kwargs) == 0 and is_arguments_dict(args[0]):
+            #The arguments, given as one dict
             fn_args = args[0]
+        else:
+            fn_args = bind_arguments(func, args, kwargs)
+        fn_args = self._convert_bools(fn_args)
 
-        # TODO add kwargs?
         call = {func: fn_args}
         headers = {
             'Content-Type': 'application/json',
@@ -142,38 +325,59 @@ class RemoteJSONConnection(BaseConnection):
                   'appname': self.app_name.replace(' ', '_')#for some reason, beaker fails when the appname cookie has a space in it
                  }
 
-        r = requests.post(self.url, data=json.dumps(call), headers=headers, cookies=cookie)
+        return call, headers, cookie
 
-        if not r.ok:
-            try:
-                resp = json.loads(r.content)
-                err = "%s:%s" % (resp['faultcode'], resp['faultstring'])
-            except:
-                self.log.debug("Headers: %s"%headers)
-                self.log.debug("Url: %s"%self.url)
-                self.log.debug("Content: %s"%json.dumps(call))
+    def _get_error(self, content, call, headers):
+        """
+            Extract the error message from the body of a failed request.
+        """
+        try:
+            resp = json.loads(content)
+            err = "%s:%s" % (resp['faultcode'], resp['faultstring'])
+        except:
+            self.log.debug("Headers: %s"%headers)
+            self.log.debug("Url: %s"%self.url)
+            self.log.debug("Content: %s"%json.dumps(call))
+
+            if content != '':
+                err = content
+            else:
+                err = "An unknown server has occurred."
 
-                if r.content != '':
-                    err = r.content
-                else:
-                    err = "An unknown server has occurred."
+            if self.url.find('soap') > 0:
+                self.log.info('This library no longer support SOAP')
+                err.append('This library no longer support SOAP')
 
-                if self.url.find('soap') > 0:
-                    self.log.info('This library no longer support SOAP')
-                    err.append('This library no longer support SOAP')
+        return err
+
+    def _parse_response(self, content):
+        """
+            Turn the body of a successful request into JSONObjects, or
+            LazyJSONObjects if lazy_results is set.
+        """
+        if self.lazy_results:
+            json_ret = codec.loads(content)
+            if json_ret == 'OK':
+                return {'status': 'OK'}
+            return lazy_json(json_ret)
 
-            raise RequestError(err)
+        try:
+            json_ret = codec.decode(content)
+        except ValueError:
+            return self._parse_result(json.loads(content))
 
-        if self.session_id is None:
+        if json_ret == 'OK':
+            return {'status': 'OK'}
 
-            self.session_id = r.cookies.get('beaker.session.id')
-            self.log.info(self.session_id)
+        return json_ret
 
-        json_ret = json.loads(r.content)
+    def _parse_result(self, json_ret):
+        """
+            Turn the decoded result of one call into JSONObjects.
+        """
         json_obj_ret = None
 
         if json_ret == 'OK':
-            self.log.info('done (%s)'%(time.time() -start_time))
             return {'status': 'OK'}
 
         #Return value is a generator so we need to convert it to a list and return
@@ -189,24 +393,296 @@ class RemoteJSONConnection(BaseConnection):
         except ValueError:
             json_obj_ret = json_ret
 
+        return json_obj_ret
+
+    def _call(self, func, *args, **kwargs):
+        """
+            Call an arbitrary hydra server function, identified by the 'name' parameter
+
+            example:
+                self.call('get_network', {'network_id':2})
+
+        """
+
+        if self.test_server is not None:
+            return self._test_call(func, *args, **kwargs)
+
+        start_time = time.time()
+        self.log.info("Calling: %s" % (func))
+
+        span = tracing.current_span()
+
+        with span.phase('encode'):
+            call, headers, cookie = self._prepare_call(func, args, kwargs)
+            body = codec.dumps(call)
+
+        with span.phase('request'):
+            r = self._post([func], body, headers, cookie)
+            content = r.content
+
+        span.set('request_bytes', len(body))
+        span.set('response_bytes', len(content))
+        span.set('status', r.status_code)
+        if self.metrics is not None:
+            self.metrics.add_bytes(func, len(body), len(content))
+
+        if not r.ok:
+            raise RequestError(self._get_error(content, call, headers))
+
+        self._set_session_id(r)
+
+        with span.phase('decode'):
+            json_obj_ret = self._parse_response(content)
+
         self.log.info('done (%s)'%(time.time() -start_time))
 
         return json_obj_ret
 
-    def login(self, username=None, password=None):
+    def iter_call(self, func, *args, path='item', **kwargs):
+        """
+            Call a hydra server function and yield the parts of its result
+            found at 'path' as they are read from the response, e.g.
+
+                for node in conn.iter_call('get_network', network_id=1, path='nodes.item'):
+                    ...
+
+            'path' is dot-separated, with 'item' standing for each element of
+            a list. If 'path' is a list of paths, (path, value) tuples are
+            yielded instead, in the order they appear in the response:
+
+                paths = ['nodes.item', 'links.item', 'scenarios.item.resourcescenarios.item']
+                for path, value in conn.iter_call('get_network', network_id=1,
+                                                  include_data=True, path=paths):
+                    ...
+
+            The body is parsed in chunks as it downloads, so the full response
+            is never held in memory. This needs the 'ijson' package; without
+            it the whole body is decoded first.
+        """
+        if self.test_server is not None:
+            for value in super(RemoteJSONConnection, self).iter_call(func, *args, path=path, **kwargs):
+                yield value
+            return
+
+        self.log.info("Streaming: %s" % (func))
+
+        paths = [path] if isinstance(path, str) else path
+
+        call, headers, cookie = self._prepare_call(func, args, kwargs)
+        body = codec.dumps(call)
+
+        #The span is not made current, as this generator's caller runs
+        #between the values it yields.
+        span = tracing.NULL_SPAN
+        if self.tracer is not None:
+            span = self.tracer.start(func, connection=self.__class__.__name__, streamed=True)
+
+        start = time.perf_counter()
+        error = None
+        r = None
+        try:
+            with span.phase('request'):
+                r = self._post([func], body, headers, cookie, stream=True)
+
+            if not r.ok:
+                raise RequestError(self._get_error(r.content, call, headers))
+
+            self._set_session_id(r)
+
+            if streaming.ijson is not None:
+                r.raw.decode_content = True
+                values = streaming.iter_stream(r.raw, paths)
+            else:
+                values = streaming.iter_content(r.content, paths)
+
+            #Includes the time the caller spends on each value
+            with span.phase('stream'):
+                for found_path, value in values:
+                    if isinstance(value, (dict, list)):
+                        value = self._parse_result(value)
+                    if isinstance(path, str):
+                        yield value
+                    else:
+                        yield found_path, value
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            response_bytes = 0
+            if r is not None:
+                response_bytes = r.raw.tell() if r.raw is not None else len(r.content)
+                r.close()
+            span.set('request_bytes', len(body))
+            span.set('response_bytes', response_bytes)
+            span.end(error)
+            if self.metrics is not None:
+                self.metrics.record(func, time.perf_counter() - start, error=error is not None,
+                                    request_bytes=len(body), response_bytes=response_bytes)
+
+    def _call_batch(self, calls):
+        """
+            Send queued (func_name, args, kwargs, future) calls as multi-call
+            requests: a JSON list of {func: args} bodies, answered by a list
+            of results in the same order, where a failed call is a
+            {faultcode, faultstring} object.
+
+            If the server answers the first batch with a fault, it does not
+            accept multi-call bodies: the calls are sent singly, in parallel,
+            and later batches skip the attempt.
+        """
+        if self.test_server is not None or self.multicall is False:
+            return self._call_parallel(calls)
+
+        calls = [c for c in calls if c[3].set_running_or_notify_cancel()]
+        if len(calls) == 0:
+            return
+
+        self.log.info("Calling %s functions in one request", len(calls))
+
+        with tracing.start_span(self.tracer, 'multicall', connection=self.__class__.__name__,
+                                calls=len(calls)):
+            return self._send_multicall(calls)
+
+    def _send_multicall(self, calls):
+        span = tracing.current_span()
+
+        with span.phase('encode'):
+            bodies = []
+            for func_name, args, kwargs, future in calls:
+                call, headers, cookie = self._prepare_call(func_name, args, kwargs)
+                bodies.append(call)
+            body = codec.dumps(bodies)
+
+        start = time.perf_counter()
+        try:
+            with span.phase('request'):
+                r = self._post([c[0] for c in calls], body, headers, cookie)
+                content = r.content
+        except Exception as e:
+            self._record_batch(calls, start, len(body), 0, error=True)
+            for _, _, _, future in calls:
+                future.set_exception(e)
+            return
+
+        span.set('request_bytes', len(body))
+        span.set('response_bytes', len(content))
+
+        results = None
+        if r.ok:
+            try:
+                with span.phase('decode'):
+                    results = codec.decode(content)
+            except ValueError:
+                pass
+            if not isinstance(results, list) or len(results) != len(calls):
+                results = None
+
+        if results is None:
+            if self.multicall is None and self._rejects_multicall(r):
+                self.log.info("Server does not accept multi-call requests. Sending calls singly.")
+                self.multicall = False
+                return self._call_parallel(calls, started=True)
+            #A transient failure, such as a 503 from a proxy, fails these
+            #calls without deciding whether the server accepts multi-calls
+            self._record_batch(calls, start, len(body), len(content), error=True)
+            if len(content) > 0:
+                err = RequestError(self._get_error(content, bodies, headers))
+            else:
+                err = RequestError("The server responded with HTTP %s" % r.status_code)
+            for _, _, _, future in calls:
+                future.set_exception(err)
+            return
+
+        self.multicall = True
+
+        self._set_session_id(r)
+
+        if self.cache is not None:
+            for func_name, _, _, _ in calls:
+                self.cache.invalidate(func_name)
+
+        self._record_batch(calls, start, len(body), len(content), results=results)
+
+        for (_, _, _, future), result in zip(calls, results):
+            if self._is_fault(result):
+                future.set_exception(RequestError("%s:%s" % (result['faultcode'], result['faultstring'])))
+            elif result == 'OK':
+                future.set_result({'status': 'OK'})
+            else:
+                future.set_result(result)
+
+    def _rejects_multicall(self, r):
+        """
+            Is the response to a multi-call request the server refusing a
+            list body, as a fault, rather than an unavailable server?
+        """
+        if r.ok or r.status_code in UNAVAILABLE_STATUSES:
+            return False
+        try:
+            return self._is_fault(json.loads(r.content))
+        except ValueError:
+            return False
+
+    @staticmethod
+    def _is_fault(result):
+        return isinstance(result, dict) and 'faultcode' in result and 'faultstring' in result
 
+    def _record_batch(self, calls, start, request_bytes, response_bytes, error=False, results=None):
+        """
+            Record the calls of a multi-call request in the metrics. Each is
+            given the duration of the whole request and an equal share of
+            its bytes.
+        """
+        if self.metrics is None:
+            return
+        seconds = time.perf_counter() - start
+        n = len(calls)
+        for i, (func_name, _, _, _) in enumerate(calls):
+            failed = error or (results is not None and self._is_fault(results[i]))
+            self.metrics.record(func_name, seconds, error=failed,
+                                request_bytes=request_bytes // n,
+                                response_bytes=response_bytes // n)
+
+    def _default_map_workers(self):
+        return self.pool_maxsize
+
+    def _call_parallel(self, calls, started=False):
+        """
+            Send queued calls as individual requests, several at a time.
+        """
+        if not started:
+            calls = [c for c in calls if c[3].set_running_or_notify_cancel()]
+        if len(calls) == 0:
+            return
+
+        def run(call):
+            func_name, args, kwargs, future = call
+            try:
+                future.set_result(self.call(func_name, *args, **kwargs))
+            except Exception as e:
+                future.set_exception(e)
+
+        with ThreadPoolExecutor(max_workers=min(len(calls), self.pool_maxsize)) as executor:
+            list(executor.map(run, calls))
+
+    def login(self, username=None, password=None):
+        """
+            Log in, for all threads using this connection. Concurrent
+            logins are made one at a time.
+        """
         new_username, new_password = self.get_username_and_password(username, password)
 
         login_params = {'username': new_username, 'password': new_password}
 
-        resp = self.call('login', **login_params)
+        with self._login_lock:
+            resp = self.call('login', **login_params)
 
-        self.user_id = int(resp.user_id)
-        #set variables for use in request headers
-        self.log.info("Login response OK for user: %s", self.user_id)
-        self.log.info("Session ID: %s", self.session_id)
+            self.user_id = int(resp.user_id)
+            #set variables for use in request headers
+            self.log.info("Login response OK for user: %s", self.user_id)
+            self.log.info("Session ID: %s", self.session_id)
 
-        return self.user_id, self.session_id
+            return self.user_id, self.session_id
 
     def get_remote_session(self, session_id):
         resp = self.call('get_remote_session', {'session_id': session_id})
@@ -227,6 +703,3 @@ class JsonConnection(RemoteJSONConnection):
             ' instead.',
              PendingDeprecationWarning
         )
-
-def object_hook(x):
-    return JSONObject(x)
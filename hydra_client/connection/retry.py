@@ -0,0 +1,155 @@
+# (c) Copyright 2013, 2014, University of Manchester
+#
+# HydraLib is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# HydraPlatform is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with HydraPlatform.  If not, see <http://www.gnu.org/licenses/>
+#
+# -*- coding: utf-8 -*-
+
+__all__ = ['RetryPolicy', 'CircuitBreaker']
+
+import time
+import random
+import asyncio
+import logging
+import threading
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+
+from .util import is_read_call
+
+log = logging.getLogger(__name__)
+
+
+class RetryPolicy(object):
+    """
+        When and how long to wait before resending a failed request.
+
+        Only idempotent calls are retried: reads (get_*, check_* ...) and any
+        write named in 'retry_writes'. A request is retried when it fails to
+        connect or times out, or when the server answers with one of
+        'retry_statuses'. The n-th retry waits a random time up to
+        backoff_factor * 2**(n-1) seconds (capped at max_backoff), or the
+        server's Retry-After, if that is longer.
+
+        args:
+            max_attempts: The total number of tries, including the first.
+            backoff_factor: The base delay in seconds.
+            max_backoff: The longest delay between tries, in seconds.
+            retry_statuses: HTTP status codes worth retrying.
+            retry_writes: Names of write functions which are safe to repeat.
+            jitter: Randomise delays, so that many clients do not retry in step.
+    """
+    def __init__(self, max_attempts=3, backoff_factor=0.5, max_backoff=30,
+                 retry_statuses=(502, 503, 504), retry_writes=(), jitter=True):
+        self.max_attempts = max_attempts
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.retry_statuses = frozenset(retry_statuses)
+        self.retry_writes = frozenset(retry_writes)
+        self.jitter = jitter
+        self.sleep = time.sleep
+        #The coroutine waiting between tries on async connections
+        self.async_sleep = asyncio.sleep
+
+    def is_retryable(self, func_names):
+        """ Can a request containing calls to all of 'func_names' be repeated? """
+        return all(is_read_call(f) or f in self.retry_writes for f in func_names)
+
+    def delay(self, retry_number, retry_after=None):
+        """ Seconds to wait before retry number 'retry_number' (from 1). """
+        delay = min(self.max_backoff, self.backoff_factor * (2 ** (retry_number - 1)))
+        if self.jitter:
+            delay = random.uniform(0, delay)
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.max_backoff))
+        return delay
+
+
+def parse_retry_after(value):
+    """ The number of seconds in a Retry-After header, or None. """
+    if value is None:
+        return None
+    try:
+        return max(0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class CircuitBreaker(object):
+    """
+        Stops sending requests to a server which is clearly down.
+
+        After 'failure_threshold' consecutive failed requests the circuit
+        opens and calls fail immediately with a CircuitOpenError. After
+        'reset_timeout' seconds one trial request is let through: if it
+        succeeds the circuit closes again, otherwise it stays open for
+        another 'reset_timeout'.
+    """
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """ May a request be sent now? """
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN:
+                if time.monotonic() - self.opened_at < self.reset_timeout:
+                    return False
+                self.state = self.HALF_OPEN
+                self._trial_in_flight = False
+            if self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def release_trial(self):
+        """
+            End a request which neither succeeded nor failed, such as a
+            cancelled one, letting another trial through if it was one.
+        """
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    log.warning("Circuit opened after %s failures", self.failures)
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+                self._trial_in_flight = False
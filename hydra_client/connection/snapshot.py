@@ -0,0 +1,214 @@
+# (c) Copyright 2013, 2014, University of Manchester
+#
+# HydraLib is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# HydraPlatform is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with HydraPlatform.  If not, see <http://www.gnu.org/licenses/>
+#
+# -*- coding: utf-8 -*-
+"""
+    Snapshots: a network, its scenarios' data, its templates and the
+    attributes, frozen into one file for use with OfflineConnection.
+
+    A snapshot file is laid out as:
+
+        MAGIC
+        the length of the header, as an 8 byte little-endian integer
+        the header, as JSON
+        the dataset values, one JSON document after another
+
+    The header holds everything except the dataset values: the network,
+    each scenario's resource scenarios, the templates, the attributes and
+    an index of the resource attributes of each resource. Each dataset
+    in the header has a 'value_blob' of [offset, length] locating its
+    value among the values, which are memory-mapped and only read when a
+    call returns them.
+"""
+
+__all__ = ['export_snapshot', 'Snapshot']
+
+import os
+import mmap
+import struct
+import logging
+from datetime import datetime
+
+from . import codec
+from hydra_client.exception import RequestError
+
+log = logging.getLogger(__name__)
+
+MAGIC = b'HYDRA-SNAPSHOT 1\n'
+HEADER_LENGTH = struct.Struct('<Q')
+
+#The resource attribute field holding the id of its resource, by ref_key
+REF_ID_KEYS = {
+    'NODE': 'node_id',
+    'LINK': 'link_id',
+    'GROUP': 'group_id',
+    'NETWORK': 'network_id',
+}
+
+
+def _plain(value):
+    """
+        Turn a call result into plain dicts and lists which can be encoded
+        as JSON. Local connections can return database rows and datetimes.
+    """
+    if isinstance(value, dict):
+        return {k: _plain(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)) and not hasattr(value, '_asdict'):
+        return [_plain(v) for v in value]
+    if hasattr(value, '_asdict'):
+        return _plain(value._asdict())
+    if isinstance(value, datetime):
+        return str(value)
+    return value
+
+
+def _index_resource_attributes(resource_attributes, index):
+    for ra in resource_attributes:
+        if not isinstance(ra, dict) or ra.get('ref_key') not in REF_ID_KEYS:
+            continue
+        ref_id = ra.get(REF_ID_KEYS[ra['ref_key']])
+        if ra.get('id') is None or ref_id is None:
+            continue
+        ra_ids = index.setdefault(ra['ref_key'], {}).setdefault(str(ref_id), [])
+        if ra['id'] not in ra_ids:
+            ra_ids.append(ra['id'])
+
+
+def export_snapshot(connection, network_id, path, scenario_ids=None):
+    """
+        Save a network, the data of its scenarios, its templates and the
+        attributes to the snapshot file 'path', reading them through
+        'connection', which may be local or remote.
+
+        args:
+            scenario_ids: The scenarios to include. Defaults to all of them.
+    """
+    network = _plain(connection.get_network(network_id, include_data=False))
+
+    scenarios = {}
+    for scenario in network.get('scenarios', []):
+        if scenario_ids is not None and scenario['id'] not in scenario_ids:
+            continue
+        scenarios[str(scenario['id'])] = _plain(connection.get_scenario(scenario['id'], include_data=True))
+    network['scenarios'] = [dict(s, resourcescenarios=[]) for s in network.get('scenarios', [])
+                            if str(s['id']) in scenarios]
+
+    resources = [network] + network.get('nodes', []) + network.get('links', []) + network.get('resourcegroups', [])
+
+    template_ids = set()
+    index = {}
+    for resource in resources:
+        for resource_type in resource.get('types') or []:
+            template_ids.add(resource_type['template_id'])
+        _index_resource_attributes(resource.get('attributes') or [], index)
+    for scenario in scenarios.values():
+        _index_resource_attributes([rs['resourceattr'] for rs in scenario['resourcescenarios']
+                                    if rs.get('resourceattr') is not None], index)
+
+    templates = [_plain(connection.get_template(template_id)) for template_id in sorted(template_ids)]
+    attributes = _plain(connection.get_attributes())
+
+    values = []
+    offset = 0
+    for scenario in scenarios.values():
+        for rs in scenario['resourcescenarios']:
+            dataset = rs.get('dataset')
+            if dataset is None or 'value' not in dataset:
+                continue
+            value = codec.dumps(dataset.pop('value'))
+            if isinstance(value, str):
+                value = value.encode('utf-8')
+            dataset['value_blob'] = [offset, len(value)]
+            values.append(value)
+            offset += len(value)
+
+    header = codec.dumps({
+        'network': network,
+        'scenarios': scenarios,
+        'templates': templates,
+        'attributes': attributes,
+        'index': index,
+    })
+    if isinstance(header, str):
+        header = header.encode('utf-8')
+
+    tmp_path = '%s.tmp' % path
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(HEADER_LENGTH.pack(len(header)))
+        f.write(header)
+        for value in values:
+            f.write(value)
+    os.replace(tmp_path, path)
+
+    log.info("Saved network %s, %s scenarios and %s bytes of data to %s",
+             network_id, len(scenarios), offset, path)
+
+
+class Snapshot(object):
+    """
+        A snapshot file opened for reading. The header is loaded, and the
+        dataset values are memory-mapped.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            #An empty file cannot be mapped
+            self._file.close()
+            raise RequestError("%s is not a Hydra snapshot" % (path,))
+
+        if self._map[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise RequestError("%s is not a Hydra snapshot" % (path,))
+
+        header_start = len(MAGIC) + HEADER_LENGTH.size
+        header_length, = HEADER_LENGTH.unpack(self._map[len(MAGIC):header_start])
+        header = codec.loads(self._map[header_start:header_start + header_length])
+        self._values_start = header_start + header_length
+
+        self.network = header['network']
+        self.scenarios = {int(k): v for k, v in header['scenarios'].items()}
+        self.templates = {t['id']: t for t in header['templates']}
+        self.attributes = header['attributes']
+        self.index = header['index']
+
+        self.attributes_by_id = {a['id']: a for a in self.attributes}
+        #{scenario id: {resource attr id: resource scenario}}, built on first use
+        self._resource_scenarios = {}
+
+    def resource_attr_ids(self, ref_key, ref_id):
+        """ The ids of the resource attributes of a resource. """
+        return self.index.get(ref_key.upper(), {}).get(str(ref_id), [])
+
+    def resource_scenarios(self, scenario_id):
+        """ The resource scenarios of a scenario, by resource attribute id. """
+        by_id = self._resource_scenarios.get(scenario_id)
+        if by_id is None:
+            by_id = {rs['resource_attr_id']: rs for rs in self.scenarios[scenario_id]['resourcescenarios']}
+            self._resource_scenarios[scenario_id] = by_id
+        return by_id
+
+    def value(self, blob):
+        """ Read the dataset value at 'blob', an [offset, length], from the mapped file. """
+        offset, length = blob
+        start = self._values_start + offset
+        return codec.loads(self._map[start:start + length])
+
+    def close(self):
+        self._map.close()
+        self._file.close()
@@ -0,0 +1,104 @@
+# (c) Copyright 2013, 2014, University of Manchester
+#
+# HydraLib is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# HydraPlatform is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with HydraPlatform.  If not, see <http://www.gnu.org/licenses/>
+#
+# -*- coding: utf-8 -*-
+"""
+    Helpers for yielding parts of a large JSON document one at a time.
+
+    Parts are selected with ijson-style paths: dot-separated keys, where
+    'item' stands for every element of an array. For a get_network result:
+
+        'nodes.item'                              each node
+        'scenarios.item.resourcescenarios.item'   each resource scenario
+"""
+
+import json
+import logging
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+log = logging.getLogger(__name__)
+
+SCALAR_EVENTS = ('null', 'boolean', 'integer', 'double', 'number', 'string')
+
+
+def iter_stream(fileobj, paths):
+    """
+        Incrementally parse the JSON document in 'fileobj', yielding a
+        (path, value) tuple for each value found at one of 'paths'. Only
+        one such value is held in memory at a time.
+
+        Requires the 'ijson' package.
+    """
+    if ijson is None:
+        raise ImportError("Streaming JSON parsing requires the 'ijson' package.")
+
+    paths = set(paths)
+    builder = None
+    current = None
+
+    for prefix, event, value in ijson.parse(fileobj, use_float=True):
+        if builder is None:
+            if prefix not in paths:
+                continue
+            if event in ('start_map', 'start_array'):
+                builder = ijson.ObjectBuilder()
+                builder.event(event, value)
+                current = prefix
+            elif event in SCALAR_EVENTS:
+                yield prefix, value
+        else:
+            builder.event(event, value)
+            if prefix == current and event in ('end_map', 'end_array'):
+                yield current, builder.value
+                builder = None
+
+
+def iter_loaded(obj, paths):
+    """
+        Yield a (path, value) tuple for each value found at one of 'paths'
+        in an already decoded JSON structure.
+    """
+    for path in paths:
+        for value in walk_path(obj, path.split('.') if path else []):
+            yield path, value
+
+
+def iter_content(content, paths):
+    """
+        Fallback for when ijson is not installed: decode the whole document,
+        then yield the values at 'paths'.
+    """
+    log.warning("ijson is not installed. Decoding the full response before yielding.")
+    return iter_loaded(json.loads(content), paths)
+
+
+def walk_path(obj, keys):
+    if len(keys) == 0:
+        yield obj
+        return
+
+    key, rest = keys[0], keys[1:]
+    if key == 'item':
+        if isinstance(obj, list):
+            for item in obj:
+                for value in walk_path(item, rest):
+                    yield value
+    elif isinstance(obj, dict) and obj.get(key) is not None:
+        for value in walk_path(obj[key], rest):
+            yield value
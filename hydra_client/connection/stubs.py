@@ -0,0 +1,238 @@
+# (c) Copyright 2013, 2014, University of Manchester
+#
+# HydraLib is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# HydraPlatform is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with HydraPlatform.  If not, see <http://www.gnu.org/licenses/>
+#
+# -*- coding: utf-8 -*-
+"""
+    Method stubs for hydra functions, generated from hydra_base's function
+    signatures.
+
+    `conn.get_network(1)` looks up 'get_network' on the connection's class.
+    The first time, BaseConnection.__getattr__ makes a stub for it and sets
+    it on the class, so later lookups find an ordinary method. The stub
+    names its positional arguments, checks that none are missing or
+    unexpected, and passes them to `call` as keywords, so that a call
+    hydra_base would reject is never made.
+
+    The server's functions wrap hydra_base's, some with other argument
+    names ('net' rather than 'network'), so remote connections only check
+    arguments when made with validate_args=True.
+"""
+
+__all__ = ['FunctionSpec', 'get_spec', 'make_stub', 'bind_arguments', 'is_arguments_dict']
+
+import inspect
+import logging
+import functools
+
+import hydra_base
+
+from hydra_client.exception import InvalidArgumentsError
+
+log = logging.getLogger(__name__)
+
+#The id of the logged in user, which the connection or the server
+#supplies, so callers need not
+SUPPLIED_ARGS = frozenset(['user_id', 'uid'])
+
+
+class FunctionSpec(object):
+    """
+        The parameters of a hydra function, arranged for binding calls.
+
+        args:
+            name: The function name
+            positional: The names of the parameters which can be positional, in order
+            keyword_only: The names of the keyword-only parameters
+            required: The names of the parameters without defaults
+            var_keyword: Whether the function takes **kwargs
+    """
+    __slots__ = ('name', 'positional', 'keyword_only', 'required', 'names', 'var_keyword', 'doc')
+
+    def __init__(self, name, positional, keyword_only, required, var_keyword, doc=None):
+        self.name = name
+        self.positional = tuple(positional)
+        self.keyword_only = tuple(keyword_only)
+        self.required = frozenset(required) - SUPPLIED_ARGS
+        self.names = frozenset(positional) | frozenset(keyword_only) | SUPPLIED_ARGS
+        self.var_keyword = var_keyword
+        self.doc = doc
+
+    def bind(self, args, kwargs, validate=True):
+        """
+            Name the positional 'args' and merge them into 'kwargs',
+            returning a new dict. With 'validate' set, the result is
+            checked as in `check`.
+        """
+        if len(args) > len(self.positional):
+            raise self.too_many(len(args))
+        bound = dict(zip(self.positional, args))
+        for k, v in kwargs.items():
+            if k in bound:
+                raise self.duplicate(k)
+            bound[k] = v
+
+        if validate:
+            self.check(bound)
+        return bound
+
+    def check(self, kwargs):
+        """
+            Raise an InvalidArgumentsError if any required arguments are
+            missing from 'kwargs', or it has arguments the function does not
+            take, for functions without **kwargs.
+        """
+        if not self.required <= kwargs.keys():
+            raise InvalidArgumentsError("%s is missing required arguments: %s"
+                                        % (self.name, ', '.join(sorted(self.required - kwargs.keys()))))
+        if not self.var_keyword and not kwargs.keys() <= self.names:
+            raise InvalidArgumentsError("%s got unexpected arguments: %s"
+                                        % (self.name, ', '.join(sorted(kwargs.keys() - self.names))))
+
+    def duplicate(self, name):
+        return InvalidArgumentsError("%s got multiple values for argument '%s'" % (self.name, name))
+
+    def too_many(self, given):
+        return InvalidArgumentsError("%s takes %s positional arguments but %s were given"
+                                     % (self.name, len(self.positional), given))
+
+
+@functools.lru_cache(maxsize=None)
+def get_spec(func_name):
+    """
+        The FunctionSpec of the hydra_base function 'func_name', or None if
+        there is no such function, or its arguments cannot all be named.
+    """
+    if func_name.startswith('_'):
+        return None
+    func = getattr(hydra_base, func_name, None)
+    if not inspect.isfunction(func):
+        return None
+    try:
+        signature = inspect.signature(func)
+    except (TypeError, ValueError):
+        return None
+
+    positional = []
+    keyword_only = []
+    required = []
+    var_keyword = False
+    for param in signature.parameters.values():
+        if param.kind in (param.POSITIONAL_ONLY, param.VAR_POSITIONAL):
+            return None
+        if param.kind == param.VAR_KEYWORD:
+            var_keyword = True
+            continue
+        if param.kind == param.POSITIONAL_OR_KEYWORD:
+            positional.append(param.name)
+        else:
+            keyword_only.append(param.name)
+        if param.default is param.empty:
+            required.append(param.name)
+
+    return FunctionSpec(func_name, positional, keyword_only, required, var_keyword, doc=func.__doc__)
+
+
+#Marks the arguments of a stub which were not given
+UNSET = object()
+
+
+def is_arguments_dict(value):
+    """
+        Is 'value', given as the only argument of a call, the dict of all
+        the call's arguments, as in the server protocol? JSONObjects and
+        other dict subclasses count.
+    """
+    return isinstance(value, dict)
+
+
+def make_stub(func_name):
+    """
+        A method calling the hydra function 'func_name' through the
+        connection's `call`, or None if it has no FunctionSpec.
+
+        The method is generated with the function's own parameters, so
+        Python names the arguments, and only those given are passed on:
+
+            def get_network(_self, _first=UNSET, include_attributes=UNSET, ...,
+                            *_args, network_id=UNSET, **_kwargs):
+                if _first is not UNSET:
+                    network_id = _first
+                ...
+                if network_id is not UNSET:
+                    _kwargs['network_id'] = network_id
+                ...
+                return _self.call('get_network', **_kwargs)
+    """
+    spec = get_spec(func_name)
+    if spec is None or any(p.startswith('_') for p in spec.positional + spec.keyword_only):
+        return None
+
+    positional = spec.positional
+    keyword_only = spec.keyword_only
+    lines = []
+    if len(positional) > 0:
+        #The first argument is taken positionally as _first, and by name
+        #as a keyword-only argument, so that a single dict given
+        #positionally can be told apart.
+        first = positional[0]
+        positional, keyword_only = ('_first',) + positional[1:], (first,) + keyword_only
+        conditions = ['_is_arguments_dict(_first)', '_self._dict_arg_is_kwargs',
+                      'len(_args) == 0', 'len(_kwargs) == 0']
+        conditions.extend('%s is UNSET' % p for p in positional[1:] + keyword_only)
+        lines.append('    if %s:' % ' and '.join(conditions))
+        lines.append('        _kwargs = dict(_first)')
+        lines.append('    elif _first is not UNSET:')
+        lines.append('        if %s is not UNSET:' % first)
+        lines.append('            raise _spec.duplicate(%r)' % first)
+        lines.append('        %s = _first' % first)
+
+    params = ['_self']
+    params.extend('%s=UNSET' % p for p in positional)
+    params.append('*_args')
+    params.extend('%s=UNSET' % p for p in keyword_only)
+    params.append('**_kwargs')
+    lines.insert(0, 'def %s(%s):' % (func_name, ', '.join(params)))
+
+    lines.append('    if len(_args) > 0:')
+    lines.append('        raise _spec.too_many(len(_args) + %s)' % len(positional))
+    for p in spec.positional + spec.keyword_only:
+        lines.append('    if %s is not UNSET:' % p)
+        lines.append('        _kwargs[%r] = %s' % (p, p))
+    lines.append('    if _self.validate_args:')
+    lines.append('        _spec.check(_kwargs)')
+    lines.append('    return _self.call(%r, **_kwargs)' % func_name)
+
+    namespace = {'UNSET': UNSET, '_spec': spec, '_is_arguments_dict': is_arguments_dict}
+    exec('\n'.join(lines), namespace)
+
+    stub = namespace[func_name]
+    stub.__module__ = __name__
+    stub.__doc__ = spec.doc
+    return stub
+
+
+def bind_arguments(func_name, args, kwargs):
+    """
+        Name the positional arguments of a call to 'func_name', returning
+        all its arguments as one dict. Functions unknown to hydra_base
+        cannot have their positional arguments named.
+    """
+    if len(args) == 0:
+        return kwargs
+    spec = get_spec(func_name)
+    if spec is None:
+        raise InvalidArgumentsError("Cannot name the positional arguments of %s, which is not a "
+                                    "hydra_base function. Pass them as keywords." % (func_name,))
+    return spec.bind(args, kwargs, validate=False)
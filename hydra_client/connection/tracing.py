@@ -0,0 +1,302 @@
+# (c) Copyright 2013, 2014, University of Manchester
+#
+# HydraLib is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# HydraPlatform is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with HydraPlatform.  If not, see <http://www.gnu.org/licenses/>
+#
+# -*- coding: utf-8 -*-
+"""
+    Optional tracing of where the time of each call goes.
+
+    A connection given a Tracer opens a Span for each call, and the code
+    making the call marks its phases, such as 'encode', 'request' and
+    'decode' for a remote call, or 'convert_args', 'execute' and 'commit'
+    for a local one:
+
+        with tracing.phase('encode'):
+            body = codec.dumps(call)
+
+    Finished spans are passed to the tracer's exporter:
+
+        conn = RemoteJSONConnection(url, tracer=Tracer(JSONLinesExporter('calls.jsonl')))
+
+    When no span is open, `phase` returns a shared do-nothing context
+    manager, so untraced calls pay only a context variable lookup.
+"""
+
+__all__ = ['Tracer', 'Span', 'JSONLinesExporter', 'OpenTelemetryExporter',
+           'current_span', 'phase', 'start_span']
+
+import json
+import time
+import random
+import logging
+import threading
+import contextvars
+
+try:
+    from opentelemetry import trace as otel_trace
+except ImportError:
+    otel_trace = None
+
+log = logging.getLogger(__name__)
+
+
+class NullPhase(object):
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+class NullSpan(object):
+    """ Stands in for a span when a call is not traced. """
+    __slots__ = ()
+
+    recording = False
+
+    def phase(self, name):
+        return NULL_PHASE
+
+    def set(self, key, value):
+        pass
+
+    def end(self, error=None):
+        pass
+
+
+NULL_PHASE = NullPhase()
+NULL_SPAN = NullSpan()
+
+_current_span = contextvars.ContextVar('hydra_client_span', default=NULL_SPAN)
+
+
+def current_span():
+    """ The span of the call in progress in this thread or task. """
+    return _current_span.get()
+
+
+def phase(name):
+    """ Time the enclosed block as the phase 'name' of the current call. """
+    return _current_span.get().phase(name)
+
+
+def start_span(tracer, name, **attributes):
+    """ tracer.span(name), or a span which records nothing if 'tracer' is None. """
+    if tracer is None:
+        return NULL_SPAN_CONTEXT
+    return tracer.span(name, **attributes)
+
+
+class Phase(object):
+    __slots__ = ('span', 'name', 'start')
+
+    def __init__(self, span, name):
+        self.span = span
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        end = time.perf_counter()
+        self.span.phases.append((self.name, self.start - self.span.start, end - self.start))
+        return False
+
+
+class Span(object):
+    """
+        The trace of one call: the function name, its phases as (name,
+        offset, duration) tuples in seconds from the start of the call, and
+        attributes such as payload sizes.
+    """
+    recording = True
+
+    def __init__(self, tracer, name, attributes=None):
+        self.tracer = tracer
+        self.name = name
+        self.attributes = dict(attributes) if attributes else {}
+        self.phases = []
+        self.error = None
+        self.start_time = None
+        self.start = None
+        self.duration = None
+        self._token = None
+
+    def phase(self, name):
+        return Phase(self, name)
+
+    def set(self, key, value):
+        self.attributes[key] = value
+
+    def begin(self):
+        self.start_time = time.time()
+        self.start = time.perf_counter()
+        return self
+
+    def end(self, error=None):
+        """ Finish the span, with the exception which ended the call, if any. """
+        self.duration = time.perf_counter() - self.start
+        if error is not None:
+            self.error = "%s: %s" % (error.__class__.__name__, error)
+        self.tracer.export(self)
+
+    def __enter__(self):
+        self.begin()
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        _current_span.reset(self._token)
+        self.end(exc_value)
+        return False
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'start_time': self.start_time,
+            'duration': self.duration,
+            'error': self.error,
+            'attributes': self.attributes,
+            'phases': [{'name': name, 'offset': offset, 'duration': duration}
+                       for name, offset, duration in self.phases],
+        }
+
+
+class Tracer(object):
+    """
+        Creates a span for each call and hands finished spans to
+        'exporter', any object with an export(span) method.
+
+        args:
+            exporter: Where finished spans are sent
+            sample_rate: The fraction of calls to trace, from 0 to 1
+            attributes: Attributes added to every span, e.g. {'app': 'loader'}
+    """
+    def __init__(self, exporter, sample_rate=1.0, attributes=None):
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+        self.attributes = dict(attributes) if attributes else {}
+
+    def span(self, name, **attributes):
+        """
+            A span for a call to 'name', to be used as a context manager.
+            Inside another span, or when the call is not sampled, this is a
+            span which records nothing, so nested calls are part of the
+            outer one.
+        """
+        if _current_span.get().recording:
+            return JoinedSpan(_current_span.get())
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return NULL_SPAN_CONTEXT
+        span = Span(self, name, self.attributes)
+        span.attributes.update(attributes)
+        return span
+
+    def start(self, name, **attributes):
+        """
+            Begin a span which is not the current one, for a call whose
+            phases run in several places, such as a generator. The caller
+            ends it with span.end().
+        """
+        span = Span(self, name, self.attributes)
+        span.attributes.update(attributes)
+        return span.begin()
+
+    def export(self, span):
+        try:
+            self.exporter.export(span)
+        except Exception as e:
+            log.warning("Failed to export trace of %s: %s", span.name, e)
+
+
+class JoinedSpan(object):
+    """ A context manager yielding an existing span, without ending it. """
+    __slots__ = ('span',)
+
+    def __init__(self, span):
+        self.span = span
+
+    def __enter__(self):
+        return self.span
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+NULL_SPAN_CONTEXT = JoinedSpan(NULL_SPAN)
+
+
+class JSONLinesExporter(object):
+    """
+        Writes each span as a line of JSON to the file at 'path', or to an
+        open file object.
+    """
+    def __init__(self, path):
+        if hasattr(path, 'write'):
+            self.file = path
+            self._owns_file = False
+        else:
+            self.file = open(path, 'a')
+            self._owns_file = True
+        self._lock = threading.Lock()
+
+    def export(self, span):
+        line = json.dumps(span.to_dict(), default=str)
+        with self._lock:
+            self.file.write(line + '\n')
+            self.file.flush()
+
+    def close(self):
+        if self._owns_file:
+            self.file.close()
+
+
+class OpenTelemetryExporter(object):
+    """
+        Re-creates each span, with its phases as child spans, through an
+        OpenTelemetry tracer. Requires the 'opentelemetry-api' package.
+
+        args:
+            tracer_provider: The OpenTelemetry TracerProvider to use. The
+                             globally configured one by default.
+    """
+    def __init__(self, tracer_provider=None):
+        if otel_trace is None:
+            raise ImportError("OpenTelemetryExporter requires the 'opentelemetry-api' package.")
+        self.tracer = otel_trace.get_tracer('hydra_client', tracer_provider=tracer_provider)
+
+    def export(self, span):
+        start_ns = int(span.start_time * 1e9)
+        end_ns = start_ns + int(span.duration * 1e9)
+        otel_span = self.tracer.start_span(span.name, start_time=start_ns,
+                                           attributes=_otel_attributes(span.attributes))
+        if span.error is not None:
+            otel_span.set_status(otel_trace.Status(otel_trace.StatusCode.ERROR, span.error))
+
+        context = otel_trace.set_span_in_context(otel_span)
+        for name, offset, duration in span.phases:
+            phase_start = start_ns + int(offset * 1e9)
+            child = self.tracer.start_span(name, context=context, start_time=phase_start)
+            child.end(end_time=phase_start + int(duration * 1e9))
+
+        otel_span.end(end_time=end_ns)
+
+
+def _otel_attributes(attributes):
+    """ OpenTelemetry only accepts primitive attribute values. """
+    return {k: v if isinstance(v, (str, bool, int, float)) else str(v)
+            for k, v in attributes.items() if v is not None}
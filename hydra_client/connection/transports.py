@@ -0,0 +1,303 @@
+# (c) Copyright 2013, 2014, University of Manchester
+#
+# HydraLib is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# HydraPlatform is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with HydraPlatform.  If not, see <http://www.gnu.org/licenses/>
+#
+# -*- coding: utf-8 -*-
+"""
+    Transports carry a RemoteJSONConnection's requests to the server. The
+    scheme of the connection's url chooses one:
+
+        http://host:port/json       TCP, through a pooled HTTPAdapter
+        https://host:port/json      The same, over TLS
+        unix:///run/hydra.sock      HTTP over a Unix domain socket, for a
+                                    server on the same host
+        inproc://name/json          The WSGI application registered as
+                                    'name' with `register_app`, called in
+                                    this process, with no socket at all
+
+    A unix url names the socket file. Requests are sent to /json, unless
+    another path is given in the query: unix:///run/hydra.sock?path=/hydra/json
+
+    Each transport is a requests adapter, mounted on the connection's HTTP
+    sessions for its scheme, so retries, the circuit breaker, cookies and
+    streaming work in the same way over all of them. Further transports
+    can be added to TRANSPORTS.
+"""
+
+__all__ = ['TRANSPORTS', 'make_adapter', 'get_scheme', 'is_host_url', 'unix_socket_path', 'request_path',
+           'register_app', 'unregister_app', 'UnixSocketAdapter', 'WSGIAdapter']
+
+import io
+import sys
+import socket
+import logging
+import threading
+from http.cookies import SimpleCookie
+from urllib.parse import urlsplit, unquote, parse_qs
+
+import urllib3
+from urllib3.connection import HTTPConnection
+from urllib3.exceptions import NewConnectionError, ConnectTimeoutError
+from requests import Response
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.exceptions import ConnectionError
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from hydra_client.exception import RequestError
+
+log = logging.getLogger(__name__)
+
+DEFAULT_PATH = '/json'
+
+#Schemes whose urls name a host, and so are formatted by get_url
+HOST_SCHEMES = frozenset(['', 'http', 'https'])
+
+#The WSGI applications inproc urls can name
+_apps = {}
+_apps_lock = threading.Lock()
+
+
+def get_scheme(url):
+    """ The scheme of 'url', in lower case, or '' if it has none. """
+    if '://' not in url:
+        return ''
+    return url.split('://', 1)[0].lower()
+
+
+def is_host_url(url):
+    """ Whether 'url' names a host, rather than a socket file or an application. """
+    return get_scheme(url) in HOST_SCHEMES
+
+
+def unix_socket_path(url):
+    """ The socket file named by a unix url. """
+    parts = urlsplit(url)
+    #unix:///run/hydra.sock, or unix://%2Frun%2Fhydra.sock
+    path = unquote(parts.netloc + parts.path)
+    if path == '':
+        raise RequestError("No socket file in %s" % (url,))
+    return path
+
+
+def request_path(url):
+    """ The HTTP path a request to 'url' is sent to. """
+    parts = urlsplit(url)
+    if get_scheme(url) == 'unix':
+        return parse_qs(parts.query).get('path', [DEFAULT_PATH])[0]
+    return parts.path or DEFAULT_PATH
+
+
+def register_app(name, app):
+    """
+        Make the WSGI application 'app' available to connections with the
+        url inproc://<name>, e.g. a hydra-server application in the same
+        process, or a stand-in for benchmarks.
+    """
+    with _apps_lock:
+        _apps[name] = app
+
+
+def unregister_app(name):
+    with _apps_lock:
+        _apps.pop(name, None)
+
+
+class UnixHTTPConnection(HTTPConnection):
+    """ A urllib3 connection which connects to a Unix domain socket. """
+    def __init__(self, *args, socket_path=None, **kwargs):
+        super(UnixHTTPConnection, self).__init__(*args, **kwargs)
+        self.socket_path = socket_path
+
+    def _new_conn(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        if isinstance(self.timeout, (int, float)):
+            sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.socket_path)
+        except socket.timeout:
+            sock.close()
+            raise ConnectTimeoutError(self, "Connection to %s timed out" % (self.socket_path,))
+        except OSError as e:
+            sock.close()
+            raise NewConnectionError(self, "Failed to connect to %s: %s" % (self.socket_path, e))
+        return sock
+
+
+class UnixHTTPConnectionPool(urllib3.HTTPConnectionPool):
+    ConnectionCls = UnixHTTPConnection
+
+    def __init__(self, socket_path, **kwargs):
+        super(UnixHTTPConnectionPool, self).__init__('localhost', socket_path=socket_path, **kwargs)
+
+
+class UnixSocketAdapter(HTTPAdapter):
+    """
+        Sends requests over keep-alive connections to the Unix domain socket
+        'socket_path'. The connections are pooled as in HTTPAdapter.
+    """
+    def __init__(self, socket_path, pool_maxsize=10, pool_block=False, **kwargs):
+        super(UnixSocketAdapter, self).__init__(pool_connections=1,
+                                                pool_maxsize=pool_maxsize,
+                                                pool_block=pool_block)
+        self.socket_path = socket_path
+        self.pool = UnixHTTPConnectionPool(socket_path, maxsize=pool_maxsize, block=pool_block)
+
+    def get_connection_with_tls_context(self, request, verify, proxies=None, cert=None):
+        return self.pool
+
+    def get_connection(self, url, proxies=None):
+        return self.pool
+
+    def request_url(self, request, proxies):
+        return request_path(request.url)
+
+    def close(self):
+        self.pool.close()
+        super(UnixSocketAdapter, self).close()
+
+
+class WSGIAdapter(BaseAdapter):
+    """
+        Answers requests by calling the WSGI application 'app' on the
+        calling thread. Timeouts do not apply, and an exception raised by
+        the application is raised as a requests ConnectionError, as if the
+        server had gone away.
+    """
+    def __init__(self, app):
+        super(WSGIAdapter, self).__init__()
+        self.app = app
+
+    def _environ(self, request, body):
+        parts = urlsplit(request.url)
+        environ = {
+            'REQUEST_METHOD': request.method,
+            'SCRIPT_NAME': '',
+            'PATH_INFO': request_path(request.url),
+            'QUERY_STRING': parts.query,
+            'SERVER_NAME': parts.hostname or 'localhost',
+            'SERVER_PORT': '80',
+            'SERVER_PROTOCOL': 'HTTP/1.1',
+            'REMOTE_ADDR': '127.0.0.1',
+            'CONTENT_TYPE': request.headers.get('Content-Type', ''),
+            'CONTENT_LENGTH': str(len(body)),
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': 'http',
+            'wsgi.input': io.BytesIO(body),
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': False,
+            'wsgi.run_once': False,
+        }
+        for name, value in request.headers.items():
+            key = name.upper().replace('-', '_')
+            if key not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+                environ['HTTP_' + key] = value
+        return environ
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        body = request.body or b''
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+
+        started = []
+        chunks = []
+
+        def start_response(status, headers, exc_info=None):
+            if exc_info is not None and len(started) > 0:
+                raise exc_info[1].with_traceback(exc_info[2])
+            started[:] = [status, headers]
+            return chunks.append
+
+        try:
+            result = self.app(self._environ(request, body), start_response)
+            try:
+                for chunk in result:
+                    chunks.append(chunk)
+            finally:
+                if hasattr(result, 'close'):
+                    result.close()
+        except Exception as e:
+            raise ConnectionError(e, request=request)
+
+        status, headers = started
+        raw = urllib3.HTTPResponse(body=io.BytesIO(b''.join(chunks)),
+                                   headers=headers,
+                                   status=int(status[:3]),
+                                   reason=status[4:],
+                                   preload_content=False,
+                                   decode_content=False)
+
+        response = Response()
+        response.status_code = raw.status
+        response.reason = raw.reason
+        response.headers = CaseInsensitiveDict(raw.headers)
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.raw = raw
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        _set_cookies(response, raw.headers.getlist('Set-Cookie'))
+        return response
+
+    def close(self):
+        pass
+
+
+def _set_cookies(response, set_cookie_headers):
+    for header in set_cookie_headers:
+        for morsel in SimpleCookie(header).values():
+            response.cookies.set(morsel.key, morsel.value)
+
+
+def _http_adapter(url, pool_connections, pool_maxsize, pool_block):
+    return HTTPAdapter(pool_connections=pool_connections,
+                       pool_maxsize=pool_maxsize,
+                       pool_block=pool_block)
+
+
+def _unix_adapter(url, pool_connections, pool_maxsize, pool_block):
+    return UnixSocketAdapter(unix_socket_path(url), pool_maxsize=pool_maxsize, pool_block=pool_block)
+
+
+def _inproc_adapter(url, pool_connections, pool_maxsize, pool_block):
+    name = urlsplit(url).netloc
+    with _apps_lock:
+        app = _apps.get(name)
+    if app is None:
+        raise RequestError("No application is registered as '%s' for %s" % (name, url))
+    return WSGIAdapter(app)
+
+
+#Adapter factories by url scheme. Each is called as
+#factory(url, pool_connections, pool_maxsize, pool_block).
+TRANSPORTS = {
+    'http': _http_adapter,
+    'https': _http_adapter,
+    'unix': _unix_adapter,
+    'inproc': _inproc_adapter,
+}
+
+
+def make_adapter(url, pool_connections=10, pool_maxsize=10, pool_block=False):
+    """
+        The requests adapter for the scheme of 'url'. Raises a RequestError
+        for a scheme with no transport.
+    """
+    scheme = get_scheme(url)
+    factory = TRANSPORTS.get(scheme)
+    if factory is None:
+        raise RequestError("There is no transport for %s. Known schemes are: %s"
+                           % (url, ', '.join(sorted(TRANSPORTS))))
+    return factory(url, pool_connections, pool_maxsize, pool_block)
@@ -0,0 +1,54 @@
+# (c) Copyright 2013, 2014, University of Manchester
+#
+# HydraLib is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# HydraPlatform is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with HydraPlatform.  If not, see <http://www.gnu.org/licenses/>
+#
+# -*- coding: utf-8 -*-
+"""
+    Helpers for classifying hydra functions and their arguments.
+"""
+
+import json
+
+#Hydra functions which only read data. Calling them twice with the same
+#arguments has no further effect, so they are safe to repeat or share.
+READ_PREFIXES = ('get_', 'check_', 'validate_', 'search_', 'is_', 'exists_')
+
+#Hydra functions which change data.
+WRITE_PREFIXES = ('add_', 'update_', 'delete_', 'set_', 'remove_', 'purge_',
+                  'bulk_', 'clone_', 'assign_', 'import_', 'activate_',
+                  'deactivate_', 'apply_', 'move_', 'share_', 'unshare_',
+                  'hide_', 'copy_', 'create_', 'upload_', 'save_', 'clean_')
+
+
+def is_read_call(func_name):
+    return func_name.startswith(READ_PREFIXES)
+
+
+def is_write_call(func_name):
+    return func_name.startswith(WRITE_PREFIXES)
+
+
+def _key_default(obj):
+    raw = getattr(obj, 'raw', None)
+    if isinstance(raw, (dict, list)):
+        return raw
+    return str(obj)
+
+
+def canonical_key(func_name, args, kwargs):
+    """
+        A string identifying a call, equal for calls with equal arguments
+        regardless of keyword order.
+    """
+    return json.dumps([func_name, args, kwargs], sort_keys=True, default=_key_default)
@@ -15,10 +15,20 @@
 #
 # -*- coding: utf-8 -*-
 
-__all__ = ['RequestError']
+__all__ = ['RequestError', 'CircuitOpenError', 'InvalidArgumentsError']
 
 from hydra_base.exceptions import HydraPluginError
 
 
 class RequestError(HydraPluginError):
     pass
+
+
+class CircuitOpenError(RequestError):
+    """ Raised without contacting the server while its circuit breaker is open. """
+    pass
+
+
+class InvalidArgumentsError(RequestError, TypeError):
+    """ Raised without contacting the server when a call's arguments do not match the function. """
+    pass
@@ -18,12 +18,18 @@
 #
 
 import json
+import collections.abc
 
 import logging
 log = logging.getLogger(__name__)
 
 import six
 
+from hydra_base.lib.objects import JSONObject
+from hydra_base.util import get_json_as_dict
+
+from .connection.codec import coerce, materialise, is_dataset
+
 from datetime import datetime
 
 class ExtendedDict(dict):
@@ -57,3 +63,166 @@ class ExtendedDict(dict):
 
     def __setattr__(self, key, value):
         self[key] = value
+
+
+def lazy_json(value):
+    """
+        Wrap a decoded JSON value so that nested objects and lists are only
+        converted when they are accessed.
+    """
+    if value.__class__ is dict:
+        return LazyJSONObject(value)
+    elif value.__class__ is list:
+        return LazyJSONList(value)
+    return value
+
+
+def _convert(value, key=None):
+    """
+        Convert one value of a decoded JSON object on first access, following
+        the JSONObject conventions. Datasets are small and need the Dataset
+        methods, so they are converted in full straight away.
+    """
+    if isinstance(value, dict):
+        if key == 'layout':
+            return value
+        if key is not None and is_dataset(value):
+            #Converted as the value of 'key', which makes it a Dataset
+            return materialise({key: value})[key]
+        if key == 'value':
+            #As JSONObject does, a value which is not a dataset is kept as it is
+            return value
+        return LazyJSONObject(value)
+    elif isinstance(value, list):
+        if key == 'metadata':
+            return JSONObject({m['key']: m['value'] for m in value if isinstance(m, dict)})
+        return LazyJSONList(value)
+    elif isinstance(value, six.string_types):
+        if key == 'layout':
+            return get_json_as_dict(value)
+        return coerce(value)
+    return value
+
+
+class LazyJSONObject(collections.abc.MutableMapping):
+    """
+        A decoded JSON object whose keys can be accessed as attributes or
+        items, like a JSONObject, but whose values are only converted when
+        first accessed.
+
+        `raw` is the decoded dict this wraps. It is not copied, so it is the
+        cheapest way to get at the plain data. `to_json_object` converts the
+        whole object to a JSONObject.
+    """
+    __slots__ = ('_raw', '_cache')
+
+    def __init__(self, raw):
+        object.__setattr__(self, '_raw', raw)
+        object.__setattr__(self, '_cache', {})
+
+    @property
+    def raw(self):
+        return self._raw
+
+    def to_json_object(self):
+        return materialise(self._raw)
+
+    def __getitem__(self, key):
+        cache = self._cache
+        if key in cache:
+            return cache[key]
+        value = _convert(self._raw[key], key)
+        cache[key] = value
+        return value
+
+    def __setitem__(self, key, value):
+        self._raw[key] = value
+        self._cache.pop(key, None)
+
+    def __delitem__(self, key):
+        del self._raw[key]
+        self._cache.pop(key, None)
+
+    def __contains__(self, key):
+        return key in self._raw
+
+    def __iter__(self):
+        return iter(self._raw)
+
+    def __len__(self):
+        return len(self._raw)
+
+    def __getattr__(self, name):
+        if name.startswith('__') and name.endswith('__'):
+            raise AttributeError(name)
+        return self.get(name, None)
+
+    def __setattr__(self, key, value):
+        self[key] = value
+
+    def __eq__(self, other):
+        if isinstance(other, LazyJSONObject):
+            return self._raw == other._raw
+        return dict(self.items()) == other
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __reduce__(self):
+        return (LazyJSONObject, (self._raw,))
+
+    def __repr__(self):
+        return 'LazyJSONObject(%r)' % (self._raw,)
+
+
+class LazyJSONList(collections.abc.Sequence):
+    """
+        A decoded JSON list whose items are only converted when first
+        accessed. `raw` is the decoded list this wraps.
+    """
+    __slots__ = ('_raw', '_cache')
+
+    def __init__(self, raw):
+        self._raw = raw
+        self._cache = {}
+
+    @property
+    def raw(self):
+        return self._raw
+
+    def to_json_object(self):
+        return materialise(self._raw)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self._raw)))]
+        if index < 0:
+            index += len(self._raw)
+        cache = self._cache
+        if index in cache:
+            return cache[index]
+        value = self._raw[index]
+        if isinstance(value, six.string_types):
+            if len(value) > 0 and value[0] in ('{', '['):
+                value = _convert(json.loads(value))
+        else:
+            value = _convert(value)
+        cache[index] = value
+        return value
+
+    def __len__(self):
+        return len(self._raw)
+
+    def __eq__(self, other):
+        if isinstance(other, LazyJSONList):
+            return self._raw == other._raw
+        return list(self) == other
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __reduce__(self):
+        return (LazyJSONList, (self._raw,))
+
+    def __repr__(self):
+        return 'LazyJSONList(%r)' % (self._raw,)
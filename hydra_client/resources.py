@@ -15,32 +15,66 @@
 #
 # -*- coding: utf-8 -*-
 
-__all__ = ['HydraResource', 'HydraNetwork', 'HydraAttribute', 'temp_ids']
+__all__ = ['HydraResource', 'HydraNetwork', 'HydraAttribute', 'ScenarioAttribute', 'temp_ids']
 
 import logging
 log = logging.getLogger(__name__)
 
+from hydra_base.exceptions import HydraPluginError
+
 
 class HydraResource(object):
     """A prototype for Hydra resources. It supports attributes and groups
     object types by template. This allows to export group nodes by object
     type based on the template used.
+
+    Resources use __slots__ to stay small in large networks, so only the
+    attributes named there can be set.
     """
+    __slots__ = ('name', 'id', 'ID', 'X', 'Y', 'from_node', 'to_node',
+                 'attributes', 'groups', 'types', '_attrs_by_name', '_attrs_by_id',
+                 '_indexes')
+
     def __init__(self):
         self.name = None
         self.id = None
         self.attributes = []
         self.groups = []
         self.types = []
+        #Indexes of self.attributes by lower case name and by attr_id, built
+        #on the first lookup and kept in step by add_attribute and
+        #delete_attribute. Where several attributes share a name or id, the
+        #first added is indexed.
+        self._attrs_by_name = None
+        self._attrs_by_id = None
+        #The network indexes this resource is in, which set_type and group
+        #keep in step
+        self._indexes = ()
 
     def add_attribute(self, attr, res_attr, res_scen):
-        attribute = HydraAttribute(attr, res_attr, res_scen)
+        self._append_attribute(HydraAttribute(attr, res_attr, res_scen))
 
+    def _append_attribute(self, attribute):
         self.attributes.append(attribute)
+        if self._attrs_by_name is not None:
+            self._index_attribute(attribute)
 
     def delete_attribute(self, attribute):
         idx = self.attributes.index(attribute)
         del self.attributes[idx]
+        #Rebuilt on the next lookup
+        self._attrs_by_name = None
+        self._attrs_by_id = None
+
+    def _index_attribute(self, attribute):
+        self._attrs_by_name.setdefault(attribute.name.lower(), attribute)
+        self._attrs_by_id.setdefault(attribute.attr_id, attribute)
+
+    def _index_attributes(self):
+        self._attrs_by_name = {}
+        self._attrs_by_id = {}
+        for attribute in self.attributes:
+            self._index_attribute(attribute)
 
     def get_attribute(self, attr_name=None, attr_id=None):
 
@@ -62,12 +96,19 @@ class HydraResource(object):
         return None
 
     def set_type(self, types):
-        if isinstance(types, list):
-            self.types.extend(types)
-        else:
-            self.types.append(types)
+        if not isinstance(types, list):
+            types = [types]
+        if len(self._indexes) > 0:
+            type_ids = set(ttype.id for ttype in self.types if ttype is not None)
+            new_types = [ttype for ttype in types if ttype is not None and ttype.id not in type_ids]
+            for index in self._indexes:
+                index.add_types(self, new_types)
+        self.types.extend(types)
 
     def group(self, group_id):
+        if group_id not in self.groups:
+            for index in self._indexes:
+                index.add_groups(self, [group_id])
         self.groups.append(group_id)
         #attr = self._get_attr_by_name(group_attr)
         #if attr is not None:
@@ -77,36 +118,145 @@ class HydraResource(object):
         #    self.delete_attribute(attr)
 
     def _get_attr_by_name(self, attr_name):
-        for attr in self.attributes:
-            if attr.name.lower() == attr_name.lower():
-                return attr
+        if self._attrs_by_name is None:
+            self._index_attributes()
+        return self._attrs_by_name.get(attr_name.lower())
 
     def _get_attr_by_id(self, attr_id):
-        for attr in self.attributes:
-            if attr.attr_id == attr_id:
-                return attr
+        if self._attrs_by_id is None:
+            self._index_attributes()
+        return self._attrs_by_id.get(attr_id)
+
+
+class _ResourceIndex(object):
+    """
+    Indexes of one kind of a network's resources: by ID, by name, by the
+    ids of their types and by the ids of the groups they are in. Where
+    several resources share an ID or name, the first added is indexed.
+    """
+    __slots__ = ('by_id', 'by_name', 'by_type', 'by_group', 'types')
+
+    def __init__(self):
+        self.by_id = {}
+        self.by_name = {}
+        #{type id: [resource]} and {group id: [resource]}, in the order added
+        self.by_type = {}
+        self.by_group = {}
+        #{type id: type}, the first seen of each
+        self.types = {}
+
+    def add(self, resource):
+        self.by_id.setdefault(getattr(resource, 'ID', None), resource)
+        self.by_name.setdefault(resource.name, resource)
+        self.add_types(resource, resource.types)
+        self.add_groups(resource, dict.fromkeys(resource.groups))
+        resource._indexes += (self,)
+
+    def add_types(self, resource, types):
+        """ Index 'resource' under 'types', which it was not indexed under. """
+        for ttype in types:
+            if ttype is None:
+                continue
+            self.by_type.setdefault(ttype.id, []).append(resource)
+            self.types.setdefault(ttype.id, ttype)
+
+    def add_groups(self, resource, group_ids):
+        """ Index 'resource' under 'group_ids', which it was not indexed under. """
+        for group_id in group_ids:
+            self.by_group.setdefault(group_id, []).append(resource)
+
+    def remove(self, resource, resources):
+        """
+            Remove 'resource' from the list 'resources' and from the
+            indexes, indexing the next resource with the same ID or name.
+        """
+        for idx, r in enumerate(resources):
+            if r is resource:
+                del resources[idx]
+                break
+        else:
+            return
+        resource._indexes = tuple(index for index in resource._indexes if index is not self)
+
+        for index, key, get_key in ((self.by_id, getattr(resource, 'ID', None), lambda r: getattr(r, 'ID', None)),
+                                    (self.by_name, resource.name, lambda r: r.name)):
+            if index.get(key) is not resource:
+                continue
+            del index[key]
+            for r in resources:
+                if get_key(r) == key:
+                    index[key] = r
+                    break
+
+        type_ids = [ttype.id for ttype in resource.types if ttype is not None]
+        for index, keys in ((self.by_type, type_ids), (self.by_group, resource.groups)):
+            for key in set(keys):
+                members = [r for r in index.get(key, []) if r is not resource]
+                if len(members) > 0:
+                    index[key] = members
+                else:
+                    index.pop(key, None)
+
+    def get_types(self, template_id=None):
+        """ The types of the indexed resources, in the given template if there is one. """
+        return [self.types[type_id] for type_id in self.by_type
+                if template_id is None or self.types[type_id].template_id == template_id]
 
 
 class HydraNetwork(HydraResource):
     """
+    A network of HydraResource nodes, links and groups. Each is indexed by
+    ID, name, type and group as it is added, so lookups through get_node,
+    get_link and get_group take the same time however large the network.
+    Add and remove resources through the add_* and delete_* methods, and
+    change a resource's types and groups through its set_type and group
+    methods, which keep the indexes in step.
     """
 
-    description = None
-    scenario_id = None
-    nodes = []
-    links = []
-    groups = []
-    node_groups = []
-    link_groups = []
+    __slots__ = ('description', 'scenario_id', 'nodes', 'links', 'node_groups', 'link_groups',
+                 '_node_index', '_link_index', '_group_index', '_scenarios')
 
-    def load(self, json_net, json_attrs):
+    def __init__(self):
+        super(HydraNetwork, self).__init__()
+        self.description = None
+        self.scenario_id = None
+        self.nodes = []
+        self.links = []
+        self.node_groups = []
+        self.link_groups = []
+        self._node_index = _ResourceIndex()
+        self._link_index = _ResourceIndex()
+        self._group_index = _ResourceIndex()
+        #The values of each scenario, for networks loaded with all_scenarios
+        self._scenarios = None
+
+    def load(self, json_net, json_attrs, all_scenarios=False):
+        """
+        Load a get_network result. The values of its first scenario are
+        read into the attributes. With 'all_scenarios' set, the values of
+        every scenario in 'json_net' are kept instead, and the attributes
+        show those of the active scenario, at first the first one. See
+        set_scenario.
+        """
 
         # load network
-        #build dictionary of resource scenarios:
-        resource_scenarios = {
-            res_scen.resource_attr_id: res_scen
-            for res_scen in json_net.scenarios[0].resourcescenarios
-        }
+        if all_scenarios:
+            scenarios = self._scenarios = _ScenarioValues()
+            for json_scenario in json_net.scenarios:
+                self.add_scenario(json_scenario)
+            self.set_scenario(json_net.scenarios[0].id)
+
+            def add_attribute(resource, attr, res_attr):
+                resource._append_attribute(ScenarioAttribute(attr, res_attr, scenarios))
+        else:
+            #build dictionary of resource scenarios:
+            resource_scenarios = {
+                res_scen.resource_attr_id: res_scen
+                for res_scen in json_net.scenarios[0].resourcescenarios
+            }
+
+            def add_attribute(resource, attr, res_attr):
+                resource.add_attribute(attr, res_attr, resource_scenarios.get(res_attr.id))
 
         attributes = {attr.id: attr for attr in json_attrs}
         self.name = json_net.name
@@ -121,11 +271,10 @@ class HydraNetwork(HydraResource):
                     log.warning("Attribute %s not found in attributes",
                                 res_attr)
                     continue
-                self.add_attribute(attributes[res_attr.attr_id],
-                                   res_attr,
-                                   resource_scenarios.get(res_attr.id))
+                add_attribute(self, attributes[res_attr.attr_id], res_attr)
 
-        # build dictionary of group members:
+        # build dictionary of group members. With all_scenarios, the
+        # groups of the first scenario are used for all of them.
         if json_net.scenarios[0].resourcegroupitems is not None:
             groupitems = \
                 json_net.scenarios[0].resourcegroupitems
@@ -162,8 +311,7 @@ class HydraNetwork(HydraResource):
                 new_group.name = resgroup.name
                 if resgroup.attributes is not None:
                     for res_attr in resgroup.attributes:
-                        new_group.add_attribute(attributes[res_attr.attr_id],
-                            res_attr, resource_scenarios.get(res_attr.id))
+                        add_attribute(new_group, attributes[res_attr.attr_id], res_attr)
                 new_group.set_type(resgroup.types)
                 if new_group.ID in groupgroups.keys():
                     new_group.groups = groupgroups[new_group.ID]
@@ -179,9 +327,7 @@ class HydraNetwork(HydraResource):
             new_node.Y=node.y
             if node.attributes is not None:
                 for res_attr in node.attributes:
-                    new_node.add_attribute(attributes[res_attr.attr_id],
-                                           res_attr,
-                                           resource_scenarios.get(res_attr.id))
+                    add_attribute(new_node, attributes[res_attr.attr_id], res_attr)
 
             new_node.set_type(node.types)
             if new_node.ID in nodegroups.keys():
@@ -199,20 +345,61 @@ class HydraNetwork(HydraResource):
             new_link.to_node = self.get_node(node_id=link.node_2_id).name
             if link.attributes is not None:
                 for res_attr in link.attributes:
-                    new_link.add_attribute(attributes[res_attr.attr_id],
-                                           res_attr,
-                                           resource_scenarios.get(res_attr.id))
+                    add_attribute(new_link, attributes[res_attr.attr_id], res_attr)
             new_link.set_type(link.types)
             if new_link.ID in linkgroups.keys():
                 new_link.groups = linkgroups[new_link.ID]
             self.add_link(new_link)
             del new_link
 
+    def add_scenario(self, json_scenario):
+        """
+        Keep the values of a scenario of the network, from a get_scenario
+        result, in a network loaded with all_scenarios. The network's
+        resources and attributes are shared by all its scenarios, so each
+        costs only an entry for each of its datasets.
+        """
+        if self._scenarios is None:
+            raise HydraPluginError("Scenarios can only be added to a network loaded with all_scenarios=True")
+        datasets = {
+            res_scen.resource_attr_id: res_scen.dataset
+            for res_scen in json_scenario.resourcescenarios or []
+        }
+        self._scenarios.by_id[json_scenario.id] = datasets
+        if json_scenario.id == self.scenario_id:
+            #The active scenario was replaced, so show its new values
+            self._scenarios.active = datasets
+
+    def remove_scenario(self, scenario_id):
+        if self._scenarios is None:
+            raise HydraPluginError("Only a network loaded with all_scenarios=True can remove scenarios")
+        if scenario_id == self.scenario_id:
+            raise HydraPluginError("Scenario %s is active and cannot be removed" % (scenario_id,))
+        self._scenarios.datasets_of(scenario_id)
+        del self._scenarios.by_id[scenario_id]
+
+    def set_scenario(self, scenario_id):
+        """
+        Make 'scenario_id' the active scenario, whose values the attributes
+        show. Only one reference changes, however large the network.
+        """
+        if self._scenarios is None:
+            raise HydraPluginError("Only a network loaded with all_scenarios=True can change scenario")
+        self._scenarios.active = self._scenarios.datasets_of(scenario_id)
+        self.scenario_id = scenario_id
+
+    def get_scenario_ids(self):
+        """ The ids of the scenarios whose values the network keeps. """
+        if self._scenarios is None:
+            return [self.scenario_id]
+        return list(self._scenarios.by_id)
+
     def add_node(self, node):
         self.nodes.append(node)
+        self._node_index.add(node)
 
     def delete_node(self, node):
-        pass
+        self._node_index.remove(node, self.nodes)
 
     def get_node(self, node_name=None, node_id=None, node_type_id=None,
                  group=None):
@@ -227,9 +414,10 @@ class HydraNetwork(HydraResource):
 
     def add_link(self, link):
         self.links.append(link)
+        self._link_index.add(link)
 
     def delete_link(self, link):
-        pass
+        self._link_index.remove(link, self.links)
 
     def get_link(self, link_name=None, link_id=None, link_type_id=None,
                  group=None):
@@ -244,9 +432,10 @@ class HydraNetwork(HydraResource):
 
     def add_group(self, group):
         self.groups.append(group)
+        self._group_index.add(group)
 
     def delete_group(self, group):
-        pass
+        self._group_index.remove(group, self.groups)
 
     def get_group(self, **kwargs):
         if kwargs.get('group_name') is not None:
@@ -259,120 +448,182 @@ class HydraNetwork(HydraResource):
             return self._get_groups_by_group(kwargs.get('group'))
 
     def get_node_types(self, template_id=None):
-        node_types = []
-        for node in self.nodes:
-            for n_type in node.template[template_id]:
-                if n_type not in node_types:
-                    node_types.append(n_type)
-        return node_types
+        """ The types of the network's nodes, in the template 'template_id' if given. """
+        return self._node_index.get_types(template_id)
 
     def get_link_types(self, template_id=None):
-        link_types = []
-        for link in self.links:
-            for l_type in link.template[template_id]:
-                if l_type not in link_types:
-                    link_types.append(l_type)
-        return link_types
+        """ The types of the network's links, in the template 'template_id' if given. """
+        return self._link_index.get_types(template_id)
+
+    def get_group_types(self, template_id=None):
+        """ The types of the network's groups, in the template 'template_id' if given. """
+        return self._group_index.get_types(template_id)
+
+    def get_types(self, template_id=None):
+        """
+        The types of all the network's nodes, links and groups, in the
+        template 'template_id' if given.
+        """
+        types = {}
+        for index in (self._node_index, self._link_index, self._group_index):
+            for ttype in index.get_types(template_id):
+                types.setdefault(ttype.id, ttype)
+        return list(types.values())
 
     def _get_node_by_name(self, name):
-        for node in self.nodes:
-            if node.name == name:
-                return node
+        return self._node_index.by_name.get(name)
 
     def _get_node_by_id(self, ID):
-        for node in self.nodes:
-            if node.ID == ID:
-                return node
+        return self._node_index.by_id.get(ID)
 
     def _get_nodes_by_type(self, node_type_id):
-        nodes = []
-        for node in self.nodes:
-            for type in node.types:
-                if node_type_id == type.id:
-                    nodes.append(node)
-        return nodes
+        return list(self._node_index.by_type.get(node_type_id, []))
 
     def _get_nodes_by_group(self, node_group):
-        nodes = []
-        for node in self.nodes:
-            if node_group in node.groups:
-                nodes.append(node)
-        return nodes
+        return list(self._node_index.by_group.get(node_group, []))
 
     def _get_link_by_name(self, name):
-        for link in self.links:
-            if link.name == name:
-                return link
+        return self._link_index.by_name.get(name)
 
     def _get_link_by_id(self, ID):
-        for link in self.links:
-            if link.ID == ID:
-                return link
+        return self._link_index.by_id.get(ID)
 
     def _get_links_by_type(self, link_type_id):
-        links = []
-        for link in self.links:
-            for type in link.types:
-                if type.id == link_type_id:
-                    links.append(link)
-        return links
+        return list(self._link_index.by_type.get(link_type_id, []))
 
     def _get_links_by_group(self, link_group):
-        links = []
-        for link in self.links:
-            if link_group in link.groups:
-                links.append(link)
-        return links
+        return list(self._link_index.by_group.get(link_group, []))
 
     def _get_group_by_name(self, name):
-        for group in self.groups:
-            if group.name == name:
-                return group
+        return self._group_index.by_name.get(name)
 
     def _get_group_by_id(self, ID):
-        for group in self.groups:
-            if group.ID == ID:
-                return group
+        return self._group_index.by_id.get(ID)
 
     def _get_groups_by_type(self, group_type_id):
-        groups = []
-        for group in self.groups:
-            for type in group.types:
-                if type.id == group_type_id:
-                    groups.append(group)
-        return groups
+        return list(self._group_index.by_type.get(group_type_id, []))
 
     def _get_groups_by_group(self, group_group):
-        groups = []
-        for group in self.groups:
-            if group_group in group.groups:
-                groups.append(group)
-        return groups
+        return list(self._group_index.by_group.get(group_group, []))
 
 
 class HydraAttribute(object):
+    """
+    An attribute of a resource, with its value in the network's scenario,
+    if it has one.
+    """
+    __slots__ = ('name', 'attr_id', 'resource_attr_id', 'is_var', 'dataset_id', 'dataset_type', 'value')
 
-    name = None
+    def __init__(self, attr, res_attr, res_scen):
+        self.name = attr.name
+        self.attr_id = attr.id
+        self.resource_attr_id = res_attr.id
+        self.is_var = res_attr.attr_is_var == 'Y'
+        if res_scen is not None:
+            dataset = res_scen.dataset
+            self.dataset_id = dataset.id
+            self.dataset_type = dataset.type
+            self.value = dataset.value
+        else:
+            self.dataset_id = None
+            self.dataset_type = ''
+            self.value = None
 
-    attr_id = None
-    resource_attr_id = None
-    is_var = False
 
-    dataset_id = None
-    dataset_type = ''
+class _ScenarioValues(object):
+    """
+    The datasets of each scenario of a network loaded with all_scenarios,
+    as {scenario id: {resource attr id: dataset}}, and those of the active
+    scenario. Shared by the network and all its ScenarioAttributes.
+    """
+    __slots__ = ('by_id', 'active')
 
-    value = None
+    def __init__(self):
+        self.by_id = {}
+        self.active = {}
 
-    def __init__(self, attr, res_attr, res_scen):
+    def datasets_of(self, scenario_id):
+        datasets = self.by_id.get(scenario_id)
+        if datasets is None:
+            raise HydraPluginError("Scenario %s is not loaded" % (scenario_id,))
+        return datasets
+
+
+class _Dataset(object):
+    """ A dataset set on a ScenarioAttribute, replacing the loaded one. """
+    __slots__ = ('id', 'type', 'value')
+
+    def __init__(self, id, type, value):
+        self.id = id
+        self.type = type
+        self.value = value
+
+
+class ScenarioAttribute(object):
+    """
+    An attribute of a network loaded with all its scenarios, with the fields
+    of a HydraAttribute. Its dataset_id, dataset_type and value are those of
+    the network's active scenario, looked up when read. Setting them changes
+    the active scenario only. get_value reads the value in any loaded
+    scenario.
+    """
+    __slots__ = ('name', 'attr_id', 'resource_attr_id', 'is_var', '_scenarios')
+
+    def __init__(self, attr, res_attr, scenarios):
         self.name = attr.name
         self.attr_id = attr.id
         self.resource_attr_id = res_attr.id
-        if res_attr.attr_is_var == 'Y':
-            self.is_var = True
-        if res_scen is not None:
-            self.dataset_id = res_scen.dataset.id
-            self.dataset_type = res_scen.dataset.type
-            self.value = res_scen.dataset.value
+        self.is_var = res_attr.attr_is_var == 'Y'
+        self._scenarios = scenarios
+
+    def get_dataset(self, scenario_id=None):
+        """ The dataset in the scenario 'scenario_id', or the active one, or None. """
+        if scenario_id is None:
+            datasets = self._scenarios.active
+        else:
+            datasets = self._scenarios.datasets_of(scenario_id)
+        return datasets.get(self.resource_attr_id)
+
+    def get_value(self, scenario_id=None):
+        """ The value in the scenario 'scenario_id', or the active one. """
+        dataset = self.get_dataset(scenario_id)
+        return dataset.value if dataset is not None else None
+
+    def _set(self, field, value):
+        dataset = self.get_dataset()
+        if dataset is not None:
+            dataset = _Dataset(dataset.id, dataset.type, dataset.value)
+        else:
+            dataset = _Dataset(None, '', None)
+        setattr(dataset, field, value)
+        #The loaded dataset may be shared, so is replaced rather than changed
+        self._scenarios.active[self.resource_attr_id] = dataset
+
+    @property
+    def dataset_id(self):
+        dataset = self.get_dataset()
+        return dataset.id if dataset is not None else None
+
+    @dataset_id.setter
+    def dataset_id(self, dataset_id):
+        self._set('id', dataset_id)
+
+    @property
+    def dataset_type(self):
+        dataset = self.get_dataset()
+        return dataset.type if dataset is not None else ''
+
+    @dataset_type.setter
+    def dataset_type(self, dataset_type):
+        self._set('type', dataset_type)
+
+    @property
+    def value(self):
+        return self.get_value()
+
+    @value.setter
+    def value(self, value):
+        self._set('value', value)
 
 
 def temp_ids(n=-1):
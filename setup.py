@@ -9,6 +9,13 @@ setup(
     url='https://github.com/hydraplatform/hydra-client-python',
     packages=find_packages(),
     install_requires=['lxml', 'requests', 'cryptography'],
+    extras_require={
+        'async': ['aiohttp'],
+        'stream': ['ijson'],
+        'fast': ['orjson'],
+        'otel': ['opentelemetry-api'],
+        'columnar': ['numpy'],
+    },
     entry_points='''
         [console_scripts]
         hydra-cli=hydra_client.cli:start_cli
@@ -0,0 +1,179 @@
+""" A small stand-in for the Hydra JSON server, for testing remote connections. """
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from socketserver import ThreadingUnixStreamServer
+
+import pytest
+
+
+class Fault(Exception):
+    """ Raised by a fake server function to return a Hydra fault. """
+    def __init__(self, faultcode, faultstring):
+        super(Fault, self).__init__(faultstring)
+        self.faultcode = faultcode
+        self.faultstring = faultstring
+
+
+def login(server, cookies, username=None, password=None):
+    if username != 'root':
+        raise Fault('HydraError', 'Unknown user %s' % username)
+    return {'user_id': 1}
+
+
+def get_projects(server, cookies, user_id=None):
+    if user_id is None:
+        user_id = int(cookies.get('user_id', 0))
+    return [p for p in server.projects if p['created_by'] == int(user_id)]
+
+
+def get_network(server, cookies, network_id=None, **kwargs):
+    if network_id not in server.networks:
+        raise Fault('ResourceNotFoundError', 'Network %s not found' % network_id)
+    return server.networks[network_id]
+
+
+class FakeJSONServer(object):
+    """
+        An HTTP server speaking the Hydra JSON protocol: a POST of
+        {function_name: {arg: value}} returns the JSON encoded result, or a
+        500 with a faultcode and faultstring. Functions can be added or
+        replaced through `functions`; every call is recorded in `calls`.
+
+        With `multicall` set, a POST of a list of calls returns a list of
+        results, with faults inline. Otherwise a list is rejected.
+
+        While `unavailable` is above zero, each request is answered with a
+        503 (and a Retry-After header, if `retry_after` is set) and the
+        count decremented.
+    """
+    def __init__(self):
+        self.functions = {
+            'login': login,
+            'get_projects': get_projects,
+            'get_network': get_network,
+        }
+        self.projects = [{'id': 1, 'name': 'Project 1', 'created_by': 1}]
+        self.networks = {
+            1: {
+                'id': 1,
+                'name': 'Network 1',
+                'nodes': [{'id': i, 'name': 'Node %s' % i, 'x': i, 'y': i} for i in range(1, 4)],
+                'links': [{'id': 1, 'name': 'Link 1', 'node_1_id': 1, 'node_2_id': 2}],
+            }
+        }
+        self.multicall = False
+        self.unavailable = 0
+        self.retry_after = None
+        self.requests = 0
+        self.calls = []
+        self.lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), self._make_handler())
+        self.httpd.daemon_threads = True
+        self.unix_servers = []
+
+    @property
+    def url(self):
+        return 'http://127.0.0.1:%s/json' % self.httpd.server_address[1]
+
+    def start(self):
+        thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        thread.start()
+
+    def stop(self):
+        for httpd in [self.httpd] + self.unix_servers:
+            httpd.shutdown()
+            httpd.server_close()
+
+    def dispatch(self, body, cookies):
+        """ Run the function named in the request body and return (status, result). """
+        (func_name, args), = body.items()
+        with self.lock:
+            self.calls.append((func_name, args))
+        if func_name not in self.functions:
+            return 500, {'faultcode': 'Client', 'faultstring': 'Unknown function %s' % func_name}
+        try:
+            return 200, self.functions[func_name](self, cookies, **args)
+        except Fault as e:
+            return 500, {'faultcode': e.faultcode, 'faultstring': e.faultstring}
+
+    def respond(self, body, cookie_header):
+        """ Answer a request, returning (status, headers, content). """
+        body = json.loads(body)
+        cookies = {}
+        for part in cookie_header.split(';'):
+            if '=' in part:
+                k, v = part.strip().split('=', 1)
+                cookies[k] = v
+
+        with self.lock:
+            self.requests += 1
+            unavailable = self.unavailable > 0
+            if unavailable:
+                self.unavailable -= 1
+
+        if unavailable:
+            headers = [('Content-Length', '0')]
+            if self.retry_after is not None:
+                headers.append(('Retry-After', str(self.retry_after)))
+            return 503, headers, b''
+
+        if isinstance(body, list):
+            if self.multicall:
+                status, result = 200, [self.dispatch(b, cookies)[1] for b in body]
+            else:
+                status, result = 500, {'faultcode': 'Client', 'faultstring': 'Invalid request'}
+        else:
+            status, result = self.dispatch(body, cookies)
+
+        content = json.dumps(result).encode('utf-8')
+        headers = [('Content-Type', 'application/json'), ('Content-Length', str(len(content)))]
+        if 'beaker.session.id' not in cookies or cookies['beaker.session.id'] == 'None':
+            headers.append(('Set-Cookie', 'beaker.session.id=fake_session; Path=/'))
+        return status, headers, content
+
+    def wsgi_app(self, environ, start_response):
+        """ The server as a WSGI application, for in-process connections. """
+        length = int(environ.get('CONTENT_LENGTH') or 0)
+        status, headers, content = self.respond(environ['wsgi.input'].read(length),
+                                                environ.get('HTTP_COOKIE', ''))
+        start_response('%s %s' % (status, 'OK' if status == 200 else 'Error'), headers)
+        return [content]
+
+    def serve_unix(self, path):
+        """ Also serve on the Unix domain socket 'path', until stopped. """
+        #TCP_NODELAY cannot be set on a Unix socket
+        unix_server = ThreadingUnixStreamServer(path, self._make_handler(nodelay=False))
+        unix_server.daemon_threads = True
+        self.unix_servers.append(unix_server)
+        threading.Thread(target=unix_server.serve_forever, daemon=True).start()
+
+    def _make_handler(self, nodelay=True):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = nodelay
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length', 0))
+                status, headers, content = server.respond(self.rfile.read(length),
+                                                          self.headers.get('Cookie', ''))
+                self.send_response(status)
+                for name, value in headers:
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(content)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+@pytest.fixture()
+def fake_server():
+    server = FakeJSONServer()
+    server.start()
+    yield server
+    server.stop()
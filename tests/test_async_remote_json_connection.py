@@ -0,0 +1,240 @@
+import time
+import asyncio
+import threading
+
+import pytest
+
+from hydra_client.connection import RemoteJSONConnection, AsyncRemoteJSONConnection
+from hydra_client.exception import RequestError
+from fake_json_server import *
+
+
+class SyncRunner(object):
+    """ Runs a test scenario against RemoteJSONConnection. """
+    def connect(self, url, **kwargs):
+        return RemoteJSONConnection(url=url, app_name="Test Application", **kwargs)
+
+    def run(self, conn, result):
+        return result
+
+    def close(self, conn):
+        conn.close_session()
+
+
+class AsyncRunner(object):
+    """ Runs the same scenario against AsyncRemoteJSONConnection. """
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+
+    def connect(self, url, **kwargs):
+        return AsyncRemoteJSONConnection(url=url, app_name="Test Application", **kwargs)
+
+    def run(self, conn, result):
+        return self.loop.run_until_complete(result)
+
+    def close(self, conn):
+        self.loop.run_until_complete(conn.close_session())
+        self.loop.close()
+
+
+@pytest.fixture(params=['sync', 'async'])
+def runner(request):
+    if request.param == 'sync':
+        return SyncRunner()
+    return AsyncRunner()
+
+
+def test_login_and_get_projects(fake_server, runner):
+    connection = runner.connect(fake_server.url)
+    runner.run(connection, connection.login(username='root', password=''))
+
+    assert connection.user_id == 1
+    assert connection.session_id == 'fake_session'
+
+    projects = runner.run(connection, connection.get_projects())
+    assert len(projects) == 1
+    assert projects[0].name == 'Project 1'
+
+    project_not_a_user = runner.run(connection, connection.get_projects(user_id=999))
+    assert len(project_not_a_user) == 0
+
+    runner.close(connection)
+
+
+def test_get_network(fake_server, runner):
+    connection = runner.connect(fake_server.url, session_id='fake_session')
+
+    network = runner.run(connection, connection.get_network({'network_id': 1}))
+    assert network.name == 'Network 1'
+    assert len(network.nodes) == 3
+    assert network.links[0].node_2_id == 2
+
+    runner.close(connection)
+
+
+def test_fault_raises_request_error(fake_server, runner):
+    connection = runner.connect(fake_server.url, session_id='fake_session')
+
+    with pytest.raises(RequestError) as e:
+        runner.run(connection, connection.get_network(network_id=99))
+    assert 'ResourceNotFoundError' in str(e.value)
+
+    runner.close(connection)
+
+
+def test_async_concurrency_limit(fake_server):
+    """ No more than max_concurrency calls should reach the server at once. """
+    state = {'active': 0, 'peak': 0}
+    lock = threading.Lock()
+
+    def slow_get_network(server, cookies, network_id=None):
+        with lock:
+            state['active'] += 1
+            state['peak'] = max(state['peak'], state['active'])
+        time.sleep(0.05)
+        with lock:
+            state['active'] -= 1
+        return {'id': network_id}
+
+    fake_server.functions['get_network'] = slow_get_network
+
+    async def run():
+        async with AsyncRemoteJSONConnection(url=fake_server.url,
+                                             session_id='fake_session',
+                                             max_concurrency=3) as conn:
+            return await asyncio.gather(*[conn.get_network(network_id=i) for i in range(12)])
+
+    networks = asyncio.run(run())
+
+    assert [n.id for n in networks] == list(range(12))
+    assert state['peak'] <= 3
+
+
+def test_async_cancellation(fake_server):
+    """ A cancelled call must not stop the connection serving later calls. """
+    def slow_get_network(server, cookies, network_id=None):
+        time.sleep(0.5)
+        return {'id': network_id}
+
+    async def run():
+        async with AsyncRemoteJSONConnection(url=fake_server.url,
+                                             session_id='fake_session') as conn:
+            task = asyncio.ensure_future(conn.get_network(network_id=1))
+            await asyncio.sleep(0.05)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+            fake_server.functions['get_network'] = get_network
+            return await conn.get_network(network_id=1)
+
+    fake_server.functions['get_network'] = slow_get_network
+    network = asyncio.run(run())
+    assert network.name == 'Network 1'
+
+
+def test_async_iter_call(fake_server):
+    async def run():
+        async with AsyncRemoteJSONConnection(url=fake_server.url,
+                                             session_id='fake_session') as conn:
+            names = [n.name async for n in conn.iter_call('get_network', network_id=1,
+                                                           path='nodes.item')]
+            paths = [p async for p, _ in conn.iter_call('get_network', network_id=1,
+                                                         path=['links.item'])]
+            return names, paths
+
+    names, paths = asyncio.run(run())
+    assert names == ['Node 1', 'Node 2', 'Node 3']
+    assert paths == ['links.item']
+
+
+def test_async_batches_are_not_supported(fake_server):
+    conn = AsyncRemoteJSONConnection(url=fake_server.url, session_id='fake_session')
+    with pytest.raises(TypeError):
+        conn.batch()
+    with pytest.raises(TypeError):
+        conn._call_batch([])
+    assert fake_server.requests == 0
+
+
+def test_async_cache(fake_server):
+    fake_server.functions['get_attributes'] = lambda server, cookies: [{'id': 1, 'name': 'Volume'}]
+    fake_server.functions['add_attribute'] = lambda server, cookies, attr: dict(attr, id=2)
+
+    async def run():
+        async with AsyncRemoteJSONConnection(url=fake_server.url, session_id='fake_session',
+                                             cache=True) as conn:
+            first = await conn.call('get_attributes')
+            for i in range(3):
+                assert await conn.call('get_attributes') == first
+            await conn.call('add_attribute', attr={'name': 'Flow'})
+            await conn.call('get_attributes')
+            return conn.cache.stats()
+
+    stats = asyncio.run(run())
+    assert fake_server.requests == 3
+    assert (stats['hits'], stats['misses'], stats['invalidations']) == (3, 2, 1)
+
+
+def test_async_coalescing(fake_server):
+    def slow_get_network(server, cookies, network_id=None):
+        time.sleep(0.1)
+        return get_network(server, cookies, network_id=network_id)
+
+    fake_server.functions['get_network'] = slow_get_network
+
+    async def run():
+        async with AsyncRemoteJSONConnection(url=fake_server.url, session_id='fake_session',
+                                             coalesce=True) as conn:
+            networks = await asyncio.gather(*[conn.get_network(network_id=1) for i in range(5)])
+            return networks, conn.single_flight.stats()
+
+    networks, stats = asyncio.run(run())
+    assert fake_server.requests == 1
+    assert [n.name for n in networks] == ['Network 1'] * 5
+    assert networks[0] is not networks[1]
+    assert stats == {'calls': 1, 'coalesced': 4, 'in_flight': 0}
+
+
+def test_async_map(fake_server, recwarn):
+    state = {'active': 0, 'peak': 0}
+
+    def slow_get_network(server, cookies, network_id=None):
+        with server.lock:
+            state['active'] += 1
+            state['peak'] = max(state['peak'], state['active'])
+        # Later calls finish first
+        time.sleep(0.01 * (6 - network_id))
+        with server.lock:
+            state['active'] -= 1
+        return get_network(server, cookies, network_id=network_id if network_id < 4 else 99)
+
+    fake_server.networks[2] = fake_server.networks[3] = fake_server.networks[1]
+    fake_server.functions['get_network'] = slow_get_network
+
+    async def run():
+        async with AsyncRemoteJSONConnection(url=fake_server.url,
+                                             session_id='fake_session') as conn:
+            ordered = await conn.map('get_network', ({'network_id': i} for i in range(1, 6)),
+                                     workers=2)
+            peak = state['peak']
+            unordered = await conn.map('get_network', range(1, 6), ordered=False)
+            return ordered, unordered, peak
+
+    ordered, unordered, peak = asyncio.run(run())
+
+    assert [r.index for r in ordered] == [0, 1, 2, 3, 4]
+    assert [r.ok for r in ordered] == [True, True, True, False, False]
+    assert ordered[0].value.name == 'Network 1'
+    assert isinstance(ordered[3].error, RequestError)
+    assert sorted(r.index for r in unordered) == [0, 1, 2, 3, 4]
+    assert [r.index for r in unordered] != [0, 1, 2, 3, 4]
+    assert peak <= 2
+    assert not [w for w in recwarn if issubclass(w.category, RuntimeWarning)]
+
+
+def test_no_read_timeout_by_default(fake_server, runner):
+    connection = runner.connect(fake_server.url)
+    assert connection.timeout == (10, None)
+    assert runner.connect(fake_server.url, read_timeout=30).timeout == (10, 30)
+    runner.close(connection)
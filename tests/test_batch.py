@@ -0,0 +1,77 @@
+import pytest
+
+from hydra_client.connection import RemoteJSONConnection
+from hydra_client.exception import RequestError
+from fake_json_server import *
+
+
+def test_batch_multicall(fake_server):
+    """ With a multi-call server, queued calls go out size at a time. """
+    fake_server.multicall = True
+    connection = RemoteJSONConnection(url=fake_server.url, session_id='fake_session')
+
+    with connection.batch(size=4) as b:
+        networks = [b.get_network(network_id=1) for i in range(10)]
+        missing = b.get_network(network_id=99)
+
+    assert connection.multicall is True
+    assert fake_server.requests == 3
+    assert all(n.result().name == 'Network 1' for n in networks)
+    with pytest.raises(RequestError) as e:
+        missing.result()
+    assert 'ResourceNotFoundError' in str(e.value)
+
+
+def test_batch_falls_back_to_single_calls(fake_server):
+    """ A server without multi-call support gets parallel single calls. """
+    connection = RemoteJSONConnection(url=fake_server.url, session_id='fake_session')
+
+    with connection.batch(size=5) as b:
+        networks = [b.get_network(network_id=1) for i in range(5)]
+        missing = b.get_network(network_id=99)
+
+    assert connection.multicall is False
+    assert all(n.result().name == 'Network 1' for n in networks)
+    with pytest.raises(RequestError):
+        missing.result()
+
+    # The first batch attempted one multi-call request, later ones do not.
+    requests_before = fake_server.requests
+    with connection.batch(size=5) as b:
+        b.get_network(network_id=1)
+    assert fake_server.requests == requests_before + 1
+
+
+def test_batch_unavailable_server_keeps_detecting_multicall(fake_server):
+    """ A 503 to the first batch says nothing about multi-call support. """
+    fake_server.multicall = True
+    fake_server.unavailable = 1
+    connection = RemoteJSONConnection(url=fake_server.url, session_id='fake_session')
+
+    with connection.batch(size=5) as b:
+        failed = [b.get_network(network_id=1) for i in range(3)]
+
+    assert connection.multicall is None
+    assert fake_server.requests == 1
+    with pytest.raises(RequestError) as e:
+        failed[0].result()
+    assert '503' in str(e.value)
+
+    with connection.batch(size=5) as b:
+        networks = [b.get_network(network_id=1) for i in range(3)]
+
+    assert connection.multicall is True
+    assert fake_server.requests == 2
+    assert all(n.result().name == 'Network 1' for n in networks)
+
+
+def test_batch_cancelled_on_error(fake_server):
+    connection = RemoteJSONConnection(url=fake_server.url, session_id='fake_session')
+
+    with pytest.raises(ValueError):
+        with connection.batch(size=5) as b:
+            network = b.get_network(network_id=1)
+            raise ValueError()
+
+    assert network.cancelled()
+    assert fake_server.requests == 0
@@ -0,0 +1,79 @@
+import time
+
+from hydra_client.connection import RemoteJSONConnection
+from hydra_client.connection.cache import ResponseCache
+from fake_json_server import *
+
+
+def get_attributes(server, cookies, **kwargs):
+    return server.attributes
+
+
+def add_attribute(server, cookies, attr=None):
+    attr = dict(attr, id=len(server.attributes) + 1)
+    server.attributes.append(attr)
+    return attr
+
+
+@pytest.fixture()
+def attr_server(fake_server):
+    fake_server.attributes = [{'id': 1, 'name': 'flow', 'dimension_id': None}]
+    fake_server.functions['get_attributes'] = get_attributes
+    fake_server.functions['add_attribute'] = add_attribute
+    return fake_server
+
+
+def test_cache_hits_and_invalidation(attr_server):
+    connection = RemoteJSONConnection(url=attr_server.url, session_id='fake_session', cache=True)
+
+    first = connection.get_attributes()
+    second = connection.get_attributes()
+
+    assert first == second
+    assert attr_server.requests == 1
+    assert connection.cache.stats()['hits'] == 1
+    assert connection.cache.stats()['misses'] == 1
+
+    # Results are copies, so changing one does not change the cache
+    second[0].name = 'changed'
+    assert connection.get_attributes()[0].name == 'flow'
+
+    # Writes drop the affected entries
+    connection.add_attribute(attr={'name': 'volume'})
+    assert len(connection.get_attributes()) == 2
+    assert connection.cache.stats()['invalidations'] == 1
+
+    # Calls which aren't cacheable always go to the server
+    connection.get_network(network_id=1)
+    connection.get_network(network_id=1)
+    assert attr_server.calls[-2:] == [('get_network', {'network_id': 1})] * 2
+
+
+def test_cache_key_ignores_keyword_order(attr_server):
+    connection = RemoteJSONConnection(url=attr_server.url, session_id='fake_session', cache=True)
+
+    connection.get_attributes(a=1, b=2)
+    connection.get_attributes(b=2, a=1)
+    connection.get_attributes(a=1, b=3)
+
+    assert attr_server.requests == 2
+
+
+def test_cache_ttl_and_size_limit(attr_server):
+    cache = ResponseCache(ttl=0.05)
+    connection = RemoteJSONConnection(url=attr_server.url, session_id='fake_session', cache=cache)
+
+    connection.get_attributes()
+    time.sleep(0.1)
+    connection.get_attributes()
+    assert attr_server.requests == 2
+    assert cache.stats()['expirations'] == 1
+
+    cache = ResponseCache(max_bytes=60)
+    connection = RemoteJSONConnection(url=attr_server.url, session_id='fake_session', cache=cache)
+    connection.get_attributes(a=1)
+    connection.get_attributes(a=2)
+    stats = cache.stats()
+    assert stats['entries'] == 1
+    assert stats['evictions'] == 1
+    assert stats['bytes'] <= 60
@@ -0,0 +1,78 @@
+import threading
+import time
+
+from hydra_client.connection import RemoteJSONConnection
+from hydra_client.connection.coalesce import SingleFlight
+from hydra_client.exception import RequestError
+from fake_json_server import *
+
+
+def slow_get_network(server, cookies, network_id=None, **kwargs):
+    time.sleep(0.2)
+    return get_network(server, cookies, network_id=network_id, **kwargs)
+
+
+def call_from_threads(func, num_threads):
+    barrier = threading.Barrier(num_threads)
+    results = [None] * num_threads
+
+    def run(i):
+        barrier.wait()
+        try:
+            results[i] = func()
+        except Exception as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(num_threads)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+
+def test_identical_reads_share_a_request(fake_server):
+    fake_server.functions['get_network'] = slow_get_network
+    connection = RemoteJSONConnection(url=fake_server.url, session_id='fake_session', coalesce=True)
+
+    results = call_from_threads(lambda: connection.get_network(network_id=1), 8)
+
+    assert fake_server.requests == 1
+    assert all(r.name == 'Network 1' for r in results)
+    # Each caller has its own copy
+    assert len(set(id(r) for r in results)) == 8
+    assert connection.single_flight.stats()['coalesced'] == 7
+    assert connection.single_flight.stats()['in_flight'] == 0
+
+    # Nothing is kept once the call is complete
+    connection.get_network(network_id=1)
+    assert fake_server.requests == 2
+
+
+def test_different_arguments_are_not_shared(fake_server):
+    fake_server.functions['get_network'] = slow_get_network
+    fake_server.networks[2] = dict(fake_server.networks[1], id=2, name='Network 2')
+    connection = RemoteJSONConnection(url=fake_server.url, session_id='fake_session', coalesce=True)
+
+    network_ids = iter([1, 2])
+    results = call_from_threads(lambda: connection.get_network(network_id=next(network_ids)), 2)
+    assert fake_server.requests == 2
+    assert sorted(n.name for n in results) == ['Network 1', 'Network 2']
+    assert connection.single_flight.stats()['coalesced'] == 0
+
+
+def test_errors_are_shared(fake_server):
+    fake_server.functions['get_network'] = slow_get_network
+    connection = RemoteJSONConnection(url=fake_server.url, session_id='fake_session', coalesce=True)
+
+    results = call_from_threads(lambda: connection.get_network(network_id=99), 4)
+
+    assert fake_server.requests == 1
+    assert all(isinstance(r, RequestError) for r in results)
+
+
+def test_writes_are_not_coalesced():
+    flight = SingleFlight()
+    assert flight.key('add_network', (), {'net': {}}) is None
+    assert flight.key('get_network', (), {'network_id': 1}) == \
+        flight.key('get_network', (), {'network_id': 1})
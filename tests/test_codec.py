@@ -0,0 +1,101 @@
+import pytest
+import json
+
+from hydra_base.lib.objects import JSONObject, Dataset
+
+from hydra_client.connection import codec
+
+
+NETWORK = {
+    'id': 1,
+    'name': 'Network 1',
+    'layout': '{"color": "red"}',
+    'nodes': [{'id': 1, 'name': 'Node 1', 'x': '1.5', 'y': 2,
+               'types': [{'id': 3, 'name': 'Reservoir', 'template_id': 1}]}],
+    'scenarios': [{'id': 1, 'resourcescenarios': [
+        {'resource_attr_id': 1,
+         'dataset': {'id': 5, 'type': 'scalar', 'value': '10', 'unit_id': None,
+                     'metadata': {'source': 'test'}}},
+    ]}],
+}
+
+
+def test_decode_matches_jsonobject():
+    """ Single pass decoding must give the same result as wrapping afterwards. """
+    body = json.dumps(NETWORK)
+
+    decoded = codec.decode(body)
+
+    assert decoded == JSONObject(json.loads(body))
+    assert decoded.layout == {'color': 'red'}
+    assert decoded.nodes[0].x == 1.5
+    assert decoded.nodes[0].types[0].name == 'Reservoir'
+
+    dataset = decoded.scenarios[0].resourcescenarios[0].dataset
+    assert isinstance(dataset, Dataset)
+    assert dataset.metadata.source == 'test'
+
+
+def test_dumps_round_trip():
+    network = codec.decode(json.dumps(NETWORK))
+
+    assert codec.loads(codec.dumps(network)) == json.loads(json.dumps(network))
+
+
+def test_coerce_matches_float():
+    """ The shortcut for words must agree with float(). """
+    for value in ['NODE', 'N', 'Y', 'nan', 'NaN ', 'inf', '-inf', 'Infinity', 'infx', '1_000', ' 5', '1.5', '', 'x']:
+        try:
+            expected = float(value)
+        except ValueError:
+            expected = value
+        coerced = codec.coerce(value)
+        if expected != expected:
+            assert coerced != coerced
+        else:
+            assert coerced == expected
+
+
+def test_decode_datasets_only_under_keys():
+    """ As with JSONObject, top-level objects and list items are not Datasets. """
+    dataset = {'id': 5, 'type': 'scalar', 'value': '10'}
+    body = json.dumps({'dataset': dataset, 'datasets': [dataset], 'type': 'NETWORK'})
+
+    decoded = codec.decode(body)
+
+    assert decoded == JSONObject(json.loads(body))
+    assert type(decoded) is JSONObject
+    assert type(decoded.dataset) is Dataset
+    assert type(decoded.datasets[0]) is JSONObject
+    assert type(codec.decode(json.dumps(dataset))) is JSONObject
+    assert type(codec.materialise(dataset)) is JSONObject
+
+
+def test_decode_keeps_nested_values_raw():
+    """ A 'value' object which is not a dataset is left as decoded. """
+    body = json.dumps({'id': 1, 'value': {'a': '1', 'b': {'c': '2'}},
+                       'dataset': {'type': 'descriptor', 'value': {'d': '3'}}})
+
+    decoded = codec.decode(body)
+
+    assert decoded == JSONObject(json.loads(body))
+    assert type(decoded.value) is dict
+    assert decoded.value == {'a': '1', 'b': {'c': '2'}}
+    assert type(decoded.dataset) is Dataset
+    assert type(decoded.dataset.value) is dict
+    assert codec.materialise(json.loads(body)) == decoded
+
+
+def test_dumps_keeps_non_finite_floats():
+    """ NaN and Infinity are sent as the standard library writes them, not as null. """
+    numpy = pytest.importorskip('numpy')
+    value = {'v': float('nan'), 'w': [float('inf'), -float('inf')], 'x': None,
+             'a': numpy.array([1.0, float('nan')])}
+
+    decoded = json.loads(codec.dumps(value))
+
+    assert decoded['v'] != decoded['v']
+    assert decoded['w'] == [float('inf'), -float('inf')]
+    assert decoded['x'] is None
+    assert decoded['a'][1] != decoded['a'][1]
+    assert json.loads(codec.dumps({'x': None, 'y': 1.5})) == {'x': None, 'y': 1.5}
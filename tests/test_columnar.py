@@ -0,0 +1,88 @@
+import numpy
+import pytest
+
+from hydra_client.columnar import ColumnarNetwork, MISSING
+from hydra_client.resources import HydraNetwork
+from test_resources import json_network
+
+
+@pytest.fixture()
+def columnar(json_network):
+    network = ColumnarNetwork()
+    network.load(*json_network)
+    return network
+
+
+def test_columns(columnar):
+    nodes = columnar.nodes
+    assert nodes.ids.tolist() == [1, 2, 3]
+    assert nodes.x.tolist() == [1.0, 2.0, 3.0]
+    assert columnar.links.node_1_id.tolist() == [1, 2]
+    assert columnar.links.node_2_row.tolist() == [1, 2]
+    assert nodes.rows_of([3, 1, 7]).tolist() == [2, 0, MISSING]
+    assert nodes.row_of(7) is None
+
+    assert nodes.rows_of_type(2).tolist() == [0, 1, 2]
+    assert nodes.rows_in_group(1).tolist() == [0]
+    assert columnar.links.rows_in_group(1).tolist() == [1]
+
+    volume = nodes.column_of(1)
+    assert nodes.dataset_ids[:, volume].tolist() == [10, 20, 30]
+    assert nodes.column_of(2) is None
+    assert columnar.get_value(20) == 20
+    assert columnar.get_value(99) is None
+    assert columnar.dataset_positions([110, 99]).tolist() == [3, MISSING]
+    assert columnar.type_catalog[3].name == 'River'
+
+
+def test_row_views(columnar):
+    node = columnar.nodes[1]
+    assert (node.id, node.name, node.x, node.y) == (2, 'Node 2', 2.0, -2.0)
+    assert node.type_ids == [2]
+    assert node.dataset_id(1) == 20
+    assert node.resource_attr_id(1) == 20
+    assert node.dataset_id(2) is None
+
+    assert columnar.nodes[0].group_ids == [1]
+    assert columnar.nodes[-1] == columnar.nodes[2]
+    assert [l.name for l in columnar.links] == ['Link 1', 'Link 2']
+    with pytest.raises(IndexError):
+        columnar.nodes[3]
+    with pytest.raises(AttributeError):
+        node.node_1_id
+
+
+def test_to_hydra_network(columnar, json_network):
+    network = columnar.to_hydra_network()
+    loaded = HydraNetwork()
+    loaded.load(*json_network)
+
+    for kind in ('nodes', 'links', 'groups'):
+        converted, expected = getattr(network, kind), getattr(loaded, kind)
+        assert [(r.ID, r.name, r.groups, [t.id for t in r.types]) for r in converted] == \
+            [(r.ID, r.name, r.groups, [t.id for t in r.types]) for r in expected]
+        assert [[(a.name, a.resource_attr_id, a.dataset_id, a.value, a.is_var) for a in r.attributes]
+                for r in converted] == \
+            [[(a.name, a.resource_attr_id, a.dataset_id, a.value, a.is_var) for a in r.attributes]
+             for r in expected]
+
+    assert network.get_link(link_id=2).to_node == 'Node 3'
+    assert network.get_node(node_id=3).X == 3
+    assert network.get_node(node_id=1).get_attribute(attr_name='volume').value == 10
+    assert [n.name for n in network.get_node(node_type_id=2)] == ['Node 1', 'Node 2', 'Node 3']
+
+
+def test_from_hydra_network(columnar, json_network):
+    loaded = HydraNetwork()
+    loaded.load(*json_network)
+
+    converted = ColumnarNetwork.from_hydra_network(loaded)
+
+    for kind in ('nodes', 'links', 'groups'):
+        table, expected = getattr(converted, kind), getattr(columnar, kind)
+        for column in ('ids', 'type_ids', 'group_rows', 'group_ids', 'attr_ids',
+                       'resource_attr_ids', 'dataset_ids', 'attr_is_var'):
+            assert numpy.array_equal(getattr(table, column), getattr(expected, column)), (kind, column)
+    assert converted.links.node_1_id.tolist() == [1, 2]
+    assert converted.dataset_ids.tolist() == columnar.dataset_ids.tolist()
+    assert converted.dataset_values.tolist() == columnar.dataset_values.tolist()
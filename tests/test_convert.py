@@ -0,0 +1,92 @@
+import enum
+import sys
+import os
+from datetime import datetime
+from decimal import Decimal
+
+import numpy
+import pytest
+from hydra_base.lib.objects import JSONObject
+
+from hydra_client.connection import JSONConnection
+from hydra_client.connection.convert import to_json_object, format_datetimes
+from hydra_client.connection.base_connection import DEFAULT_DATETIME_FORMAT
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'benchmarks'))
+from synthetic import make_network
+
+
+class Colour(enum.Enum):
+    RED = 'red'
+
+
+def assert_same(converted, expected):
+    assert type(converted) is type(expected)
+    if isinstance(expected, dict):
+        assert set(converted) == set(expected)
+        for k in expected:
+            assert_same(converted[k], expected[k])
+    elif isinstance(expected, list):
+        assert len(converted) == len(expected)
+        for c, e in zip(converted, expected):
+            assert_same(c, e)
+    else:
+        assert converted == expected
+
+
+@pytest.mark.parametrize('value', [
+    {'id': '1', 'name': 'Node 1', 'x': '1.5', 'y': 2, 'description': None, 'hidden': True},
+    {'layout': '{"color": "red"}', 'value_ref': 1, ('a', 'b'): 1, 1: 'one'},
+    {'nested': {'a': '1'}, 'dataset': {'type': 'scalar', 'value': '1', 'unit_id': None}},
+    {'value': {'a': 1}, 'when': datetime(2020, 1, 2), 'amount': Decimal('1.5'), 'colour': Colour.RED},
+    {'values': [1, 2, 3], 'names': ['a', 'b'], 'empty': [], 'objects': [{'a': '1'}, {'b': 2}]},
+    {'json_list': ['{"a": 1}'], 'empty_string_list': ['', 'a'], 'inf': 'inf', 'text': '1a'},
+    {'dataset': {'type': 'scalar', 'value': '1', 'metadata': {'source': 'test'}}},
+])
+def test_same_as_json_object(value):
+    assert_same(to_json_object(value), JSONObject(value))
+
+
+def test_same_as_json_object_for_a_network():
+    network, _ = make_network(num_nodes=50, num_scenarios=2)
+    assert_same(to_json_object(network), JSONObject(network))
+
+
+def test_nested_json_objects_are_not_copied():
+    node = JSONObject({'id': 1, 'name': 'Node 1'})
+    converted = to_json_object({'nodes': [node], 'node': node})
+    assert converted['nodes'][0] is node
+    assert converted['node'] is node
+
+
+def test_format_datetimes():
+    dates = [datetime(2020, 1, 2, 3, 4, 5, 6), datetime(1999, 12, 31)]
+    expected = [d.strftime(DEFAULT_DATETIME_FORMAT) for d in dates]
+
+    assert format_datetimes(dates, DEFAULT_DATETIME_FORMAT) == expected
+    assert format_datetimes(numpy.array(dates, dtype='datetime64[ns]'), DEFAULT_DATETIME_FORMAT) == expected
+    assert format_datetimes(dates, '%d/%m/%Y') == ['02/01/2020', '31/12/1999']
+    # strftime does not pad early years, so these are left to it
+    assert format_datetimes([datetime(999, 1, 1)], DEFAULT_DATETIME_FORMAT) == \
+        [datetime(999, 1, 1).strftime(DEFAULT_DATETIME_FORMAT)]
+
+
+def test_args_to_json_object():
+    connection = JSONConnection.__new__(JSONConnection)
+    connection.dateformat = DEFAULT_DATETIME_FORMAT
+
+    values = [1, 2, 3]
+    obj = JSONObject({'a': 1})
+    dates = numpy.array(['2020-01-01T00:00'], dtype='datetime64[s]')
+
+    converted = list(connection.args_to_json_object(
+        values, obj, {'a': '1'}, dates, numpy.arange(3), ['a', datetime(2020, 1, 1)], (1, 2), None))
+
+    assert converted[0] is values
+    assert converted[1] is obj
+    assert converted[2] == {'a': 1} and isinstance(converted[2], JSONObject)
+    assert converted[3] == ['2020-01-01T00:00:00.000000000Z']
+    assert converted[4] == [0, 1, 2] and type(converted[4][0]) is int
+    assert converted[5] == ['a', '2020-01-01T00:00:00.000000000Z']
+    assert converted[6] == [1, 2]
+    assert converted[7] is None
@@ -0,0 +1,50 @@
+import json
+
+from hydra_client.connection import RemoteJSONConnection, codec
+from hydra_base.lib.objects import JSONObject, Dataset
+
+from hydra_client.objects import LazyJSONObject, LazyJSONList, lazy_json
+from fake_json_server import *
+
+
+def test_remote_lazy_results(fake_server):
+    connection = RemoteJSONConnection(url=fake_server.url, session_id='fake_session',
+                                      lazy_results=True)
+
+    network = connection.get_network(network_id=1)
+
+    assert isinstance(network, LazyJSONObject)
+    assert isinstance(network.nodes, LazyJSONList)
+    assert network.nodes[1].name == 'Node 2'
+    assert network['links'][0]['node_2_id'] == 2
+    # The raw structure is the decoded response, unconverted
+    assert network.raw == fake_server.networks[1]
+    assert network.to_json_object() == codec.decode(json.dumps(fake_server.networks[1]))
+
+
+def test_lazy_result_as_argument(fake_server):
+    """ Lazy results can be sent back to the server as they are. """
+    connection = RemoteJSONConnection(url=fake_server.url, session_id='fake_session',
+                                      lazy_results=True)
+    fake_server.functions['update_network'] = lambda server, cookies, net: net
+
+    network = connection.get_network(network_id=1)
+    network.name = 'Renamed'
+    updated = connection.update_network(net=network)
+
+    assert updated.name == 'Renamed'
+    assert fake_server.calls[-1][1]['net']['nodes'] == network.raw['nodes']
+
+
+def test_lazy_conversions_match_jsonobject():
+    raw = {'dataset': {'type': 'scalar', 'value': '10'},
+           'datasets': [{'type': 'scalar', 'value': '10'}],
+           'value': {'a': '1'}}
+    lazy = lazy_json(json.loads(json.dumps(raw)))
+    expected = JSONObject(raw)
+
+    assert type(lazy.dataset) is Dataset
+    assert lazy.dataset == expected.dataset
+    assert not isinstance(lazy.datasets[0], Dataset)
+    assert type(lazy.value) is dict
+    assert lazy.value == expected.value
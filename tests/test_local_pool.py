@@ -0,0 +1,86 @@
+from concurrent.futures import Future
+
+import pytest
+
+from hydra_client.connection import JSONConnection, LocalConnectionPool
+from hydra_client.connection.tracing import Tracer
+
+
+@pytest.fixture()
+def db_url(tmp_path):
+    db_url = 'sqlite:///%s' % (tmp_path / 'hydra.db')
+    connection = JSONConnection(db_url=db_url, user_id=1)
+    connection.connect()
+    for i in range(4):
+        connection.add_attribute({'name': 'attr %s' % i, 'dimension_id': None})
+    connection.close_session()
+    return db_url
+
+
+def test_pool_calls_return_futures(db_url):
+    with LocalConnectionPool(db_url=db_url, user_id=1, workers=2) as pool:
+        future = pool.get_attribute_by_name_and_dimension('attr 1', None)
+        assert isinstance(future, Future)
+        assert future.result(timeout=60).name == 'attr 1'
+
+        futures = [pool.call('get_attribute_by_name_and_dimension', 'attr %s' % i, None)
+                   for i in range(4)]
+        assert [f.result(timeout=60).name for f in futures] == ['attr %s' % i for i in range(4)]
+
+        # Errors raised in a worker are set on the future
+        with pytest.raises(Exception):
+            pool.get_attribute_by_id(-1).result(timeout=60)
+
+        calls = pool.metrics.snapshot()['functions']
+        assert calls['get_attribute_by_name_and_dimension']['calls'] == 5
+        assert calls['get_attribute_by_id']['errors'] == 1
+
+
+def test_pool_map(db_url):
+    connection = JSONConnection(db_url=db_url, user_id=1)
+    with LocalConnectionPool(connection=connection, workers=2) as pool:
+        results = list(pool.map('get_attribute_by_name_and_dimension',
+                                [('attr %s' % i, None) for i in range(4)]))
+
+    assert [r.value.name for r in results] == ['attr %s' % i for i in range(4)]
+    assert connection.metrics.snapshot()['functions']['get_attribute_by_name_and_dimension']['calls'] == 4
+
+    # The same call as on a connection, with a limit on the calls at once
+    with LocalConnectionPool(connection=connection, workers=2) as pool:
+        results = list(pool.map('get_attribute_by_name_and_dimension',
+                                [('attr %s' % i, None) for i in range(4)], workers=1))
+    assert [r.value.name for r in results] == ['attr %s' % i for i in range(4)]
+    connection.close_session()
+
+
+def test_worker_kwargs(db_url):
+    connection = JSONConnection(db_url=db_url, user_id=1, cache=True, coalesce=True,
+                                tracer=Tracer(exporter=None))
+
+    worker_kwargs = connection._worker_kwargs()
+
+    assert worker_kwargs['db_url'] == connection.db_url
+    assert worker_kwargs['user_id'] == 1
+    assert worker_kwargs['persistent_engine'] is True
+    assert worker_kwargs['metrics'] is False
+    assert 'cache' not in worker_kwargs and 'coalesce' not in worker_kwargs
+    assert 'tracer' not in worker_kwargs
+    connection.close_session()
+
+
+def test_worker_drops_inherited_engine_connections(db_url):
+    """ A worker must not use the database connections pooled by its parent. """
+    import hydra_base
+    from hydra_client.connection import pool
+
+    connection = JSONConnection(db_url=db_url, user_id=1)
+    connection.get_attribute_by_name_and_dimension('attr 1', None)
+    engine = hydra_base.db.engine
+    inherited_pool = engine.pool
+
+    pool._init_worker(connection._worker_kwargs())
+
+    assert engine.pool is not inherited_pool
+    assert pool._worker_connection.get_attribute_by_name_and_dimension('attr 1', None).name == 'attr 1'
+    pool._worker_connection = None
+    connection.close_session()
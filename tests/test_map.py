@@ -0,0 +1,101 @@
+import time
+
+from hydra_client.connection import RemoteJSONConnection, JSONConnection, LocalConnectionPool
+from hydra_client.connection.fanout import split_args
+from hydra_client.exception import RequestError
+from fake_json_server import *
+
+
+def get_resource_data(server, cookies, ref_key=None, ref_id=None, **kwargs):
+    if ref_id % 5 == 0:
+        raise Fault('HydraError', 'No data for %s %s' % (ref_key, ref_id))
+    # Later items finish first, so completion order differs from input order
+    time.sleep(0.01 * (20 - ref_id) / 20)
+    with server.lock:
+        server.active += 1
+        server.max_active = max(server.max_active, server.active)
+    time.sleep(0.01)
+    with server.lock:
+        server.active -= 1
+    return [{'ref_key': ref_key, 'ref_id': ref_id, 'value': ref_id * 10}]
+
+
+@pytest.fixture()
+def data_server(fake_server):
+    fake_server.active = 0
+    fake_server.max_active = 0
+    fake_server.functions['get_resource_data'] = get_resource_data
+    return fake_server
+
+
+def test_map_ordered(data_server):
+    connection = RemoteJSONConnection(url=data_server.url, session_id='fake_session')
+
+    args = ({'ref_key': 'NODE', 'ref_id': i} for i in range(1, 21))
+    results = list(connection.map('get_resource_data', args, workers=4))
+
+    assert [r.index for r in results] == list(range(20))
+    assert [r.args['ref_id'] for r in results] == list(range(1, 21))
+    # Failures are reported per item without stopping the others
+    failed = [r for r in results if not r.ok]
+    assert [r.args['ref_id'] for r in failed] == [5, 10, 15, 20]
+    assert all(isinstance(r.error, RequestError) for r in failed)
+    with pytest.raises(RequestError):
+        failed[0].get()
+    assert results[0].get()[0].value == 10
+
+    assert 1 < data_server.max_active <= 4
+
+
+def test_map_unordered(data_server):
+    connection = RemoteJSONConnection(url=data_server.url, session_id='fake_session')
+
+    args = ({'ref_key': 'NODE', 'ref_id': i} for i in range(1, 21))
+    results = list(connection.map('get_resource_data', args, workers=8, ordered=False))
+
+    assert sorted(r.index for r in results) == list(range(20))
+    assert len([r for r in results if r.ok]) == 16
+
+
+def test_map_consumes_arguments_lazily(data_server):
+    connection = RemoteJSONConnection(url=data_server.url, session_id='fake_session')
+    consumed = []
+
+    def args():
+        for i in range(1, 1000):
+            consumed.append(i)
+            yield {'ref_key': 'NODE', 'ref_id': i}
+
+    results = connection.map('get_resource_data', args(), workers=2)
+    first = next(results)
+    results.close()
+
+    assert first.index == 0
+    assert len(consumed) < 10
+
+
+def test_split_args():
+    assert split_args({'network_id': 1}) == ((), {'network_id': 1})
+    assert split_args((1, 2)) == ((1, 2), {})
+    assert split_args([1, 2]) == (([1, 2],), {})
+    assert split_args(1) == ((1,), {})
+
+
+def test_local_map_uses_processes(tmp_path):
+    connection = JSONConnection(db_url='sqlite:///%s' % (tmp_path / 'hydra.db'), user_id=1)
+    connection.connect()
+
+    executor = connection._map_executor(2)
+    assert isinstance(executor, LocalConnectionPool)
+    executor.shutdown()
+
+    attrs = [{'attr': {'name': 'attr %s' % i, 'dimension_id': None}} for i in range(6)]
+    added = list(connection.map('add_attribute', attrs, workers=2))
+    assert all(r.ok for r in added)
+    # Calls made in the worker processes are recorded in this connection
+    assert connection.metrics.snapshot()['functions']['add_attribute']['calls'] == 6
+
+    results = list(connection.map('get_attribute_by_id', [(r.value.id,) for r in added] + [(-1,)], workers=2))
+    assert [r.value.name for r in results[:-1]] == ['attr %s' % i for i in range(6)]
+    assert results[-1].error is not None
+    connection.close_session()
@@ -0,0 +1,82 @@
+import json
+
+from hydra_client.connection import RemoteJSONConnection
+from hydra_client.connection.metrics import MetricsRegistry, LatencyHistogram
+from hydra_client.connection.retry import RetryPolicy
+from fake_json_server import *
+
+
+def test_calls_are_recorded(fake_server):
+    connection = RemoteJSONConnection(url=fake_server.url, session_id='fake_session')
+
+    for i in range(3):
+        connection.get_network(network_id=1)
+    with pytest.raises(Exception):
+        connection.get_network(network_id=99)
+
+    stats = connection.metrics.snapshot()['functions']['get_network']
+    assert stats['calls'] == 4
+    assert stats['errors'] == 1
+    assert stats['request_bytes'] > 0
+    assert stats['response_bytes'] > 3 * len('Network 1')
+    assert 0 < stats['p50'] <= stats['p95'] <= stats['p99'] <= stats['max']
+
+
+def test_streamed_and_batched_calls_are_recorded(fake_server):
+    fake_server.multicall = True
+    connection = RemoteJSONConnection(url=fake_server.url, session_id='fake_session')
+
+    nodes = list(connection.iter_call('get_network', network_id=1, path='nodes.item'))
+    assert len(nodes) == 3
+
+    with connection.batch() as batch:
+        batch.get_network(network_id=1)
+        batch.get_network(network_id=99)
+
+    stats = connection.metrics.snapshot()['functions']['get_network']
+    assert stats['calls'] == 3
+    assert stats['errors'] == 1
+    assert stats['response_bytes'] > 0
+
+
+def test_shared_registry_and_counters(fake_server):
+    registry = MetricsRegistry()
+    policy = RetryPolicy(jitter=False)
+    policy.sleep = lambda seconds: None
+    conn_1 = RemoteJSONConnection(url=fake_server.url, session_id='fake_session',
+                                  metrics=registry, retry=policy)
+    conn_2 = RemoteJSONConnection(url=fake_server.url, session_id='fake_session', metrics=registry)
+
+    fake_server.unavailable = 1
+    conn_1.get_network(network_id=1)
+    conn_2.get_network(network_id=1)
+
+    snapshot = registry.snapshot()
+    assert snapshot['functions']['get_network']['calls'] == 2
+    assert snapshot['counters']['http_retries'] == 1
+
+    assert json.loads(registry.to_json()) == snapshot
+
+    text = registry.to_prometheus()
+    assert 'hydra_client_calls_total{function="get_network"} 2' in text
+    assert 'hydra_client_call_duration_seconds_bucket{function="get_network",le="+Inf"} 2' in text
+    assert 'hydra_client_http_retries_total 1' in text
+
+
+def test_metrics_can_be_disabled(fake_server):
+    connection = RemoteJSONConnection(url=fake_server.url, session_id='fake_session', metrics=False)
+    assert connection.metrics is None
+    assert connection.get_network(network_id=1).name == 'Network 1'
+
+
+def test_histogram_percentiles():
+    histogram = LatencyHistogram(bounds=(0.1, 0.2, 0.5, 1.0))
+    for i in range(90):
+        histogram.observe(0.05)
+    for i in range(10):
+        histogram.observe(0.8)
+
+    assert histogram.percentile(50) <= 0.1
+    assert 0.5 < histogram.percentile(95) <= 0.8
+    assert histogram.percentile(100) == 0.8
+    assert histogram.count == 100
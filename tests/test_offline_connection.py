@@ -0,0 +1,129 @@
+import json
+
+import pytest
+
+from hydra_base.lib.objects import Dataset
+
+from hydra_client.connection import JSONConnection, OfflineConnection, export_snapshot
+from hydra_client.connection.snapshot import Snapshot
+from hydra_client.exception import RequestError
+
+TIMESERIES = json.dumps({'0': {'2020-01-01T00:00:00': 1.0, '2020-01-02T00:00:00': 2.0}})
+
+
+@pytest.fixture()
+def network(tmp_path):
+    """ A local database holding a two node network with one scenario. """
+    connection = JSONConnection(db_url='sqlite:///%s' % (tmp_path / 'hydra.db'), user_id=1)
+    connection.connect()
+
+    volume, flow = connection.add_attributes([{'name': 'volume', 'dimension_id': None},
+                                              {'name': 'flow', 'dimension_id': None}])
+    template = connection.add_template({'name': 'Template', 'templatetypes': [
+        {'name': 'Reservoir', 'resource_type': 'NODE', 'typeattrs': [{'attr_id': volume.id}]},
+        {'name': 'River', 'resource_type': 'LINK', 'typeattrs': [{'attr_id': flow.id}]},
+    ]})
+    types = {t.name: t.id for t in template.templatetypes}
+    project = connection.add_project({'name': 'Project'})
+
+    nodes = [{'id': -i, 'name': 'Node %s' % i, 'x': i, 'y': i,
+              'attributes': [{'id': -i, 'attr_id': volume.id}], 'types': [{'id': types['Reservoir']}]}
+             for i in (1, 2)]
+    links = [{'id': -1, 'name': 'Link 1', 'node_1_id': -1, 'node_2_id': -2,
+              'attributes': [{'id': -3, 'attr_id': flow.id}], 'types': [{'id': types['River']}]}]
+    scenario = {'name': 'Baseline', 'resourcescenarios': [
+        {'resource_attr_id': -1, 'dataset': {'name': 'v1', 'type': 'scalar', 'value': '10', 'unit_id': None}},
+        {'resource_attr_id': -2, 'dataset': {'name': 'v2', 'type': 'timeseries', 'value': TIMESERIES,
+                                             'unit_id': None}},
+        {'resource_attr_id': -3, 'dataset': {'name': 'v3', 'type': 'descriptor', 'value': 'spill',
+                                             'unit_id': None}},
+    ]}
+    network = connection.add_network({'name': 'Network', 'project_id': project.id, 'nodes': nodes,
+                                      'links': links, 'scenarios': [scenario], 'types': []})
+
+    yield connection, network.id
+
+    connection.close_session()
+
+
+@pytest.fixture()
+def offline(network, tmp_path):
+    connection, network_id = network
+    path = str(tmp_path / 'network.snapshot')
+    export_snapshot(connection, network_id, path)
+
+    offline = OfflineConnection(path=path)
+    yield offline, connection, network_id
+    offline.close_session()
+
+
+def test_offline_reads_match_online(offline):
+    offline, connection, network_id = offline
+
+    network = offline.get_network(network_id, include_data=True)
+    online = connection.get_network(network_id)
+    assert sorted(n.name for n in network.nodes) == sorted(n.name for n in online.nodes)
+    assert network.links[0].name == 'Link 1'
+    assert network.nodes[0].types[0].name == 'Reservoir'
+
+    scenario_id = network.scenarios[0].id
+    scenario = offline.get_scenario(scenario_id)
+    online_scenario = connection.get_scenario(scenario_id)
+    values = {rs.resource_attr_id: rs.dataset.value for rs in scenario.resourcescenarios}
+    assert values == {rs.resource_attr_id: rs.dataset.value for rs in online_scenario.resourcescenarios}
+    assert isinstance(scenario.resourcescenarios[0].dataset, Dataset)
+
+    assert offline.get_network(network_id).scenarios[0].resourcescenarios == []
+    assert offline.get_scenario(scenario_id, include_data='N').resourcescenarios == []
+
+    template_id = network.nodes[0].types[0].template_id
+    assert offline.get_template(template_id).name == 'Template'
+    assert sorted(a.name for a in offline.get_attributes()) == sorted(a.name for a in connection.get_attributes())
+
+
+def test_offline_resource_data(offline):
+    offline, connection, network_id = offline
+    network = offline.get_network(network_id)
+    scenario_id = network.scenarios[0].id
+
+    for node in network.nodes:
+        data = offline.get_resource_data('NODE', node.id, scenario_id)
+        online = connection.get_resource_data('NODE', node.id, scenario_id)
+        assert [rs.dataset.value for rs in data] == [rs.dataset.value for rs in online]
+
+    link_data = offline.get_resource_data('LINK', network.links[0].id, scenario_id)
+    assert [rs.dataset.value for rs in link_data] == ['spill']
+
+    without_values = offline.get_resource_data('LINK', network.links[0].id, scenario_id, include_values='N')
+    assert 'value' not in without_values[0].dataset
+
+    rs = offline.get_resource_scenario(link_data[0].resource_attr_id, scenario_id)
+    assert rs.dataset.name == 'v3'
+
+
+def test_offline_errors(offline):
+    offline, connection, network_id = offline
+
+    with pytest.raises(RequestError):
+        offline.get_network(network_id + 100)
+    with pytest.raises(RequestError):
+        offline.get_scenario(-1)
+    with pytest.raises(RequestError):
+        offline.add_node(network_id, {'name': 'New node'})
+
+
+def test_dataset_values_are_not_in_header(offline):
+    offline, connection, network_id = offline
+
+    snapshot = offline.snapshot
+    for scenario in snapshot.scenarios.values():
+        for rs in scenario['resourcescenarios']:
+            assert 'value' not in rs['dataset']
+            assert snapshot.value(rs['dataset']['value_blob']) is not None
+
+
+def test_not_a_snapshot(tmp_path):
+    path = tmp_path / 'other.json'
+    path.write_text('{}')
+    with pytest.raises(RequestError):
+        Snapshot(str(path))
@@ -0,0 +1,25 @@
+import hydra_base as hb
+
+from hydra_client.connection import JSONConnection
+
+
+def test_engine_is_kept_between_calls(tmp_path):
+    connection = JSONConnection(db_url='sqlite:///%s' % (tmp_path / 'hydra.db'), user_id=1,
+                                persistent_engine=True)
+    connection.connect()
+
+    pool = hb.db.engine.pool
+    connection.add_attribute({'name': 'flow', 'dimension_id': None})
+    assert connection.get_attribute_by_name_and_dimension('flow', None).name == 'flow'
+    assert hb.db.engine.pool is pool
+
+    connection.close_session()
+    assert hb.db.engine.pool is not pool
+
+
+def test_engine_is_disposed_by_default(tmp_path):
+    connection = JSONConnection(db_url='sqlite:///%s' % (tmp_path / 'hydra.db'), user_id=1)
+
+    pool = hb.db.engine.pool
+    connection.get_dimensions()
+    assert hb.db.engine.pool is not pool
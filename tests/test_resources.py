@@ -0,0 +1,242 @@
+import pytest
+
+from hydra_base.lib.objects import JSONObject
+from hydra_base.exceptions import HydraPluginError
+
+from hydra_client.resources import HydraNetwork, HydraResource, ScenarioAttribute
+
+NODE_TYPE = {'id': 2, 'name': 'Reservoir', 'template_id': 1, 'template_name': 'Template'}
+LINK_TYPE = {'id': 3, 'name': 'River', 'template_id': 1, 'template_name': 'Template'}
+GROUP_TYPE = {'id': 4, 'name': 'Zone', 'template_id': 1, 'template_name': 'Template'}
+
+
+@pytest.fixture()
+def json_network():
+    """ A get_network result: three nodes in a chain, one group and one scenario. """
+    attributes = [{'id': 1, 'name': 'Volume'}, {'id': 2, 'name': 'flow'}]
+
+    def res_attrs(first_id, attr_ids):
+        return [{'id': first_id + i, 'attr_id': attr_id, 'attr_is_var': 'N'}
+                for i, attr_id in enumerate(attr_ids)]
+
+    nodes = [{'id': n, 'name': 'Node %s' % n, 'x': n, 'y': -n,
+              'attributes': res_attrs(n * 10, [1]), 'types': [NODE_TYPE]}
+             for n in (1, 2, 3)]
+    links = [{'id': n, 'name': 'Link %s' % n, 'node_1_id': n, 'node_2_id': n + 1,
+              'attributes': res_attrs(100 + n * 10, [2]), 'types': [LINK_TYPE]}
+             for n in (1, 2)]
+    groups = [{'id': 1, 'name': 'Group 1', 'attributes': [], 'types': [GROUP_TYPE]}]
+    resourcescenarios = [{'resource_attr_id': ra['id'],
+                          'dataset': {'id': ra['id'], 'type': 'scalar', 'value': str(ra['id'])}}
+                         for resource in nodes + links for ra in resource['attributes']]
+    groupitems = [{'ref_key': 'NODE', 'node_id': 1, 'group_id': 1},
+                  {'ref_key': 'LINK', 'link_id': 2, 'group_id': 1}]
+
+    network = {'id': 1, 'name': 'Network', 'description': '', 'types': [], 'attributes': [],
+               'nodes': nodes, 'links': links, 'resourcegroups': groups,
+               'scenarios': [{'id': 1, 'name': 'Baseline', 'resourcescenarios': resourcescenarios,
+                              'resourcegroupitems': groupitems}]}
+
+    return JSONObject(network), [JSONObject(a) for a in attributes]
+
+
+@pytest.fixture()
+def network(json_network):
+    network = HydraNetwork()
+    network.load(*json_network)
+    return network
+
+
+def test_lookups(network):
+    node = network.get_node(node_id=2)
+    assert node.name == 'Node 2'
+    assert network.get_node(node_name='Node 2') is node
+    assert network.get_node(node_id=99) is None
+
+    link = network.get_link(link_id=1)
+    assert (link.from_node, link.to_node) == ('Node 1', 'Node 2')
+    assert network.get_link(link_name='Link 1') is link
+
+    group = network.get_group(group_id=1)
+    assert network.get_group(group_name='Group 1') is group
+
+
+def test_attribute_lookups(network):
+    node = network.get_node(node_id=1)
+
+    volume = node.get_attribute(attr_name='volume')
+    assert volume is node.get_attribute(attr_name='VOLUME')
+    assert volume is node.get_attribute(attr_id=1)
+    assert volume.value == 10
+    assert node.get_attribute(attr_name='flow') is None
+
+    node.delete_attribute(volume)
+    assert node.get_attribute(attr_name='volume') is None
+    assert node.get_attribute(attr_id=1) is None
+
+
+def test_delete_keeps_indexes_in_step(network):
+    node = network.get_node(node_id=3)
+    network.delete_node(node)
+    assert node not in network.nodes
+    assert network.get_node(node_id=3) is None
+    assert network.get_node(node_name='Node 3') is None
+
+    link = network.get_link(link_id=2)
+    network.delete_link(link)
+    assert network.get_link(link_name='Link 2') is None
+
+    network.delete_group(network.get_group(group_id=1))
+    assert network.get_group(group_id=1) is None
+
+    #A resource sharing a deleted resource's name takes its place
+    first, second = HydraResource(), HydraResource()
+    first.ID, second.ID = 10, 11
+    first.name = second.name = 'Twin'
+    network.add_node(first)
+    network.add_node(second)
+    assert network.get_node(node_name='Twin') is first
+    network.delete_node(first)
+    assert network.get_node(node_name='Twin') is second
+
+
+def test_type_and_group_lookups(network):
+    assert [n.name for n in network.get_node(node_type_id=2)] == ['Node 1', 'Node 2', 'Node 3']
+    assert [l.name for l in network.get_link(link_type_id=3)] == ['Link 1', 'Link 2']
+    assert [g.name for g in network.get_group(group_type_id=4)] == ['Group 1']
+    assert network.get_node(node_type_id=3) == []
+
+    assert [n.name for n in network.get_node(group=1)] == ['Node 1']
+    assert [l.name for l in network.get_link(group=1)] == ['Link 2']
+
+    network.delete_node(network.get_node(node_id=1))
+    assert network.get_node(group=1) == []
+    assert [n.name for n in network.get_node(node_type_id=2)] == ['Node 2', 'Node 3']
+
+
+def test_type_catalog(network):
+    assert [t.name for t in network.get_node_types()] == ['Reservoir']
+    assert [t.name for t in network.get_link_types(template_id=1)] == ['River']
+    assert network.get_link_types(template_id=2) == []
+    assert [t.name for t in network.get_group_types()] == ['Zone']
+    assert [t.name for t in network.get_types(template_id=1)] == ['Reservoir', 'River', 'Zone']
+
+    for link in list(network.links):
+        network.delete_link(link)
+    assert network.get_link_types() == []
+
+
+def test_networks_do_not_share_state(json_network):
+    first = HydraNetwork()
+    first.load(*json_network)
+    second = HydraNetwork()
+    second.load(*json_network)
+
+    assert len(first.nodes) == len(second.nodes) == 3
+    assert len(first.groups) == 1
+    assert first.nodes[0] is not second.nodes[0]
+    assert HydraNetwork().nodes == []
+
+
+def test_resources_are_slotted(network):
+    node = network.get_node(node_id=1)
+    attribute = node.attributes[0]
+    assert not hasattr(node, '__dict__')
+    assert not hasattr(attribute, '__dict__')
+    with pytest.raises(AttributeError):
+        attribute.colour = 'red'
+
+    assert (node.X, node.Y) == (1, -1)
+    assert attribute.is_var is False
+    assert network.get_link(link_id=1).from_node == 'Node 1'
+
+
+def scenario(scenario_id, network, offset):
+    """ A get_scenario result for 'network' with every value raised by 'offset'. """
+    return JSONObject({
+        'id': scenario_id, 'name': 'Scenario %s' % scenario_id,
+        'resourcescenarios': [{'resource_attr_id': rs.resource_attr_id,
+                               'dataset': {'id': rs.dataset.id + offset, 'type': 'scalar',
+                                           'value': rs.dataset.value + offset}}
+                              for rs in network.scenarios[0].resourcescenarios],
+    })
+
+
+def test_all_scenarios(json_network):
+    json_net, json_attrs = json_network
+    json_net.scenarios.append(scenario(2, json_net, 1000))
+
+    network = HydraNetwork()
+    network.load(json_net, json_attrs, all_scenarios=True)
+    assert network.get_scenario_ids() == [1, 2]
+    assert network.scenario_id == 1
+
+    volume = network.get_node(node_id=1).get_attribute(attr_name='volume')
+    assert (volume.value, volume.dataset_id, volume.dataset_type) == (10, 10, 'scalar')
+    assert volume.get_value(2) == 1010
+    assert not hasattr(volume, '__dict__')
+    #No slots are kept for the values, which are read from the scenario
+    assert not any(name in getattr(cls, '__slots__', ()) for cls in ScenarioAttribute.__mro__
+                   for name in ('dataset_id', 'dataset_type', 'value'))
+
+    network.set_scenario(2)
+    assert network.scenario_id == 2
+    assert (volume.value, volume.dataset_id) == (1010, 1010)
+    assert network.get_link(link_id=2).get_attribute(attr_name='flow').value == 1120
+
+    #Setting a value changes the active scenario only
+    volume.value = 5
+    assert (volume.value, volume.dataset_id) == (5, 1010)
+    assert volume.get_value(1) == 10
+    network.set_scenario(1)
+    assert volume.value == 10
+
+    network.add_scenario(scenario(3, json_net, 2000))
+    network.set_scenario(3)
+    assert volume.value == 2010
+    # Adding the active scenario again replaces the values shown
+    network.add_scenario(scenario(3, json_net, 3000))
+    assert volume.value == 3010
+    with pytest.raises(HydraPluginError):
+        network.remove_scenario(3)
+    network.remove_scenario(2)
+    assert network.get_scenario_ids() == [1, 3]
+    with pytest.raises(HydraPluginError):
+        network.set_scenario(2)
+    with pytest.raises(HydraPluginError):
+        volume.get_value(2)
+
+
+def test_single_scenario_network_cannot_change_scenario(network, json_network):
+    assert network.get_scenario_ids() == [1]
+    with pytest.raises(HydraPluginError):
+        network.add_scenario(scenario(2, json_network[0], 1000))
+    with pytest.raises(HydraPluginError):
+        network.set_scenario(1)
+    with pytest.raises(HydraPluginError):
+        network.remove_scenario(2)
+
+
+def test_indexes_follow_type_and_group_changes(network):
+    node = network.get_node(node_id=2)
+    canal = JSONObject({'id': 5, 'name': 'Canal', 'template_id': 1, 'template_name': 'Template'})
+
+    node.set_type(canal)
+    node.group(1)
+    network.get_link(link_id=1).group(2)
+
+    assert network.get_node(node_type_id=5) == [node]
+    assert [t.name for t in network.get_node_types()] == ['Reservoir', 'Canal']
+    assert [n.name for n in network.get_node(group=1)] == ['Node 1', 'Node 2']
+    assert [l.name for l in network.get_link(group=2)] == ['Link 1']
+
+    # Repeating a type or group does not index the resource twice
+    node.set_type([canal])
+    node.group(1)
+    assert network.get_node(node_type_id=5) == [node]
+    assert [n.name for n in network.get_node(group=1)] == ['Node 1', 'Node 2']
+
+    # A deleted resource is no longer indexed by its later changes
+    network.delete_node(node)
+    node.group(3)
+    assert network.get_node(group=3) == []
@@ -0,0 +1,225 @@
+import time
+import asyncio
+
+import pytest
+import requests
+
+from hydra_client.connection import RemoteJSONConnection, AsyncRemoteJSONConnection
+from hydra_client.connection.retry import RetryPolicy, CircuitBreaker, parse_retry_after
+from hydra_client.exception import RequestError, CircuitOpenError
+from fake_json_server import *
+
+
+def add_project(server, cookies, project=None):
+    return dict(project, id=2)
+
+
+def make_policy(**kwargs):
+    policy = RetryPolicy(**kwargs)
+    policy.delays = []
+    policy.sleep = policy.delays.append
+
+    async def async_sleep(delay):
+        policy.delays.append(delay)
+    policy.async_sleep = async_sleep
+    return policy
+
+
+def test_reads_are_retried(fake_server):
+    policy = make_policy(max_attempts=3, jitter=False)
+    connection = RemoteJSONConnection(url=fake_server.url, session_id='fake_session', retry=policy)
+
+    fake_server.unavailable = 2
+    fake_server.retry_after = 2
+    network = connection.get_network(network_id=1)
+
+    assert network.name == 'Network 1'
+    assert fake_server.requests == 3
+    # The server's Retry-After is longer than the backoff
+    assert policy.delays == [2, 2]
+
+    stats = connection.get_retry_stats()
+    assert stats['requests'] == 1
+    assert stats['attempts'] == 3
+    assert stats['retries'] == 2
+    assert stats['amplification'] == 3
+
+
+def test_retries_give_up(fake_server):
+    policy = make_policy(max_attempts=2, jitter=False)
+    connection = RemoteJSONConnection(url=fake_server.url, session_id='fake_session', retry=policy)
+
+    fake_server.unavailable = 5
+    with pytest.raises(RequestError):
+        connection.get_network(network_id=1)
+
+    assert fake_server.requests == 2
+    assert policy.delays == [0.5]
+
+
+def test_writes_are_not_retried(fake_server):
+    fake_server.functions['add_project'] = add_project
+    policy = make_policy()
+    connection = RemoteJSONConnection(url=fake_server.url, session_id='fake_session', retry=policy)
+
+    fake_server.unavailable = 1
+    with pytest.raises(RequestError):
+        connection.add_project(project={'name': 'Project 2'})
+    assert fake_server.requests == 1
+
+    # Unless they are known to be safe to repeat
+    policy.retry_writes = frozenset(['add_project'])
+    fake_server.unavailable = 1
+    assert connection.add_project(project={'name': 'Project 2'}).id == 2
+    assert fake_server.requests == 3
+
+
+def test_circuit_breaker(fake_server):
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    connection = RemoteJSONConnection(url=fake_server.url, session_id='fake_session',
+                                      circuit_breaker=breaker)
+
+    fake_server.unavailable = 2
+    for i in range(2):
+        with pytest.raises(RequestError):
+            connection.get_network(network_id=1)
+
+    # The server is no longer contacted
+    with pytest.raises(CircuitOpenError):
+        connection.get_network(network_id=1)
+    assert fake_server.requests == 2
+    assert connection.get_retry_stats()['circuit_state'] == 'open'
+    assert connection.get_retry_stats()['circuit_rejections'] == 1
+
+    # After the reset timeout one trial request closes it again
+    breaker.opened_at -= 60
+    assert connection.get_network(network_id=1).name == 'Network 1'
+    assert breaker.state == 'closed'
+
+
+def test_connection_errors_are_retried():
+    policy = make_policy(max_attempts=3)
+    connection = RemoteJSONConnection(url='http://127.0.0.1:1/json', session_id='fake_session',
+                                      retry=policy, connect_timeout=1)
+
+    with pytest.raises(requests.exceptions.ConnectionError):
+        connection.get_network(network_id=1)
+    assert len(policy.delays) == 2
+    assert connection.get_retry_stats()['failures'] == 3
+
+
+def test_parse_retry_after():
+    assert parse_retry_after(None) is None
+    assert parse_retry_after('5') == 5
+    assert parse_retry_after('Thu, 01 Jan 1970 00:00:00 GMT') == 0
+    assert parse_retry_after('soon') is None
+
+
+def test_async_reads_are_retried(fake_server):
+    policy = make_policy(max_attempts=3, jitter=False)
+
+    async def run():
+        async with AsyncRemoteJSONConnection(url=fake_server.url, session_id='fake_session',
+                                             retry=policy) as conn:
+            network = await conn.get_network(network_id=1)
+            fake_server.unavailable = 5
+            with pytest.raises(RequestError):
+                await conn.get_network(network_id=1)
+            return network, conn.get_retry_stats()
+
+    fake_server.unavailable = 2
+    fake_server.retry_after = 2
+    network, stats = asyncio.run(run())
+
+    assert network.name == 'Network 1'
+    assert fake_server.requests == 6
+    assert policy.delays == [2, 2, 2, 2]
+    assert (stats['requests'], stats['attempts'], stats['retries']) == (2, 6, 4)
+
+
+def test_async_circuit_breaker(fake_server):
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+
+    async def run():
+        async with AsyncRemoteJSONConnection(url=fake_server.url, session_id='fake_session',
+                                             circuit_breaker=breaker) as conn:
+            for i in range(2):
+                with pytest.raises(RequestError):
+                    await conn.get_network(network_id=1)
+            with pytest.raises(CircuitOpenError):
+                await conn.get_network(network_id=1)
+            assert fake_server.requests == 2
+
+            breaker.opened_at -= 60
+            return await conn.get_network(network_id=1)
+
+    fake_server.unavailable = 2
+    assert asyncio.run(run()).name == 'Network 1'
+    assert breaker.state == 'closed'
+
+
+def test_async_connection_errors_are_retried():
+    aiohttp = pytest.importorskip('aiohttp')
+    policy = make_policy(max_attempts=3)
+
+    async def run():
+        async with AsyncRemoteJSONConnection(url='http://127.0.0.1:1/json', session_id='fake_session',
+                                             retry=policy, connect_timeout=1) as conn:
+            await conn.get_network(network_id=1)
+
+    with pytest.raises(aiohttp.ClientConnectionError):
+        asyncio.run(run())
+    assert len(policy.delays) == 2
+
+
+def test_async_cancelled_trial_releases_circuit(fake_server):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+
+    def slow_get_network(server, cookies, network_id=None):
+        time.sleep(0.5)
+        return get_network(server, cookies, network_id=network_id)
+
+    async def run():
+        async with AsyncRemoteJSONConnection(url=fake_server.url, session_id='fake_session',
+                                             circuit_breaker=breaker) as conn:
+            with pytest.raises(RequestError):
+                await conn.get_network(network_id=1)
+            assert breaker.state == 'open'
+
+            breaker.opened_at -= 60
+            fake_server.functions['get_network'] = slow_get_network
+            trial = asyncio.ensure_future(conn.get_network(network_id=1))
+            await asyncio.sleep(0.1)
+            trial.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await trial
+
+            fake_server.functions['get_network'] = get_network
+            return await conn.get_network(network_id=1)
+
+    fake_server.unavailable = 1
+    assert asyncio.run(run()).name == 'Network 1'
+    assert breaker.state == 'closed'
+
+
+def test_unexpected_error_releases_circuit(fake_server, monkeypatch):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    connection = RemoteJSONConnection(url=fake_server.url, session_id='fake_session',
+                                      circuit_breaker=breaker)
+    fake_server.unavailable = 1
+    with pytest.raises(RequestError):
+        connection.get_network(network_id=1)
+
+    breaker.opened_at -= 60
+    def broken_post(*args, **kwargs):
+        raise requests.exceptions.ChunkedEncodingError()
+    monkeypatch.setattr(connection.http_session, 'post', broken_post)
+    with pytest.raises(requests.exceptions.ChunkedEncodingError):
+        connection.get_network(network_id=1)
+    monkeypatch.undo()
+
+    # The failed trial reopened the circuit, and a later trial goes through
+    assert breaker.state == 'open'
+    breaker.opened_at -= 60
+    assert connection.get_network(network_id=1).name == 'Network 1'
+    assert breaker.state == 'closed'
@@ -0,0 +1,39 @@
+import pytest
+
+from hydra_client.connection import RemoteJSONConnection, streaming
+from hydra_client.exception import RequestError
+from fake_json_server import *
+
+
+def test_iter_call_single_path(fake_server):
+    connection = RemoteJSONConnection(url=fake_server.url, session_id='fake_session')
+
+    nodes = connection.iter_call('get_network', network_id=1, path='nodes.item')
+
+    assert [n.name for n in nodes] == ['Node 1', 'Node 2', 'Node 3']
+
+
+def test_iter_call_multiple_paths(fake_server):
+    connection = RemoteJSONConnection(url=fake_server.url, session_id='fake_session')
+
+    values = list(connection.iter_call('get_network', network_id=1,
+                                       path=['nodes.item', 'links.item', 'name']))
+
+    assert [p for p, v in values] == ['name'] + ['nodes.item'] * 3 + ['links.item']
+    assert values[-1][1].node_1_id == 1
+
+
+def test_iter_call_without_ijson(fake_server, monkeypatch):
+    monkeypatch.setattr(streaming, 'ijson', None)
+    connection = RemoteJSONConnection(url=fake_server.url, session_id='fake_session')
+
+    nodes = connection.iter_call('get_network', network_id=1, path='nodes.item')
+
+    assert [n.id for n in nodes] == [1, 2, 3]
+
+
+def test_iter_call_fault(fake_server):
+    connection = RemoteJSONConnection(url=fake_server.url, session_id='fake_session')
+
+    with pytest.raises(RequestError):
+        list(connection.iter_call('get_network', network_id=99, path='nodes.item'))
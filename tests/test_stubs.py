@@ -0,0 +1,112 @@
+import pytest
+
+from hydra_base.lib.objects import JSONObject
+
+from hydra_client.connection import RemoteJSONConnection
+from hydra_client.connection.base_connection import BaseConnection
+from hydra_client.connection.stubs import get_spec, bind_arguments
+from hydra_client.exception import InvalidArgumentsError
+from fake_json_server import *
+
+
+class RecordingConnection(BaseConnection):
+    """ A connection which records its calls instead of making them. """
+    def __init__(self, *args, **kwargs):
+        super(RecordingConnection, self).__init__(*args, **kwargs)
+        self.calls = []
+
+    def _call(self, func_name, *args, **kwargs):
+        self.calls.append((func_name, args, kwargs))
+        return None
+
+
+def test_stubs_are_made_once_per_class():
+    connection = RecordingConnection()
+
+    connection.get_attribute_by_id(1)
+    connection.get_attribute_by_id(2)
+
+    stub = vars(RecordingConnection)['get_attribute_by_id']
+    assert stub.__name__ == 'get_attribute_by_id'
+    assert connection.get_attribute_by_id.__func__ is stub
+    # Other connection classes get their own stubs
+    assert 'get_attribute_by_id' not in vars(BaseConnection)
+
+
+def test_stubs_name_positional_arguments():
+    connection = RecordingConnection()
+
+    connection.get_attribute_by_name_and_dimension('volume', None)
+    connection.get_network(1, include_data=True)
+
+    assert connection.calls == [
+        ('get_attribute_by_name_and_dimension', (), {'name': 'volume', 'dimension_id': None}),
+        ('get_network', (), {'network_id': 1, 'include_data': True}),
+    ]
+
+
+def test_stubs_reject_invalid_calls():
+    connection = RecordingConnection()
+
+    with pytest.raises(InvalidArgumentsError, match='missing required arguments: network_id'):
+        connection.get_network(include_data=True)
+    with pytest.raises(InvalidArgumentsError, match='multiple values'):
+        connection.get_network(1, network_id=1)
+    with pytest.raises(TypeError, match='multiple values'):
+        connection.get_network(1, include_attributes=True, *[False])
+    with pytest.raises(InvalidArgumentsError, match='positional arguments'):
+        connection.get_attr_by_name_and_dimension('volume', None, 'extra')
+    with pytest.raises(InvalidArgumentsError, match='unexpected arguments: dimension'):
+        connection.get_attr_by_name_and_dimension(name='volume', dimension_id=None, dimension='x')
+    # Invalid calls are never made, and the error is also a TypeError
+    with pytest.raises(TypeError):
+        connection.get_network()
+    assert connection.calls == []
+
+    # user_id is supplied by the connection
+    connection.get_attr_by_name_and_dimension('volume', None, user_id=1)
+    assert len(connection.calls) == 1
+
+
+def test_validation_can_be_turned_off():
+    connection = RecordingConnection(validate_args=False)
+
+    connection.get_network(include_data=True)
+
+    assert connection.calls == [('get_network', (), {'include_data': True})]
+
+
+def test_unknown_functions_are_passed_through():
+    connection = RecordingConnection()
+
+    connection.server_only_function(1, a=2)
+
+    assert connection.calls == [('server_only_function', (1,), {'a': 2})]
+    assert 'server_only_function' not in vars(RecordingConnection)
+    assert get_spec('server_only_function') is None
+
+
+def test_remote_positional_arguments(fake_server):
+    connection = RemoteJSONConnection(url=fake_server.url, session_id='fake_session')
+
+    assert connection.get_network(1).name == 'Network 1'
+    assert connection.call('get_network', 1).name == 'Network 1'
+    # The server protocol's form, with the arguments in one dict
+    assert connection.get_network({'network_id': 1}).name == 'Network 1'
+    assert connection.call('get_network', {'network_id': 1}).name == 'Network 1'
+
+    assert [c[1] for c in fake_server.calls[-4:]] == [{'network_id': 1}] * 4
+
+    # Dict subclasses, such as JSONObjects, are the arguments too
+    assert connection.get_network(JSONObject({'network_id': 1})).name == 'Network 1'
+    assert connection.call('get_network', JSONObject({'network_id': 1})).name == 'Network 1'
+    assert [c[1] for c in fake_server.calls[-2:]] == [{'network_id': 1}] * 2
+
+    # Positional arguments of functions hydra_base does not have cannot be named
+    with pytest.raises(InvalidArgumentsError):
+        connection.call('server_only_function', 1, 2)
+
+
+def test_bind_arguments():
+    assert bind_arguments('get_network', (1,), {'include_data': 'Y'}) == {'network_id': 1, 'include_data': 'Y'}
+    assert bind_arguments('anything', (), {'a': 1}) == {'a': 1}
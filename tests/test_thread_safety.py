@@ -0,0 +1,76 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from hydra_client.connection import RemoteJSONConnection, JSONConnection
+from fake_json_server import *
+
+NUM_THREADS = 16
+CALLS_PER_THREAD = 25
+
+
+def hammer(func, num_threads=NUM_THREADS, calls_per_thread=CALLS_PER_THREAD):
+    """ Run func(thread_number, call_number) from many threads at once. """
+    barrier = threading.Barrier(num_threads)
+
+    def run(i):
+        barrier.wait()
+        return [func(i, j) for j in range(calls_per_thread)]
+
+    with ThreadPoolExecutor(max_workers=num_threads) as executor:
+        return list(executor.map(run, range(num_threads)))
+
+
+def test_remote_connection_shared_between_threads(fake_server):
+    connection = RemoteJSONConnection(url=fake_server.url, pool_maxsize=4)
+    connection.login(username='root', password='password')
+
+    sessions = set()
+    adapters = set()
+
+    def call(i, j):
+        sessions.add(id(connection.http_session))
+        adapters.add(id(connection.http_session.get_adapter(fake_server.url)))
+        projects = connection.get_projects()
+        network = connection.call('get_network', network_id=1, include_data=True)
+        return len(projects), network.name
+
+    results = hammer(call)
+
+    assert all(r == (1, 'Network 1') for thread_results in results for r in thread_results)
+    # One login, shared by all threads
+    assert [c[0] for c in fake_server.calls].count('login') == 1
+    assert connection.session_id == 'fake_session'
+    # A session per thread, all using the same connection pool
+    assert len(sessions) == NUM_THREADS
+    assert len(adapters) == 1
+
+    connection.close_session()
+    assert connection.get_projects()[0].name == 'Project 1'
+
+
+def test_call_arguments_are_not_modified(fake_server):
+    connection = RemoteJSONConnection(url=fake_server.url, session_id='fake_session')
+    kwargs = {'network_id': 1, 'include_data': True}
+
+    call, headers, cookie = connection._prepare_call('get_network', (), kwargs)
+
+    assert call == {'get_network': {'network_id': 1, 'include_data': 'Y'}}
+    assert kwargs['include_data'] is True
+
+
+def test_local_connection_shared_between_threads(tmp_path):
+    connection = JSONConnection(db_url='sqlite:///%s' % (tmp_path / 'hydra.db'), user_id=1)
+    connection.connect()
+
+    def call(i, j):
+        if j == 0:
+            connection.add_attribute({'name': 'attr %s' % i, 'dimension_id': None})
+        return len(connection.get_attributes())
+
+    results = hammer(call, num_threads=8, calls_per_thread=10)
+
+    assert all(r >= 1 for thread_results in results for r in thread_results)
+    names = set(a.name for a in connection.get_attributes())
+    assert set('attr %s' % i for i in range(8)) <= names
+    assert connection._active_calls == 0
+    connection.close_session()
@@ -0,0 +1,99 @@
+import io
+import json
+
+from hydra_client.connection import RemoteJSONConnection, JSONConnection
+from hydra_client.connection.tracing import Tracer, JSONLinesExporter, OpenTelemetryExporter, phase
+from fake_json_server import *
+
+
+class ListExporter(object):
+    def __init__(self):
+        self.spans = []
+
+    def export(self, span):
+        self.spans.append(span)
+
+
+def phase_names(span):
+    return [p[0] for p in span.phases]
+
+
+def test_remote_call_phases(fake_server):
+    exporter = ListExporter()
+    connection = RemoteJSONConnection(url=fake_server.url, session_id='fake_session',
+                                      tracer=Tracer(exporter))
+
+    connection.get_network(network_id=1)
+    with pytest.raises(Exception):
+        connection.get_network(network_id=99)
+
+    span, failed = exporter.spans
+    assert span.name == 'get_network'
+    assert phase_names(span) == ['encode', 'request', 'decode']
+    assert span.attributes['connection'] == 'RemoteJSONConnection'
+    assert span.attributes['request_bytes'] > 0
+    assert span.attributes['response_bytes'] > 0
+    assert sum(p[2] for p in span.phases) <= span.duration
+    assert span.error is None
+    assert failed.error.startswith('RequestError')
+
+    list(connection.iter_call('get_network', network_id=1, path='nodes.item'))
+    assert phase_names(exporter.spans[-1]) == ['request', 'stream']
+
+
+def test_json_lines_exporter(fake_server):
+    output = io.StringIO()
+    connection = RemoteJSONConnection(url=fake_server.url, session_id='fake_session',
+                                      tracer=Tracer(JSONLinesExporter(output), attributes={'app': 'test'}))
+
+    connection.get_network(network_id=1)
+    connection.get_network(network_id=1)
+
+    lines = [json.loads(l) for l in output.getvalue().splitlines()]
+    assert len(lines) == 2
+    assert lines[0]['name'] == 'get_network'
+    assert lines[0]['attributes']['app'] == 'test'
+    assert [p['name'] for p in lines[0]['phases']] == ['encode', 'request', 'decode']
+
+
+def test_sampling_and_untraced_calls(fake_server):
+    exporter = ListExporter()
+    connection = RemoteJSONConnection(url=fake_server.url, session_id='fake_session',
+                                      tracer=Tracer(exporter, sample_rate=0))
+    connection.get_network(network_id=1)
+    assert exporter.spans == []
+
+    # Phases outside a traced call are ignored
+    with phase('anything'):
+        pass
+
+
+def test_local_call_phases(tmp_path):
+    exporter = ListExporter()
+    connection = JSONConnection(db_url='sqlite:///%s' % (tmp_path / 'hydra.db'), user_id=1,
+                                tracer=Tracer(exporter))
+    connection.get_dimensions()
+
+    span = exporter.spans[-1]
+    assert span.name == 'get_dimensions'
+    assert phase_names(span) == ['convert_args', 'execute', 'convert_result', 'commit', 'dispose']
+    connection.close_session()
+
+
+def test_opentelemetry_exporter(fake_server):
+    sdk_trace = pytest.importorskip('opentelemetry.sdk.trace')
+    export = pytest.importorskip('opentelemetry.sdk.trace.export')
+    in_memory = pytest.importorskip('opentelemetry.sdk.trace.export.in_memory_span_exporter')
+
+    otel_exporter = in_memory.InMemorySpanExporter()
+    provider = sdk_trace.TracerProvider()
+    provider.add_span_processor(export.SimpleSpanProcessor(otel_exporter))
+
+    connection = RemoteJSONConnection(url=fake_server.url, session_id='fake_session',
+                                      tracer=Tracer(OpenTelemetryExporter(provider)))
+    connection.get_network(network_id=1)
+
+    spans = {s.name: s for s in otel_exporter.get_finished_spans()}
+    assert set(spans) == {'get_network', 'encode', 'request', 'decode'}
+    assert spans['request'].parent.span_id == spans['get_network'].context.span_id
+    assert spans['get_network'].attributes['request_bytes'] > 0
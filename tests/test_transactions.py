@@ -0,0 +1,79 @@
+import pytest
+
+from hydra_client.connection import JSONConnection
+
+
+@pytest.fixture(params=[True, False], ids=['autocommit', 'no_autocommit'])
+def connection(request, tmp_path):
+    connection = JSONConnection(db_url='sqlite:///%s' % (tmp_path / 'hydra.db'), user_id=1,
+                                autocommit=request.param, cache=True)
+    connection.connect()
+    yield connection
+    connection.close_session()
+
+
+def attr_names(connection):
+    return sorted(a.name for a in connection.get_attributes())
+
+
+def add(connection, name):
+    return connection.add_attribute({'name': name, 'dimension_id': None})
+
+
+def test_commit(connection):
+    with connection.transaction():
+        for i in range(3):
+            add(connection, 'attr %s' % i)
+        # Calls inside the transaction see its changes
+        assert len(attr_names(connection)) == 3
+
+    with connection.transaction():
+        assert attr_names(connection) == ['attr 0', 'attr 1', 'attr 2']
+
+
+def test_rollback(connection):
+    with pytest.raises(ValueError):
+        with connection.transaction():
+            add(connection, 'flow')
+            raise ValueError("Stop")
+
+    with connection.transaction():
+        assert attr_names(connection) == []
+
+
+def test_savepoints(connection):
+    with connection.transaction():
+        add(connection, 'kept')
+        with pytest.raises(ValueError):
+            with connection.transaction():
+                add(connection, 'undone')
+                raise ValueError("Stop")
+        with connection.transaction():
+            add(connection, 'nested')
+
+    with connection.transaction():
+        assert attr_names(connection) == ['kept', 'nested']
+
+
+def test_failed_call_leaves_transaction_usable(connection):
+    with connection.transaction():
+        add(connection, 'flow')
+        with pytest.raises(Exception):
+            with connection.transaction():
+                connection.get_attribute_by_id(-1)
+        add(connection, 'volume')
+
+    with connection.transaction():
+        assert attr_names(connection) == ['flow', 'volume']
+
+
+def test_reads_in_a_transaction_are_not_cached(connection):
+    with pytest.raises(ValueError):
+        with connection.transaction():
+            add(connection, 'flow')
+            assert attr_names(connection) == ['flow']
+            raise ValueError("Stop")
+
+    with connection.transaction():
+        assert attr_names(connection) == []
+    assert connection.cache.stats()['entries'] == 0
@@ -0,0 +1,95 @@
+import asyncio
+
+import pytest
+import requests
+
+from hydra_client.connection import RemoteJSONConnection, AsyncRemoteJSONConnection
+from hydra_client.connection import transports
+from hydra_client.exception import RequestError
+from fake_json_server import *
+
+
+@pytest.fixture()
+def inproc_url(fake_server):
+    transports.register_app('fake', fake_server.wsgi_app)
+    yield 'inproc://fake/json'
+    transports.unregister_app('fake')
+
+
+@pytest.fixture()
+def unix_url(fake_server, tmp_path):
+    path = str(tmp_path / 'hydra.sock')
+    fake_server.serve_unix(path)
+    return 'unix://%s' % path
+
+
+@pytest.fixture(params=['inproc', 'unix'])
+def local_url(request):
+    return request.getfixturevalue('%s_url' % request.param)
+
+
+def test_calls(local_url, fake_server):
+    connection = RemoteJSONConnection(url=local_url, app_name="Test Application")
+    assert connection.url == local_url
+
+    user_id, session_id = connection.login(username='root', password='')
+    assert (user_id, session_id) == (1, 'fake_session')
+
+    assert connection.get_projects()[0].name == 'Project 1'
+    assert connection.get_network(network_id=1).name == 'Network 1'
+    with pytest.raises(RequestError, match='ResourceNotFoundError'):
+        connection.get_network(network_id=99)
+
+    nodes = list(connection.iter_call('get_network', network_id=1, path='nodes.item'))
+    assert [n.name for n in nodes] == ['Node 1', 'Node 2', 'Node 3']
+
+    assert [c[0] for c in fake_server.calls] == ['login', 'get_projects', 'get_network',
+                                                 'get_network', 'get_network']
+    connection.close_session()
+
+
+def test_unix_keeps_connections_alive(unix_url, fake_server):
+    connection = RemoteJSONConnection(url=unix_url, session_id='fake_session')
+    for _ in range(5):
+        connection.get_network(network_id=1)
+    assert connection._adapter.pool.num_connections == 1
+    connection.close_session()
+
+
+def test_unix_request_path():
+    assert transports.unix_socket_path('unix:///run/hydra.sock?path=/hydra/json') == '/run/hydra.sock'
+    assert transports.unix_socket_path('unix://%2Frun%2Fhydra.sock') == '/run/hydra.sock'
+    assert transports.request_path('unix:///run/hydra.sock?path=/hydra/json') == '/hydra/json'
+    assert transports.request_path('unix:///run/hydra.sock') == '/json'
+    assert transports.request_path('inproc://hydra') == '/json'
+
+
+def test_missing_socket_is_retried(tmp_path):
+    url = 'unix://%s' % (tmp_path / 'missing.sock')
+    connection = RemoteJSONConnection(url=url, session_id='fake_session', retry=True)
+    connection.retry.sleep = lambda delay: None
+
+    with pytest.raises(requests.exceptions.ConnectionError):
+        connection.get_network(network_id=1)
+    assert connection.get_retry_stats()['failures'] == connection.retry.max_attempts
+
+
+def test_unknown_transports():
+    with pytest.raises(RequestError, match='No application'):
+        RemoteJSONConnection(url='inproc://nothing', session_id='fake_session').get_network(network_id=1)
+    with pytest.raises(RequestError, match='no transport'):
+        RemoteJSONConnection(url='gopher://hydra', session_id='fake_session').get_network(network_id=1)
+
+
+def test_async_unix(unix_url):
+    async def run():
+        async with AsyncRemoteJSONConnection(url=unix_url) as connection:
+            await connection.login(username='root', password='')
+            return connection.session_id, await connection.get_network(network_id=1)
+
+    session_id, network = asyncio.run(run())
+    assert session_id == 'fake_session'
+    assert network.name == 'Network 1'
+
+    with pytest.raises(RequestError):
+        AsyncRemoteJSONConnection(url='inproc://fake')